@@ -0,0 +1,97 @@
+"""Benchmark for reading tiles concurrently from a single `ISyntax` instance.
+
+Tiles are decoded without holding the GIL, so reading with N threads should give
+close to N times the throughput of a single thread (up to the number of cores).
+For each thread count, a fresh instance is opened so that every run starts with a
+cold tile cache.
+
+Example:
+    $ python benchmarks/bench_threaded_reads.py testslide.isyntax --threads 1 2 4 8
+
+Pass `--min-efficiency` to exit with a non-zero status when the parallel efficiency
+at the highest thread count falls below the given fraction.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from isyntax import ISyntax
+
+
+def tile_block(isyntax: ISyntax, level: int, n_tiles: int) -> list[tuple[int, int]]:
+    """Picks a roughly square block of tiles around the centre of the level."""
+    tiles_x, tiles_y = isyntax.level_tiles[level]
+    side = max(1, round(n_tiles**0.5))
+    x0 = max(0, (tiles_x - side) // 2)
+    y0 = max(0, (tiles_y - side) // 2)
+    coords = [
+        (x, y)
+        for y in range(y0, min(tiles_y, y0 + side))
+        for x in range(x0, min(tiles_x, x0 + side))
+    ]
+    return coords[:n_tiles]
+
+
+def run(path: Path, level: int, n_tiles: int, n_threads: int, io: str) -> float:
+    """Returns the throughput (in tiles per second) of reading a block of tiles."""
+    with ISyntax.open(path, io=io) as isyntax:  # type: ignore[arg-type]
+        coords = tile_block(isyntax, level, n_tiles)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            for _ in executor.map(lambda c: isyntax.read_tile(c[0], c[1], level), coords):
+                pass
+        elapsed = time.perf_counter() - start
+    return len(coords) / elapsed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", type=Path, help="iSyntax file to read from")
+    parser.add_argument("--level", type=int, default=0, help="level to read tiles from")
+    parser.add_argument("--tiles", type=int, default=256, help="number of tiles to read per run")
+    parser.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, os.cpu_count() or 1],
+        help="thread counts to benchmark",
+    )
+    parser.add_argument("--io", choices=["python", "native", "mmap"], default="native")
+    parser.add_argument(
+        "--min-efficiency",
+        type=float,
+        default=None,
+        help="minimum acceptable speedup per thread at the highest thread count",
+    )
+    args = parser.parse_args(argv)
+
+    thread_counts = sorted(set(args.threads))
+    baseline = run(args.path, args.level, args.tiles, 1, args.io)
+    print(f"{'threads':>7}  {'tiles/s':>9}  {'speedup':>7}  {'efficiency':>10}")
+    efficiency = 1.0
+    for n_threads in thread_counts:
+        throughput = (
+            baseline
+            if n_threads == 1
+            else run(args.path, args.level, args.tiles, n_threads, args.io)
+        )
+        speedup = throughput / baseline
+        efficiency = speedup / n_threads
+        print(f"{n_threads:>7}  {throughput:>9.1f}  {speedup:>6.2f}x  {efficiency:>10.0%}")
+
+    if args.min_efficiency is not None and efficiency < args.min_efficiency:
+        print(
+            f"Parallel efficiency {efficiency:.0%} is below the minimum of "
+            f"{args.min_efficiency:.0%}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
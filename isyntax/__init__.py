@@ -1,5 +1,22 @@
-from isyntax.wrapper import ISyntax
+from isyntax.aio import AsyncISyntax
+from isyntax.disk_cache import DiskTileCache
+from isyntax.remote import HTTPRangeSource, RangedFile
+from isyntax.wrapper import (
+    CacheLevelStats,
+    CacheStats,
+    ISyntax,
+    ISyntaxCache,
+    SlideMetadata,
+)
 
 __all__ = [
+    "AsyncISyntax",
+    "CacheLevelStats",
+    "CacheStats",
+    "DiskTileCache",
+    "HTTPRangeSource",
     "ISyntax",
+    "ISyntaxCache",
+    "RangedFile",
+    "SlideMetadata",
 ]
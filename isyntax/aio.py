@@ -0,0 +1,212 @@
+import asyncio
+import contextlib
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, TypeVar
+
+import numpy as np
+
+from isyntax.wrapper import IOBackendName, ISyntax, ISyntaxCache, PixelFormatName
+
+if TYPE_CHECKING:
+    from typing_extensions import Buffer
+
+T = TypeVar("T")
+
+_default_executor: ThreadPoolExecutor | None = None
+_default_executor_lock = threading.Lock()
+
+
+def _get_default_executor() -> ThreadPoolExecutor:
+    """Gets the executor shared by all slides that are opened without one."""
+    global _default_executor  # noqa: PLW0603
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                thread_name_prefix="isyntax-async",
+            )
+        return _default_executor
+
+
+def _reset_default_executor() -> None:
+    # The executor's threads are not copied into a forked child.
+    global _default_executor, _default_executor_lock  # noqa: PLW0603
+    _default_executor = None
+    _default_executor_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_default_executor)
+
+
+class AsyncISyntax:
+    """Asyncio interface to an iSyntax slide.
+
+    Tiles and regions are decoded on an executor (by default, a thread pool shared by
+    all slides with one thread per core), so awaiting a read does not block the event
+    loop. At most `max_concurrency` reads per slide are decoded at a time, and the
+    rest wait in line without occupying a thread, so one busy slide cannot starve the
+    others.
+
+    Cancelling a read that has not started decoding yet removes it from the line. A
+    read that is already being decoded runs to completion in the background (and still
+    counts towards `max_concurrency`), but its result is discarded.
+    """
+
+    def __init__(
+        self,
+        isyntax: ISyntax,
+        max_concurrency: int | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        """Wraps an open slide.
+
+        Args:
+            isyntax: The slide, which is closed along with this object.
+            max_concurrency: Maximum number of reads from this slide to decode at a
+                time. Defaults to the smaller of 4 and the number of cores.
+            executor: Executor to decode on. Defaults to a thread pool that is shared by
+                all slides.
+        """
+        if max_concurrency is None:
+            max_concurrency = min(4, os.cpu_count() or 1)
+        if max_concurrency < 1:
+            msg = f"max_concurrency must be at least 1, got {max_concurrency}"
+            raise ValueError(msg)
+        self.isyntax = isyntax
+        self.max_concurrency = max_concurrency
+        self._executor = executor if executor is not None else _get_default_executor()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._running: set[Future] = set()
+        self._is_closing = False
+
+    @classmethod
+    async def open(
+        cls: type["AsyncISyntax"],
+        filename: str | Path,
+        cache_size: int = 2000,
+        io: IOBackendName = "python",
+        cache: ISyntaxCache | None = None,
+        index_path: str | Path | None = None,
+        max_concurrency: int | None = None,
+        executor: Executor | None = None,
+    ) -> "AsyncISyntax":
+        """Opens an iSyntax file from the local file system without blocking.
+
+        Args:
+            filename: Path to the iSyntax file.
+            cache_size: Maximum number of tiles to keep in the tile cache.
+            io: I/O backend, see `ISyntax.__init__`.
+            cache: Tile cache to use, see `ISyntax.__init__`.
+            index_path: Optional path of an index sidecar file, see `ISyntax.open`.
+            max_concurrency: Maximum number of reads to decode at a time, see
+                `AsyncISyntax.__init__`.
+            executor: Executor to open the slide and decode on, see
+                `AsyncISyntax.__init__`.
+        """
+        if executor is None:
+            executor = _get_default_executor()
+        loop = asyncio.get_running_loop()
+        isyntax = await loop.run_in_executor(
+            executor,
+            lambda: ISyntax.open(filename, cache_size, io, cache, index_path),
+        )
+        return cls(isyntax, max_concurrency, executor)
+
+    async def _run(self, func: Callable[[], T]) -> T:
+        loop = asyncio.get_running_loop()
+        await self._semaphore.acquire()
+        if self._is_closing:
+            self._semaphore.release()
+            msg = "slide is closed"
+            raise ValueError(msg)
+        try:
+            future = self._executor.submit(func)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        self._running.add(future)
+
+        def on_done(future: Future) -> None:
+            # Called from the executor's thread. The slot is only given back once the
+            # decode has really finished, even if the awaiting task was cancelled.
+            with contextlib.suppress(RuntimeError):  # The loop may have been closed.
+                loop.call_soon_threadsafe(self._release, future)
+
+        future.add_done_callback(on_done)
+        # Cancelling the returned awaitable also cancels the future if it has not
+        # started running yet.
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _release(self, future: Future) -> None:
+        self._running.discard(future)
+        self._semaphore.release()
+
+    async def read_tile(
+        self,
+        tile_x: int,
+        tile_y: int,
+        level: int = 0,
+        out: "np.ndarray | Buffer | None" = None,
+        pixel_format: PixelFormatName = "RGBA",
+    ) -> np.ndarray:
+        """Reads pixel data from the specified tile, see `ISyntax.read_tile`."""
+        return await self._run(
+            lambda: self.isyntax.read_tile(tile_x, tile_y, level, out, pixel_format),
+        )
+
+    async def read_tiles(
+        self,
+        coords: Iterable[tuple[int, int]] | np.ndarray,
+        level: int = 0,
+        out: "np.ndarray | Buffer | None" = None,
+        pixel_format: PixelFormatName = "RGBA",
+    ) -> np.ndarray:
+        """Reads pixel data from multiple tiles, see `ISyntax.read_tiles`.
+
+        The batch counts as a single read towards `max_concurrency`.
+        """
+        return await self._run(lambda: self.isyntax.read_tiles(coords, level, out, pixel_format))
+
+    async def read_region(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        level: int = 0,
+        out: "np.ndarray | Buffer | None" = None,
+        pixel_format: PixelFormatName = "RGBA",
+    ) -> np.ndarray:
+        """Reads pixel data from the specified region, see `ISyntax.read_region`."""
+        return await self._run(
+            lambda: self.isyntax.read_region(x, y, width, height, level, out, pixel_format),
+        )
+
+    async def close(self) -> None:
+        """Waits for the reads that are being decoded to finish, then closes the slide.
+
+        Reads that are still waiting for their turn fail with a ValueError.
+        """
+        self._is_closing = True
+        while self._running:
+            await asyncio.wait([asyncio.wrap_future(future) for future in self._running])
+            # Let the done callbacks run.
+            await asyncio.sleep(0)
+        self.isyntax.close()
+
+    async def __aenter__(self) -> "AsyncISyntax":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.close()
@@ -0,0 +1,227 @@
+import io
+import math
+import threading
+from collections import OrderedDict
+from typing import Literal
+
+import numpy as np
+
+from isyntax.wrapper import ISyntax
+
+DeepZoomFormat = Literal["jpeg", "png", "webp"]
+
+_PIL_FORMATS: dict[DeepZoomFormat, str] = {"jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+
+
+def _dzi_level_dimensions(width: int, height: int) -> list[tuple[int, int]]:
+    """Gets the dimensions of the Deep Zoom levels of an image, from smallest to largest."""
+    level_count = max(math.ceil(math.log2(max(width, height, 1))), 0) + 1
+    dimensions = []
+    for level in range(level_count):
+        downsample = 1 << (level_count - 1 - level)
+        dimensions.append((max(1, -(-width // downsample)), max(1, -(-height // downsample))))
+    return dimensions
+
+
+class DeepZoomGenerator:
+    """Serves Deep Zoom (DZI) tiles of a slide, encoded as JPEG, PNG or WebP.
+
+    Deep Zoom levels that coincide with a level of the slide are cut from its native
+    tiles. The tiles of the Deep Zoom grid do not line up with the native tiles (which
+    are offset by a padding, and differ in size when there is overlap), so a Deep Zoom
+    tile usually covers parts of several native tiles. The most recently decoded native
+    tiles are therefore kept, and neighbouring Deep Zoom tiles reuse them; a viewer
+    that requests the tiles of a view costs about one decode per tile. Levels that are
+    smaller than the top level of the slide are resampled from the top level with
+    `ISyntax.read_region_scaled`.
+
+    Encoded tiles are also kept (up to `cache_bytes`), so repeated requests cost no
+    decoding or encoding at all. The generator may be used from multiple threads.
+    """
+
+    def __init__(
+        self,
+        isyntax: ISyntax,
+        tile_size: int = 254,
+        overlap: int = 1,
+        tile_format: DeepZoomFormat = "jpeg",
+        quality: int = 75,
+        cache_bytes: int = 64 << 20,
+        native_cache_size: int = 64,
+    ) -> None:
+        """Creates a generator. Requires Pillow.
+
+        Args:
+            isyntax: The slide.
+            tile_size: Width and height of the tiles, without the overlap.
+            overlap: Number of extra pixels on each inner edge of a tile.
+            tile_format: Image format of the tiles.
+            quality: Quality setting for the "jpeg" and "webp" formats.
+            cache_bytes: Maximum total size of the encoded tiles to keep (in bytes).
+            native_cache_size: Maximum number of decoded native tiles to keep.
+        """
+        if tile_format not in _PIL_FORMATS:
+            msg = f"unknown Deep Zoom tile format: {tile_format!r}"
+            raise ValueError(msg)
+        if tile_size < 1 or overlap < 0:
+            msg = f"invalid tile size {tile_size} or overlap {overlap}"
+            raise ValueError(msg)
+        try:
+            import PIL.Image  # noqa: F401
+        except ImportError as e:
+            msg = "DeepZoomGenerator requires Pillow"
+            raise ImportError(msg) from e
+        self.isyntax = isyntax
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.tile_format = tile_format
+        self.quality = quality
+        self.cache_bytes = cache_bytes
+        self.native_cache_size = native_cache_size
+        #: (width, height) of each Deep Zoom level, from smallest to largest.
+        self.level_dimensions = _dzi_level_dimensions(*isyntax.dimensions)
+        #: (columns, rows) of tiles of each Deep Zoom level.
+        self.level_tiles = [
+            (-(-width // tile_size), -(-height // tile_size))
+            for width, height in self.level_dimensions
+        ]
+        self._lock = threading.Lock()
+        self._native_tiles: OrderedDict[tuple[int, int, int], np.ndarray] = OrderedDict()
+        self._encoded_tiles: OrderedDict[tuple[int, int, int], bytes] = OrderedDict()
+        self._encoded_bytes = 0
+
+    @property
+    def level_count(self) -> int:
+        return len(self.level_dimensions)
+
+    def get_dzi(self) -> str:
+        """Gets the XML descriptor of the image."""
+        width, height = self.level_dimensions[-1]
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+            f'Format="{self.tile_format}" Overlap="{self.overlap}" TileSize="{self.tile_size}">'
+            f'<Size Width="{width}" Height="{height}"/>'
+            "</Image>"
+        )
+
+    def _tile_region(self, level: int, col: int, row: int) -> tuple[int, int, int, int]:
+        """Gets the (x, y, width, height) of a tile, in the reference frame of its level."""
+        if not 0 <= level < self.level_count:
+            msg = f"invalid Deep Zoom level: {level}"
+            raise ValueError(msg)
+        cols, rows = self.level_tiles[level]
+        if not (0 <= col < cols and 0 <= row < rows):
+            msg = f"invalid tile ({col}, {row}) of Deep Zoom level {level}"
+            raise ValueError(msg)
+        level_width, level_height = self.level_dimensions[level]
+        x = col * self.tile_size - (self.overlap if col > 0 else 0)
+        y = row * self.tile_size - (self.overlap if row > 0 else 0)
+        x_end = min((col + 1) * self.tile_size + self.overlap, level_width)
+        y_end = min((row + 1) * self.tile_size + self.overlap, level_height)
+        return x, y, x_end - x, y_end - y
+
+    def _native_tile(self, level: int, tile_x: int, tile_y: int) -> np.ndarray:
+        key = (level, tile_x, tile_y)
+        with self._lock:
+            tile = self._native_tiles.get(key)
+            if tile is not None:
+                self._native_tiles.move_to_end(key)
+                return tile
+        tile = self.isyntax.read_tile(tile_x, tile_y, level, pixel_format="RGB")
+        with self._lock:
+            self._native_tiles[key] = tile
+            while len(self._native_tiles) > self.native_cache_size:
+                self._native_tiles.popitem(last=False)
+        return tile
+
+    def _cut_from_native_tiles(
+        self,
+        level: int,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+    ) -> np.ndarray:
+        """Copies a region of a slide level out of the native tiles that it covers."""
+        tile_width, tile_height = self.isyntax.tile_width, self.isyntax.tile_height
+        offset = self.isyntax.tile_offset(level)
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        first_x, last_x = (x + offset) // tile_width, (x + offset + width - 1) // tile_width
+        first_y, last_y = (y + offset) // tile_height, (y + offset + height - 1) // tile_height
+        for tile_y in range(first_y, last_y + 1):
+            # Rows of the output and of the tile that overlap.
+            top = max(tile_y * tile_height - offset, y)
+            bottom = min((tile_y + 1) * tile_height - offset, y + height)
+            for tile_x in range(first_x, last_x + 1):
+                left = max(tile_x * tile_width - offset, x)
+                right = min((tile_x + 1) * tile_width - offset, x + width)
+                tile = self._native_tile(level, tile_x, tile_y)
+                tile_top = top - (tile_y * tile_height - offset)
+                tile_left = left - (tile_x * tile_width - offset)
+                out[top - y : bottom - y, left - x : right - x] = tile[
+                    tile_top : tile_top + bottom - top,
+                    tile_left : tile_left + right - left,
+                ]
+        return out
+
+    def get_tile_pixels(self, level: int, col: int, row: int) -> np.ndarray:
+        """Gets the pixel data of a tile.
+
+        Args:
+            level: Deep Zoom level, where the largest level is `level_count - 1`.
+            col: Tile column.
+            row: Tile row.
+
+        Returns:
+            RGB pixel data in a [height, width, 3] array.
+        """
+        x, y, width, height = self._tile_region(level, col, row)
+        downsample = 1 << (self.level_count - 1 - level)
+        slide_level = min(downsample.bit_length() - 1, self.isyntax.level_count - 1)
+        if self.isyntax.level_downsamples[slide_level] == downsample:
+            return self._cut_from_native_tiles(slide_level, x, y, width, height)
+        return self.isyntax.read_region_scaled(
+            x * downsample,
+            y * downsample,
+            width * downsample,
+            height * downsample,
+            (width, height),
+            pixel_format="RGB",
+            level=slide_level,
+        )
+
+    def get_tile(self, level: int, col: int, row: int) -> bytes:
+        """Gets a tile, encoded in `tile_format`.
+
+        Args:
+            level: Deep Zoom level, where the largest level is `level_count - 1`.
+            col: Tile column.
+            row: Tile row.
+
+        Returns:
+            The encoded image.
+        """
+        import PIL.Image
+
+        key = (level, col, row)
+        with self._lock:
+            data = self._encoded_tiles.get(key)
+            if data is not None:
+                self._encoded_tiles.move_to_end(key)
+                return data
+        buffer = io.BytesIO()
+        PIL.Image.fromarray(self.get_tile_pixels(level, col, row)).save(
+            buffer,
+            format=_PIL_FORMATS[self.tile_format],
+            quality=self.quality,
+        )
+        data = buffer.getvalue()
+        with self._lock:
+            if key not in self._encoded_tiles:
+                self._encoded_tiles[key] = data
+                self._encoded_bytes += len(data)
+            while self._encoded_bytes > self.cache_bytes and self._encoded_tiles:
+                _, evicted = self._encoded_tiles.popitem(last=False)
+                self._encoded_bytes -= len(evicted)
+        return data
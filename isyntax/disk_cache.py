@@ -0,0 +1,249 @@
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import BinaryIO, Literal
+
+import numpy as np
+
+DiskCacheCodec = Literal["raw", "png", "jpeg"]
+
+_EXTENSIONS: dict[DiskCacheCodec, str] = {"raw": ".npy", "png": ".png", "jpeg": ".jpg"}
+# Eviction deletes tiles until the total size is down to this fraction of `max_bytes`, so
+# that the directory is scanned once per many writes rather than on every write.
+_LOW_WATER_MARK = 0.9
+# Temporary files older than this (in seconds) were left behind by writers that died.
+_STALE_TMP_AGE = 3600
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _lock_file(f: BinaryIO) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(f: BinaryIO) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_file(f: BinaryIO) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f: BinaryIO) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class DiskTileCache:
+    """Persistent cache of decoded tiles on the local file system.
+
+    Tiles are stored as RGB images under a key derived from the slide's fingerprint (see
+    `ISyntax.fingerprint`) and the tile's level and coordinates, so a cache directory
+    may be shared by many slides and by many processes, and survives restarts. When the
+    total size of the stored tiles exceeds `max_bytes`, the least recently used tiles
+    are deleted, down to 90% of `max_bytes`. The total size is kept in the directory,
+    and updated under a lock file, so processes sharing the cache keep it within
+    `max_bytes` together.
+
+    Attach a disk cache to a tile cache (`ISyntaxCache(disk_cache=...)`) to have
+    `ISyntax.read_tile`, `ISyntax.read_tiles` and `ISyntax.iter_tiles` consult it before
+    decoding a tile.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int,
+        codec: DiskCacheCodec = "raw",
+        jpeg_quality: int = 90,
+    ) -> None:
+        """Opens (or creates) a disk cache.
+
+        Args:
+            directory: Directory to store the tiles in.
+            max_bytes: Maximum total size of the stored tiles (in bytes).
+            codec: How tiles are stored. "raw" (the default) stores uncompressed pixels,
+                which are the fastest to load. "png" (lossless) and "jpeg" (lossy) take
+                less space, and require Pillow.
+            jpeg_quality: Quality setting for the "jpeg" codec.
+        """
+        if codec not in _EXTENSIONS:
+            msg = f"unknown disk cache codec: {codec!r}"
+            raise ValueError(msg)
+        if codec != "raw":
+            try:
+                import PIL.Image  # noqa: F401
+            except ImportError as e:
+                msg = f"the {codec!r} disk cache codec requires Pillow"
+                raise ImportError(msg) from e
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.codec = codec
+        self.jpeg_quality = jpeg_quality
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Other processes may share the directory, so the total size of the stored tiles
+        # is kept on disk, and only updated while holding the lock file.
+        self._lock_path = self.directory / ".lock"
+        self._size_path = self.directory / ".size"
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Holds the lock of the directory, against other threads and processes."""
+        with self._lock, self._lock_path.open("a+b") as f:
+            _lock_file(f)
+            try:
+                yield
+            finally:
+                _unlock_file(f)
+
+    def _scan(self) -> list[tuple[int, Path, int]]:
+        """Lists the stored tiles as (mtime, path, size), from least to most recently used."""
+        extension = _EXTENSIONS[self.codec]
+        files = []
+        for path in self.directory.glob(f"*/*{extension}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, path, stat.st_size))
+        return sorted(files)
+
+    def _read_total(self) -> int:
+        try:
+            return int(self._size_path.read_text())
+        except (FileNotFoundError, ValueError):
+            # Missing or corrupt, so count the stored tiles again.
+            return sum(size for _, _, size in self._scan())
+
+    def _write_total(self, total: int) -> None:
+        self._size_path.write_text(str(total))
+
+    @property
+    def total_bytes(self) -> int:
+        """Total size of the stored tiles (in bytes), in all processes sharing the cache."""
+        with self._locked():
+            return self._read_total()
+
+    def __len__(self) -> int:
+        return len(self._scan())
+
+    def _path(self, fingerprint: str, level: int, tile_x: int, tile_y: int) -> Path:
+        key = hashlib.blake2b(
+            f"{fingerprint}/{level}/{tile_x}/{tile_y}".encode(),
+            digest_size=16,
+        ).hexdigest()
+        return self.directory / key[:2] / f"{key}{_EXTENSIONS[self.codec]}"
+
+    def get(self, fingerprint: str, level: int, tile_x: int, tile_y: int) -> np.ndarray | None:
+        """Loads a tile.
+
+        Returns:
+            The tile's RGB pixel data in a [tile_height, tile_width, 3] array, or None if
+            the tile is not in the cache.
+        """
+        path = self._path(fingerprint, level, tile_x, tile_y)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # Mark as most recently used, for other processes and future runs. Another
+        # process may have evicted the tile in the meantime, which is harmless.
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return self._decode(data)
+
+    def put(self, fingerprint: str, level: int, tile_x: int, tile_y: int, rgb: np.ndarray) -> None:
+        """Stores a tile.
+
+        Args:
+            fingerprint: Fingerprint of the slide.
+            level: Level number.
+            tile_x: Tile column.
+            tile_y: Tile row.
+            rgb: The tile's RGB pixel data in a [tile_height, tile_width, 3] array.
+        """
+        path = self._path(fingerprint, level, tile_x, tile_y)
+        data = self._encode(rgb)
+        path.parent.mkdir(exist_ok=True)
+        # Write to a temporary file first, so that readers never see a partial tile.
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # Replace the tile while holding the lock, so that the total size counts each
+            # tile once, even if other processes write the same tile.
+            with self._locked():
+                try:
+                    old_size = path.stat().st_size
+                except FileNotFoundError:
+                    old_size = 0
+                total = self._read_total() - old_size
+                Path(tmp_name).replace(path)
+                total += len(data)
+                if total > self.max_bytes:
+                    total = self._evict()
+                self._write_total(total)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def clear(self) -> None:
+        """Deletes all stored tiles."""
+        with self._locked():
+            for _, path, _ in self._scan():
+                path.unlink(missing_ok=True)
+            self._write_total(0)
+
+    def _evict(self) -> int:
+        """Deletes the least recently used tiles, and returns the size of the others.
+
+        The directory is scanned again, rather than trusting any bookkeeping, since other
+        processes may have stored, read or deleted tiles. Temporary files that were
+        abandoned by crashed writers are deleted as well.
+        """
+        stale = time.time() - _STALE_TMP_AGE
+        for path in self.directory.glob("*/*.tmp"):
+            with contextlib.suppress(FileNotFoundError):
+                if path.stat().st_mtime < stale:
+                    path.unlink()
+        files = self._scan()
+        total = sum(size for _, _, size in files)
+        low_water = int(self.max_bytes * _LOW_WATER_MARK)
+        for _, path, size in files:
+            if total <= low_water:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        return total
+
+    def _encode(self, rgb: np.ndarray) -> bytes:
+        if self.codec == "raw":
+            buf = io.BytesIO()
+            np.save(buf, np.ascontiguousarray(rgb), allow_pickle=False)
+            return buf.getvalue()
+        import PIL.Image
+
+        buf = io.BytesIO()
+        image = PIL.Image.fromarray(rgb)
+        if self.codec == "png":
+            image.save(buf, format="PNG", compress_level=1)
+        else:
+            image.save(buf, format="JPEG", quality=self.jpeg_quality)
+        return buf.getvalue()
+
+    def _decode(self, data: bytes) -> np.ndarray:
+        if self.codec == "raw":
+            return np.load(io.BytesIO(data), allow_pickle=False)
+        import PIL.Image
+
+        with PIL.Image.open(io.BytesIO(data)) as image:
+            return np.asarray(image.convert("RGB"))
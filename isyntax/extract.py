@@ -0,0 +1,284 @@
+"""Extracts the tiles of many slides with a pool of worker processes.
+
+Each slide level is written to a `.npy` file holding a
+[height_in_tiles, width_in_tiles, tile_height, tile_width, C] uint8 array. Workers open
+their own `ISyntax` instances and decode tiles straight into memory mappings of those
+files, so pixel data is never pickled or copied back to the parent process.
+
+Progress is recorded in a `.done.npy` file next to each level, with one flag per row of
+tiles. Running the same extraction again only decodes the rows that are not done yet,
+so an interrupted extraction can be resumed. The pixel format of a slide's outputs is
+recorded in a `pixel_format.txt` file, and resuming with another one is an error.
+
+Example:
+    $ python -m isyntax.extract slides/*.isyntax --output tiles --levels 1 2 --workers 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import FIRST_EXCEPTION, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import get_args
+
+import numpy as np
+
+from isyntax.wrapper import IOBackendName, ISyntax, PixelFormatName, _pixel_format_from_name
+
+#: Called with the number of tiles that are done and the total number of tiles.
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass(frozen=True)
+class _Task:
+    """A block of whole rows of tiles from one slide level."""
+
+    slide: Path
+    level: int
+    output: Path
+    row_start: int
+    row_stop: int
+    width_in_tiles: int
+    pixel_format: PixelFormatName
+    io: IOBackendName
+
+
+# The slide that this worker process last read from. Tasks are submitted slide by
+# slide, so workers rarely have to reopen a slide.
+_worker_slide: tuple[Path, ISyntax] | None = None
+
+
+def _get_worker_slide(path: Path, io: IOBackendName) -> ISyntax:
+    global _worker_slide  # noqa: PLW0603
+    if _worker_slide is not None:
+        if _worker_slide[0] == path:
+            return _worker_slide[1]
+        _worker_slide[1].close()
+        _worker_slide = None
+    isyntax = ISyntax.open(path, io=io)
+    _worker_slide = (path, isyntax)
+    return isyntax
+
+
+def _run_task(task: _Task) -> None:
+    isyntax = _get_worker_slide(task.slide, task.io)
+    tiles = np.load(task.output, mmap_mode="r+")
+    rows = tiles[task.row_start : task.row_stop]
+    xs, ys = np.meshgrid(np.arange(task.width_in_tiles), np.arange(task.row_start, task.row_stop))
+    coords = np.stack([xs.ravel(), ys.ravel()], axis=1)
+    # Whole rows are contiguous in the file, so tiles are decoded in place.
+    isyntax.read_tiles(coords, task.level, rows.reshape(-1, *rows.shape[2:]), task.pixel_format)
+    tiles.flush()
+
+
+def _open_output(path: Path, shape: tuple[int, ...]) -> np.memmap:
+    """Opens an output array for writing, creating it if it does not exist."""
+    if path.exists():
+        array = np.load(path, mmap_mode="r+")
+        if array.shape != shape or array.dtype != np.uint8:
+            msg = f"existing output {path} has shape {array.shape}, expected {shape}"
+            raise ValueError(msg)
+        return array
+    return np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=shape)
+
+
+def _check_pixel_format(slide_dir: Path, pixel_format: PixelFormatName) -> None:
+    """Records the pixel format of a slide's outputs, or checks that it is unchanged."""
+    path = slide_dir / "pixel_format.txt"
+    try:
+        existing = path.read_text().strip()
+    except FileNotFoundError:
+        path.write_text(pixel_format)
+        return
+    if existing != pixel_format:
+        msg = f"existing outputs in {slide_dir} are {existing}, not {pixel_format}"
+        raise ValueError(msg)
+
+
+def _row_blocks(done: np.ndarray, rows_per_task: int) -> list[tuple[int, int]]:
+    """Splits the rows that are not done into blocks of at most `rows_per_task` rows."""
+    blocks = []
+    row = 0
+    while row < len(done):
+        if done[row]:
+            row += 1
+            continue
+        stop = row
+        while stop < len(done) and not done[stop] and stop - row < rows_per_task:
+            stop += 1
+        blocks.append((row, stop))
+        row = stop
+    return blocks
+
+
+@dataclass
+class _Plan:
+    """The work that is left to do for an extraction."""
+
+    tasks: list[_Task] = field(default_factory=list)
+    done_flags: dict[Path, np.memmap] = field(default_factory=dict)
+    tiles_done: int = 0
+    tiles_total: int = 0
+
+    def add_slide(
+        self,
+        path: Path,
+        slide_dir: Path,
+        levels: Sequence[int] | None,
+        pixel_format: PixelFormatName,
+        tiles_per_task: int,
+        io: IOBackendName,
+    ) -> None:
+        """Creates the outputs for a slide, and adds tasks for the rows that are not done."""
+        slide_dir.mkdir(parents=True, exist_ok=True)
+        _check_pixel_format(slide_dir, pixel_format)
+        with ISyntax.open(path) as isyntax:
+            tile_shape = (
+                isyntax.tile_height,
+                isyntax.tile_width,
+                _pixel_format_from_name(pixel_format).channel_count,
+            )
+            level_tiles = isyntax.level_tiles
+        for level in range(len(level_tiles)) if levels is None else levels:
+            if not 0 <= level < len(level_tiles):
+                msg = f"{path} has no level {level}"
+                raise ValueError(msg)
+            width_in_tiles, height_in_tiles = level_tiles[level]
+            output = slide_dir / f"level_{level}.npy"
+            _open_output(output, (height_in_tiles, width_in_tiles, *tile_shape))
+            done = _open_output(slide_dir / f"level_{level}.done.npy", (height_in_tiles,))
+            self.done_flags[output] = done
+            self.tiles_total += width_in_tiles * height_in_tiles
+            self.tiles_done += width_in_tiles * int(np.count_nonzero(done))
+            rows_per_task = max(1, tiles_per_task // max(1, width_in_tiles))
+            self.tasks.extend(
+                _Task(path, level, output, row_start, row_stop, width_in_tiles, pixel_format, io)
+                for row_start, row_stop in _row_blocks(done, rows_per_task)
+            )
+
+    def mark_done(self, task: _Task) -> int:
+        """Records that a task has finished, and returns its number of tiles."""
+        done = self.done_flags[task.output]
+        done[task.row_start : task.row_stop] = True
+        done.flush()
+        n_tiles = (task.row_stop - task.row_start) * task.width_in_tiles
+        self.tiles_done += n_tiles
+        return n_tiles
+
+
+def _run_plan(plan: _Plan, workers: int | None, progress: ProgressCallback | None) -> int:
+    """Runs the tasks of a plan on a process pool, and returns the number of tiles decoded."""
+    tiles_decoded = 0
+    if progress is not None:
+        progress(plan.tiles_done, plan.tiles_total)
+    if not plan.tasks:
+        return tiles_decoded
+    # libisyntax runs its own worker threads, which do not survive forking.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {executor.submit(_run_task, task): task for task in plan.tasks}
+        pending: set[Future] = set(futures)
+        try:
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_EXCEPTION)
+                for future in finished:
+                    future.result()
+                    tiles_decoded += plan.mark_done(futures[future])
+                    if progress is not None:
+                        progress(plan.tiles_done, plan.tiles_total)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+    return tiles_decoded
+
+
+def extract_tiles(
+    slides: Iterable[str | Path],
+    output_dir: str | Path,
+    levels: Sequence[int] | None = None,
+    pixel_format: PixelFormatName = "RGB",
+    workers: int | None = None,
+    tiles_per_task: int = 256,
+    io: IOBackendName = "python",
+    progress: ProgressCallback | None = None,
+) -> int:
+    """Extracts every tile of the given levels of many slides.
+
+    The tiles of `slides[i]` at level `n` are written to
+    `output_dir/<slide stem>/level_<n>.npy` (see the module docstring for the layout).
+
+    Args:
+        slides: Paths of the iSyntax files. Their file names (without extension) must be
+            unique.
+        output_dir: Directory to write the tiles to.
+        levels: Levels to extract. Defaults to all levels of each slide.
+        pixel_format: Channel order of the pixel data, see `ISyntax.read_tile`.
+        workers: Number of worker processes. Defaults to the number of cores.
+        tiles_per_task: Approximate number of tiles for a worker to decode at a time.
+            Tasks are made of whole rows of tiles.
+        io: I/O backend for the workers to open slides with, see `ISyntax.__init__`.
+        progress: Optional function that is called with the number of tiles that are
+            done and the total number of tiles, whenever a task finishes.
+
+    Returns:
+        The number of tiles that were decoded, which excludes those that were already
+        done by an earlier extraction.
+    """
+    slide_paths = [Path(slide) for slide in slides]
+    stems = [path.stem for path in slide_paths]
+    duplicates = sorted({stem for stem in stems if stems.count(stem) > 1})
+    if duplicates:
+        msg = f"slide file names must be unique, got duplicates: {duplicates}"
+        raise ValueError(msg)
+    if tiles_per_task < 1:
+        msg = f"tiles_per_task must be at least 1, got {tiles_per_task}"
+        raise ValueError(msg)
+    plan = _Plan()
+    for path in slide_paths:
+        plan.add_slide(path, Path(output_dir, path.stem), levels, pixel_format, tiles_per_task, io)
+
+    return _run_plan(plan, workers, progress)
+
+
+def _print_progress(tiles_done: int, tiles_total: int) -> None:
+    sys.stderr.write(f"\r{tiles_done}/{tiles_total} tiles")
+    sys.stderr.flush()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("slides", type=Path, nargs="+", help="iSyntax files to extract")
+    parser.add_argument("--output", type=Path, required=True, help="directory to write to")
+    parser.add_argument("--levels", type=int, nargs="+", help="levels to extract (default: all)")
+    parser.add_argument("--pixel-format", choices=get_args(PixelFormatName), default="RGB")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--tiles-per-task", type=int, default=256)
+    parser.add_argument("--io", choices=get_args(IOBackendName), default="python")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    tiles_decoded = extract_tiles(
+        args.slides,
+        args.output,
+        levels=args.levels,
+        pixel_format=args.pixel_format,
+        workers=args.workers,
+        tiles_per_task=args.tiles_per_task,
+        io=args.io,
+        progress=_print_progress,
+    )
+    elapsed = time.perf_counter() - start
+    sys.stderr.write(
+        f"\nDecoded {tiles_decoded} tiles in {elapsed:.1f}s "
+        f"({tiles_decoded / max(elapsed, 1e-9):.1f} tiles/s)\n",
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
+import threading
 from collections.abc import Iterator
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import IntEnum
 from io import BufferedIOBase, RawIOBase
 from typing import Generic, NewType, TypeVar
 
@@ -9,12 +11,45 @@ VoidPtr = NewType("VoidPtr", object)
 T = TypeVar("T")
 
 
+class IOBackend(IntEnum):
+    #: Read through the IO object's Python methods (works with any file-like object).
+    PYTHON = lib.PYTHON_IO_BACKEND_PYTHON
+    #: Read from the IO object's file descriptor in C, without calling into Python.
+    NATIVE = lib.PYTHON_IO_BACKEND_NATIVE
+    #: Map the file into memory from C, and copy reads straight out of the mapping.
+    MMAP = lib.PYTHON_IO_BACKEND_MMAP
+
+
 @dataclass
 class SizedIO:
     #: The IO object.
     f: RawIOBase | BufferedIOBase
     #: The complete length of the IO object's data (in bytes).
     n_bytes: int
+    #: Lock guarding the IO object's shared file position.
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def read_at_offset(self, dest: memoryview, offset: int) -> int | None:
+        """Reads data from the given offset into a buffer.
+
+        The seek and the read are performed atomically with respect to other calls of
+        this method, so it is safe to use from multiple threads. IO objects that have a
+        thread-safe `readinto_at(dest, offset)` method (like `isyntax.remote.RangedFile`)
+        are read from with it instead, without holding the lock.
+
+        Args:
+            dest: Buffer to read into.
+            offset: Position to read from (in bytes).
+
+        Returns:
+            Number of bytes read, or None if no data was available (non-blocking IO).
+        """
+        readinto_at = getattr(self.f, "readinto_at", None)
+        if readinto_at is not None:
+            return readinto_at(dest, offset)
+        with self.lock:
+            self.f.seek(offset)
+            return self.f.readinto(dest)
 
 
 class ByHandleRegistry(Generic[T]):
@@ -83,6 +118,21 @@ def init_python_io_hooks() -> None:
             raise RuntimeError
         return max(bytes_read, 1)
 
+    @ffi.def_extern()
+    def python_file_read_at_offset(
+        handle: int,
+        dest: VoidPtr,
+        bytes_to_read: int,
+        offset: int,
+    ) -> int:
+        bytes_read = _io_registry[handle].read_at_offset(
+            memoryview(ffi.buffer(dest, bytes_to_read)),
+            offset,
+        )
+        if bytes_read is None:
+            raise RuntimeError
+        return max(bytes_read, 1)
+
     @ffi.def_extern()
     def python_file_get_size(handle: int) -> int:
         return _io_registry[handle].n_bytes
@@ -94,20 +144,44 @@ def init_python_io_hooks() -> None:
     lib.init_python_platform_utils(
         lib.python_file_set_pos,
         lib.python_file_read_into,
+        lib.python_file_read_at_offset,
         lib.python_file_get_size,
         lib.python_file_close,
     )
 
 
-def register_io(f: RawIOBase | BufferedIOBase, n_bytes: int) -> int:
+def get_registered_io(handle: int) -> SizedIO:
+    """Gets the IO object registered under a handle."""
+    return _io_registry[handle]
+
+
+def unregister_io(handle: int) -> SizedIO:
+    """Removes the IO object registered under a handle, without closing it.
+
+    This is only needed for handles that the C library will not close, e.g. those of
+    slides that were opened by a parent process.
+    """
+    return _io_registry.pop(handle)
+
+
+def register_io(
+    f: RawIOBase | BufferedIOBase,
+    n_bytes: int,
+    backend: IOBackend = IOBackend.PYTHON,
+) -> int:
     """Registers a Python IO object for use with the underlying C library.
 
     Args:
         f: IO object to register.
         n_bytes: Size of the IO object's data (in bytes).
+        backend: How the C library should read from the IO object. Backends other
+            than `IOBackend.PYTHON` require an IO object with a real file descriptor.
 
     Raises:
-        RuntimeError: When the IO object is not readable.
+        RuntimeError: When the IO object is not readable, or the backend could not
+            be set up.
+        ValueError: When a native backend is requested for an IO object that is not
+            backed by a file descriptor.
 
     Returns:
         New handle assigned to the IO object.
@@ -115,4 +189,16 @@ def register_io(f: RawIOBase | BufferedIOBase, n_bytes: int) -> int:
     if not f.readable():
         msg = "IO object must be readable"
         raise RuntimeError(msg)
-    return _io_registry.add(SizedIO(f, n_bytes))
+    fd = -1
+    if backend != IOBackend.PYTHON:
+        try:
+            fd = f.fileno()
+        except (AttributeError, OSError) as e:
+            msg = f"{backend.name} I/O backend requires an IO object with a file descriptor"
+            raise ValueError(msg) from e
+    handle = _io_registry.add(SizedIO(f, n_bytes))
+    if not lib.python_platform_set_io_backend(handle, backend, fd):
+        _io_registry.pop(handle)
+        msg = f"could not set up {backend.name} I/O backend"
+        raise RuntimeError(msg)
+    return handle
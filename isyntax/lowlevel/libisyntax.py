@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import TYPE_CHECKING, NewType
 
 from isyntax._pyisyntax import ffi, lib
-from isyntax.lowlevel.io_management import init_python_io_hooks, register_io
+from isyntax.lowlevel.io_management import IOBackend, init_python_io_hooks, register_io
 
 if TYPE_CHECKING:
     from cffi import FFI
@@ -28,6 +28,15 @@ LIBISYNTAX_INVALID_ARGUMENT = 2
 class ISyntaxPixelFormat(IntEnum):
     RGBA = lib.LIBISYNTAX_PIXEL_FORMAT_RGBA
     BGRA = lib.LIBISYNTAX_PIXEL_FORMAT_BGRA
+    # 3-channel formats, which are only supported by the pyisyntax readers.
+    RGB = lib.PYISYNTAX_PIXEL_FORMAT_RGB
+    BGR = lib.PYISYNTAX_PIXEL_FORMAT_BGR
+
+    @property
+    def channel_count(self) -> int:
+        if self in (ISyntaxPixelFormat.RGBA, ISyntaxPixelFormat.BGRA):
+            return 4
+        return 3
 
 
 class LibISyntaxError(Exception):
@@ -66,6 +75,7 @@ def free(ptr: Pointer) -> None:
 
 def _do_init() -> None:
     check_error(lib.libisyntax_init())
+    lib.pyisyntax_reader_init()
     init_python_io_hooks()
 
 
@@ -87,13 +97,47 @@ def open_from_registered_handle(handle: int, *, is_init_allocators: bool = False
     return isyntax[0]
 
 
-def open_from_filename(filename: str | Path, *, is_init_allocators: bool = False) -> ISyntaxPtr:
+def open_from_index(
+    handle: int,
+    index: "Buffer",
+    *,
+    is_init_allocators: bool = False,
+) -> ISyntaxPtr:
+    init()
+
+    isyntax = ffi.new("isyntax_t**")
+    check_error(
+        lib.pyisyntax_open_from_index(
+            ffi.new("char[]", str(handle).encode("utf-8")),
+            ffi.from_buffer("uint8_t[]", index),
+            memoryview(index).nbytes,
+            is_init_allocators,
+            isyntax,
+        ),
+    )
+    return isyntax[0]
+
+
+def open_from_filename(
+    filename: str | Path,
+    *,
+    is_init_allocators: bool = False,
+    io_backend: IOBackend = IOBackend.PYTHON,
+) -> ISyntaxPtr:
     filename = Path(filename)
     f = filename.open("rb")
-    handle = register_io(f, os.fstat(f.fileno()).st_size)
+    handle = register_io(f, os.fstat(f.fileno()).st_size, io_backend)
     return open_from_registered_handle(handle, is_init_allocators=is_init_allocators)
 
 
+def write_index(isyntax: ISyntaxPtr) -> bytearray:
+    size_ptr = ffi.new("int64_t*")
+    check_error(lib.pyisyntax_index_write(isyntax, ffi.NULL, size_ptr))
+    index = bytearray(size_ptr[0])
+    check_error(lib.pyisyntax_index_write(isyntax, ffi.from_buffer("uint8_t[]", index), size_ptr))
+    return index
+
+
 def close(isyntax: ISyntaxPtr) -> None:
     # If a null pointer gets through the program will segfault.
     if isyntax == ffi.NULL:
@@ -169,16 +213,17 @@ def level_get_mpp_y(level: ISyntaxLevelPtr) -> float:
     return lib.libisyntax_level_get_mpp_y(level)
 
 
-def cache_create(debug_name: str | None, cache_size: int) -> ISyntaxCachePtr:
+def cache_create(debug_name: str | None, cache_size: int, max_bytes: int = 0) -> ISyntaxCachePtr:
     isyntax_cache = ffi.new("isyntax_cache_t**")
     if debug_name is None:
         debug_name_or_null = ffi.NULL
     else:
         debug_name_or_null = ffi.new("char[]", debug_name.encode("utf-8"))
     check_error(
-        lib.libisyntax_cache_create(
+        lib.pyisyntax_cache_create(
             debug_name_or_null,
             cache_size,
+            max_bytes,
             isyntax_cache,
         ),
     )
@@ -186,13 +231,46 @@ def cache_create(debug_name: str | None, cache_size: int) -> ISyntaxCachePtr:
 
 
 def cache_inject(isyntax_cache: ISyntaxCachePtr, isyntax: ISyntaxPtr) -> None:
-    check_error(lib.libisyntax_cache_inject(isyntax_cache, isyntax))
+    check_error(lib.pyisyntax_cache_inject(isyntax_cache, isyntax))
+
+
+def cache_release(isyntax_cache: ISyntaxCachePtr, isyntax: ISyntaxPtr) -> None:
+    lib.pyisyntax_cache_release(isyntax_cache, isyntax)
+
+
+def _struct_to_dict(struct: "FFI.CData", exclude: tuple[str, ...] = ()) -> dict[str, int]:
+    fields = ffi.typeof(struct).fields
+    return {name: getattr(struct, name) for name, _ in fields if name not in exclude}
+
+
+def cache_get_stats(isyntax_cache: ISyntaxCachePtr) -> tuple[dict[str, int], list[dict[str, int]]]:
+    """Gets the cache statistics.
+
+    Returns:
+        Totals for the whole cache, and statistics for each of the 16 possible levels.
+    """
+    stats = ffi.new("pyisyntax_cache_stats_t*")
+    lib.pyisyntax_cache_get_stats(isyntax_cache, stats)
+    totals = _struct_to_dict(stats[0], exclude=("levels",))
+    return totals, [_struct_to_dict(level) for level in stats.levels]
+
+
+def cache_reset_stats(isyntax_cache: ISyntaxCachePtr) -> None:
+    lib.pyisyntax_cache_reset_stats(isyntax_cache)
+
+
+def cache_resize(isyntax_cache: ISyntaxCachePtr, cache_size: int, max_bytes: int = 0) -> None:
+    check_error(lib.pyisyntax_cache_resize(isyntax_cache, cache_size, max_bytes))
+
+
+def cache_clear(isyntax_cache: ISyntaxCachePtr) -> None:
+    lib.pyisyntax_cache_clear(isyntax_cache)
 
 
 def cache_destroy(isyntax_cache: ISyntaxCachePtr) -> None:
     if isyntax_cache == ffi.NULL:
         raise NullPointerError
-    lib.libisyntax_cache_destroy(isyntax_cache)
+    lib.pyisyntax_cache_destroy(isyntax_cache)
 
 
 def tile_read(
@@ -205,13 +283,13 @@ def tile_read(
     pixel_format: ISyntaxPixelFormat,
 ) -> None:
     check_error(
-        lib.libisyntax_tile_read(
+        lib.pyisyntax_tile_read(
             isyntax,
             isyntax_cache,
             level,
             tile_x,
             tile_y,
-            ffi.from_buffer("uint32_t[]", pixels_buffer, require_writable=True),
+            ffi.from_buffer("uint8_t[]", pixels_buffer, require_writable=True),
             pixel_format,
         ),
     )
@@ -229,7 +307,7 @@ def read_region(
     pixel_format: ISyntaxPixelFormat,
 ) -> None:
     check_error(
-        lib.libisyntax_read_region(
+        lib.pyisyntax_read_region(
             isyntax,
             isyntax_cache,
             level,
@@ -237,12 +315,80 @@ def read_region(
             y,
             width,
             height,
-            ffi.from_buffer("uint32_t[]", pixels_buffer, require_writable=True),
+            ffi.from_buffer("uint8_t[]", pixels_buffer, require_writable=True),
             pixel_format,
         ),
     )
 
 
+def read_region_scaled(
+    isyntax: ISyntaxPtr,
+    isyntax_cache: ISyntaxCachePtr,
+    level: int,
+    x: float,
+    y: float,
+    width: float,
+    height: float,
+    out_width: int,
+    out_height: int,
+    pixels_buffer: "Buffer | FFI.buffer",
+    pixel_format: ISyntaxPixelFormat,
+) -> None:
+    check_error(
+        lib.pyisyntax_read_region_scaled(
+            isyntax,
+            isyntax_cache,
+            level,
+            x,
+            y,
+            width,
+            height,
+            out_width,
+            out_height,
+            ffi.from_buffer("uint8_t[]", pixels_buffer, require_writable=True),
+            pixel_format,
+        ),
+    )
+
+
+def read_tiles(
+    isyntax: ISyntaxPtr,
+    isyntax_cache: ISyntaxCachePtr,
+    level: int,
+    tile_coords: "Buffer | FFI.buffer",
+    tile_count: int,
+    pixels_buffer: "Buffer | FFI.buffer",
+    pixel_format: ISyntaxPixelFormat,
+) -> None:
+    check_error(
+        lib.pyisyntax_read_tiles(
+            isyntax,
+            isyntax_cache,
+            level,
+            ffi.from_buffer("int64_t[]", tile_coords),
+            tile_count,
+            ffi.from_buffer("uint8_t[]", pixels_buffer, require_writable=True),
+            pixel_format,
+        ),
+    )
+
+
+def tile_exists(isyntax: ISyntaxPtr, level: int, tile_x: int, tile_y: int) -> bool:
+    exists_ptr = ffi.new("int32_t*")
+    check_error(lib.pyisyntax_tile_exists(isyntax, level, tile_x, tile_y, exists_ptr))
+    return bool(exists_ptr[0])
+
+
+def get_tile_mask(isyntax: ISyntaxPtr, level: int, mask_buffer: "Buffer | FFI.buffer") -> None:
+    check_error(
+        lib.pyisyntax_get_tile_mask(
+            isyntax,
+            level,
+            ffi.from_buffer("uint8_t[]", mask_buffer, require_writable=True),
+        ),
+    )
+
+
 def read_label_image_jpeg(isyntax: ISyntaxPtr) -> memoryview:
     jpeg_buffer_ptr = ffi.new("uint8_t**")
     jpeg_size_ptr = ffi.new("uint32_t*")
@@ -0,0 +1,232 @@
+"""Exports slides to chunked Zarr stores in the OME-NGFF (OME-Zarr) layout.
+
+Each exported level is an array of a multiscale image (OME-NGFF 0.4), so tools such as
+Dask, napari and ome-zarr can read the pixels in parallel, chunk by chunk, without
+libisyntax. Requires zarr (version 3 or later), which is installed with the `zarr` extra.
+"""
+
+import os
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+
+from isyntax.wrapper import ISyntax
+
+NGFF_VERSION = "0.4"
+# Background is read as plain white, so chunks that are not written read the same.
+_FILL_VALUE = 255
+_CHANNELS = (("R", "FF0000"), ("G", "00FF00"), ("B", "0000FF"))
+
+
+def _chunk_spans(
+    chunk_count: int,
+    chunk_size: int,
+    level_size: int,
+    tile_size: int,
+    tile_count: int,
+    offset: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Gets the [start, stop) range of tiles that each chunk overlaps along an axis."""
+    starts = np.arange(chunk_count) * chunk_size
+    stops = np.minimum(starts + chunk_size, level_size)
+    first = np.clip((starts + offset) // tile_size, 0, tile_count)
+    last = np.clip((stops - 1 + offset) // tile_size + 1, 0, tile_count)
+    return first, last
+
+
+def _stored_chunks(
+    isyntax: ISyntax,
+    level: int,
+    chunk_size: tuple[int, int],
+) -> np.ndarray:
+    """Finds the chunks of a level that overlap a tile that is stored in the file.
+
+    Returns:
+        A [chunk_rows, chunk_cols] boolean array.
+    """
+    mask = isyntax.tile_mask(level)
+    offset = isyntax.tile_offset(level)
+    level_width, level_height = isyntax.level_dimensions[level]
+    chunk_width, chunk_height = chunk_size
+    row_first, row_last = _chunk_spans(
+        -(-level_height // chunk_height),
+        chunk_height,
+        level_height,
+        isyntax.tile_height,
+        mask.shape[0],
+        offset,
+    )
+    col_first, col_last = _chunk_spans(
+        -(-level_width // chunk_width),
+        chunk_width,
+        level_width,
+        isyntax.tile_width,
+        mask.shape[1],
+        offset,
+    )
+    # Counts of stored tiles in rectangles of tiles, from a summed-area table.
+    table = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int64)
+    table[1:, 1:] = mask.cumsum(axis=0).cumsum(axis=1)
+    counts = (
+        table[row_last][:, col_last]
+        - table[row_first][:, col_last]
+        - table[row_last][:, col_first]
+        + table[row_first][:, col_first]
+    )
+    return counts > 0
+
+
+def _multiscales_metadata(isyntax: ISyntax, levels: Sequence[int]) -> dict[str, Any]:
+    datasets = []
+    for level in levels:
+        mpp_x, mpp_y = isyntax.metadata.level_mpp[level].tolist()
+        datasets.append(
+            {
+                "path": str(level),
+                "coordinateTransformations": [{"type": "scale", "scale": [1.0, mpp_y, mpp_x]}],
+            }
+        )
+    return {
+        "multiscales": [
+            {
+                "version": NGFF_VERSION,
+                "axes": [
+                    {"name": "c", "type": "channel"},
+                    {"name": "y", "type": "space", "unit": "micrometer"},
+                    {"name": "x", "type": "space", "unit": "micrometer"},
+                ],
+                "datasets": datasets,
+            }
+        ],
+        "omero": {
+            "rgb": True,
+            "channels": [
+                {
+                    "label": label,
+                    "color": color,
+                    "window": {"min": 0, "max": 255, "start": 0, "end": 255},
+                }
+                for label, color in _CHANNELS
+            ],
+        },
+    }
+
+
+def _write_level(
+    isyntax: ISyntax,
+    level: int,
+    array: Any,  # noqa: ANN401
+    chunk_size: tuple[int, int],
+    executor: ThreadPoolExecutor,
+    max_pending: int,
+) -> None:
+    """Decodes a level in strips, and writes the chunks that are not background."""
+    level_width, level_height = isyntax.level_dimensions[level]
+    chunk_width, chunk_height = chunk_size
+    stored = _stored_chunks(isyntax, level, chunk_size)
+    pending: deque[Future[None]] = deque()
+
+    def write_chunk(block: np.ndarray, top: int, left: int) -> None:
+        bottom, right = top + block.shape[0], left + block.shape[1]
+        array[:, top:bottom, left:right] = np.moveaxis(block, -1, 0)
+
+    chunk_row = np.empty((chunk_height, level_width, 3), dtype=np.uint8)
+    strips = isyntax.iter_strips(
+        0, 0, level_width, level_height, level, pixel_format="RGB", skip_empty=True
+    )
+    for top, strip in strips:
+        row_top = top - top % chunk_height
+        chunk_row[top - row_top : top - row_top + len(strip)] = strip
+        bottom = top + len(strip)
+        if bottom - row_top < chunk_height and bottom < level_height:
+            continue
+        # The strips of a row of chunks are complete, so its chunks are written while
+        # the next row is decoded.
+        for col in np.flatnonzero(stored[row_top // chunk_height]).tolist():
+            left = col * chunk_width
+            block = chunk_row[: bottom - row_top, left : left + chunk_width]
+            pending.append(executor.submit(write_chunk, block, row_top, left))
+            while len(pending) > max_pending:
+                pending.popleft().result()
+        chunk_row = np.empty_like(chunk_row)
+    while pending:
+        pending.popleft().result()
+
+
+def to_zarr(
+    isyntax: ISyntax,
+    store: Any,  # noqa: ANN401
+    levels: Sequence[int] | None = None,
+    chunk: tuple[int, int] | None = None,
+    workers: int | None = None,
+    overwrite: bool = False,  # noqa: FBT001, FBT002
+) -> Any:  # noqa: ANN401
+    """Exports levels of a slide to a Zarr store as an OME-NGFF multiscale image.
+
+    Level `n` of the slide is written to the array at path `n` of the group, as
+    [3, height, width] uint8 RGB pixels with "c", "y" and "x" axes, and every level is
+    copied from a level of the slide rather than resampled. The slide is decoded once,
+    in strips (see `ISyntax.iter_strips`), and chunks are compressed and written on a
+    pool of threads while the next strip is decoded. Chunks that do not overlap any
+    tile stored in the file (see `ISyntax.tile_mask`) are background, and are not
+    written at all: they read as the fill value, plain white.
+
+    Chunks start at the origin of the level, so that array indices are the pixel
+    coordinates of `ISyntax.read_region`, and not on the grid of the tiles in the file,
+    which starts `ISyntax.tile_offset` pixels before it. A chunk therefore overlaps up
+    to four tiles, but exporting still decodes each tile once, since the strips are cut
+    from whole rows of tiles.
+
+    Args:
+        isyntax: The slide.
+        store: Zarr store, or path of a directory to create one in.
+        levels: Levels to export, from finest to coarsest. Defaults to all levels.
+        chunk: (width, height) of the chunks, which must be multiples of the tile size.
+            Defaults to the tile size (`ISyntax.tile_width`, `ISyntax.tile_height`).
+        workers: Number of threads to compress and write chunks with. Defaults to the
+            number of cores.
+        overwrite: Whether to replace an existing store. Otherwise, exporting to an
+            existing store raises an error.
+
+    Returns:
+        The `zarr.Group` that was written.
+    """
+    tile_size = (isyntax.tile_width, isyntax.tile_height)
+    chunk_size = tile_size if chunk is None else chunk
+    if any(size < 1 or size % tile for size, tile in zip(chunk_size, tile_size, strict=True)):
+        msg = f"chunk size {chunk_size} must be a multiple of the tile size {tile_size}"
+        raise ValueError(msg)
+    levels = list(range(isyntax.level_count)) if levels is None else list(levels)
+    if not levels or any(not 0 <= level < isyntax.level_count for level in levels):
+        msg = f"invalid levels: {levels}"
+        raise ValueError(msg)
+    if levels != sorted(set(levels)):
+        msg = f"levels must be in increasing order, got {levels}"
+        raise ValueError(msg)
+    try:
+        import zarr
+    except ImportError as e:
+        msg = "exporting to Zarr requires zarr"
+        raise ImportError(msg) from e
+
+    if isinstance(store, os.PathLike):
+        store = os.fspath(store)
+    group = zarr.open_group(store, mode="w" if overwrite else "w-", zarr_format=2)
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="isyntax-zarr") as executor:
+        for level in levels:
+            level_width, level_height = isyntax.level_dimensions[level]
+            array = group.create_array(
+                str(level),
+                shape=(3, level_height, level_width),
+                chunks=(3, chunk_size[1], chunk_size[0]),
+                dtype=np.uint8,
+                fill_value=_FILL_VALUE,
+                chunk_key_encoding={"name": "v2", "separator": "/"},
+            )
+            _write_level(isyntax, level, array, chunk_size, executor, 2 * workers)
+    group.attrs.update(_multiscales_metadata(isyntax, levels))
+    return group
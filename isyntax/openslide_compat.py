@@ -0,0 +1,235 @@
+"""An OpenSlide-compatible interface to iSyntax slides.
+
+`ISyntaxSlide` mirrors the parts of `openslide.OpenSlide` that tiling servers and
+training pipelines use (`read_region`, `get_best_level_for_downsample`, `properties`,
+`associated_images` and so on), so code written against OpenSlide can read iSyntax files
+by swapping the class that opens the slide.
+"""
+
+import io
+from collections.abc import Iterator, Mapping, Sequence
+from pathlib import Path
+from types import MappingProxyType, TracebackType
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from isyntax.wrapper import IOBackendName, ISyntax, ISyntaxCache
+
+if TYPE_CHECKING:
+    import PIL.Image
+
+#: Name of the vendor, as reported by OpenSlide in the "openslide.vendor" property.
+VENDOR = "philips"
+
+
+def _best_level_for_downsample(level_downsamples: Sequence[float], downsample: float) -> int:
+    """Gets the finest level whose downsample is at most `downsample` (like OpenSlide)."""
+    for level, level_downsample in enumerate(level_downsamples):
+        if downsample < level_downsample:
+            return max(level - 1, 0)
+    return len(level_downsamples) - 1
+
+
+class _AssociatedImages(Mapping[str, "PIL.Image.Image"]):
+    """The label and macro images of a slide, which are decoded on first access."""
+
+    def __init__(self, isyntax: ISyntax) -> None:
+        self._readers = {
+            "label": isyntax.read_label_image_jpeg,
+            "macro": isyntax.read_macro_image_jpeg,
+        }
+        self._jpegs: dict[str, bytes] | None = None
+        self._images: dict[str, PIL.Image.Image] = {}
+
+    def _get_jpegs(self) -> dict[str, bytes]:
+        if self._jpegs is None:
+            jpegs = {}
+            for name, read_jpeg in self._readers.items():
+                data = read_jpeg()
+                if data is not None:
+                    jpegs[name] = bytes(data)
+            self._jpegs = jpegs
+        return self._jpegs
+
+    def __getitem__(self, name: str) -> "PIL.Image.Image":
+        image = self._images.get(name)
+        if image is None:
+            import PIL.Image
+
+            image = PIL.Image.open(io.BytesIO(self._get_jpegs()[name]))
+            image.load()
+            self._images[name] = image
+        return image
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._get_jpegs())
+
+    def __len__(self) -> int:
+        return len(self._get_jpegs())
+
+
+class ISyntaxSlide:
+    """An iSyntax slide with the interface of `openslide.OpenSlide`.
+
+    The metadata of the slide is read once when it is opened (see
+    `ISyntax.metadata`), so the properties below are cheap to look up, even from the
+    hot loop of a tile server. Coordinates passed to `read_region` are in the level 0
+    reference frame, as they are in OpenSlide.
+
+    Requires Pillow.
+    """
+
+    def __init__(
+        self,
+        filename: str | Path,
+        cache_size: int = 2000,
+        io: IOBackendName = "python",
+        cache: ISyntaxCache | None = None,
+        index_path: str | Path | None = None,
+    ) -> None:
+        """Opens a slide. The arguments are passed on to `ISyntax.open`."""
+        try:
+            import PIL.Image  # noqa: F401
+        except ImportError as e:
+            msg = "ISyntaxSlide requires Pillow"
+            raise ImportError(msg) from e
+        self.isyntax = ISyntax.open(
+            filename,
+            cache_size=cache_size,
+            io=io,
+            cache=cache,
+            index_path=index_path,
+        )
+        metadata = self.isyntax.metadata
+        self._level_dimensions = tuple(map(tuple, metadata.level_dimensions.tolist()))
+        self._level_downsamples = tuple(float(d) for d in metadata.level_downsamples.tolist())
+        self._properties = MappingProxyType(self._build_properties())
+        self._associated_images = _AssociatedImages(self.isyntax)
+
+    def _build_properties(self) -> dict[str, str]:
+        metadata = self.isyntax.metadata
+        tile_width, tile_height = metadata.tile_size
+        properties = {
+            "openslide.vendor": VENDOR,
+            "openslide.mpp-x": repr(metadata.mpp_x),
+            "openslide.mpp-y": repr(metadata.mpp_y),
+            "openslide.level-count": str(metadata.level_count),
+        }
+        for level, (width, height) in enumerate(self._level_dimensions):
+            prefix = f"openslide.level[{level}]"
+            properties[f"{prefix}.width"] = str(width)
+            properties[f"{prefix}.height"] = str(height)
+            properties[f"{prefix}.downsample"] = repr(self._level_downsamples[level])
+            properties[f"{prefix}.tile-width"] = str(tile_width)
+            properties[f"{prefix}.tile-height"] = str(tile_height)
+        properties["philips.barcode"] = self.isyntax.barcode
+        return properties
+
+    @classmethod
+    def detect_format(cls, filename: str | Path) -> str | None:
+        """Gets the vendor of a slide file, or None if it is not an iSyntax file."""
+        return VENDOR if Path(filename).suffix.lower() == ".isyntax" else None
+
+    @property
+    def level_count(self) -> int:
+        return len(self._level_dimensions)
+
+    @property
+    def dimensions(self) -> tuple[int, int]:
+        return self._level_dimensions[0]
+
+    @property
+    def level_dimensions(self) -> tuple[tuple[int, int], ...]:
+        return self._level_dimensions
+
+    @property
+    def level_downsamples(self) -> tuple[float, ...]:
+        return self._level_downsamples
+
+    @property
+    def properties(self) -> Mapping[str, str]:
+        """Slide properties, under the same "openslide.*" names as OpenSlide uses."""
+        return self._properties
+
+    @property
+    def associated_images(self) -> Mapping[str, "PIL.Image.Image"]:
+        """The "label" and "macro" images of the slide (those that it has)."""
+        return self._associated_images
+
+    def get_best_level_for_downsample(self, downsample: float) -> int:
+        """Gets the finest level whose downsample factor is at most `downsample`."""
+        return _best_level_for_downsample(self._level_downsamples, downsample)
+
+    def read_region_array(
+        self,
+        location: tuple[int, int],
+        level: int,
+        size: tuple[int, int],
+    ) -> np.ndarray:
+        """Like `read_region`, but returns the pixels as a [height, width, 4] RGBA array."""
+        if not 0 <= level < len(self._level_dimensions):
+            msg = f"invalid level: {level}"
+            raise ValueError(msg)
+        width, height = size
+        if width < 0 or height < 0:
+            msg = f"invalid region size: {size}"
+            raise ValueError(msg)
+        downsample = int(self._level_downsamples[level])
+        x, y = location[0] // downsample, location[1] // downsample
+        level_width, level_height = self._level_dimensions[level]
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + width, level_width), min(y + height, level_height)
+        if (left, top, right, bottom) == (x, y, x + width, y + height) and width and height:
+            return self.isyntax.read_region(x, y, width, height, level=level)
+        # Like OpenSlide, pixels outside of the level are transparent.
+        out = np.zeros((height, width, 4), dtype=np.uint8)
+        if left < right and top < bottom:
+            out[top - y : bottom - y, left - x : right - x] = self.isyntax.read_region(
+                left, top, right - left, bottom - top, level=level
+            )
+        return out
+
+    def read_region(
+        self,
+        location: tuple[int, int],
+        level: int,
+        size: tuple[int, int],
+    ) -> "PIL.Image.Image":
+        """Reads a region of a level.
+
+        Args:
+            location: (x, y) of the top left corner of the region, in the level 0
+                reference frame.
+            level: Level number.
+            size: (width, height) of the region, in the reference frame of `level`.
+
+        Returns:
+            An RGBA image. Pixels outside of the level are transparent.
+        """
+        import PIL.Image
+
+        return PIL.Image.fromarray(self.read_region_array(location, level, size))
+
+    def get_thumbnail(self, size: tuple[int, int]) -> "PIL.Image.Image":
+        """Gets an RGB thumbnail of the slide that fits within `size`."""
+        import PIL.Image
+
+        return PIL.Image.fromarray(self.isyntax.get_thumbnail(size))
+
+    def close(self) -> None:
+        self.isyntax.close()
+
+    def __enter__(self) -> "ISyntaxSlide":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.isyntax._filename!r})"  # noqa: SLF001
@@ -0,0 +1,296 @@
+import io
+import threading
+import urllib.request
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing_extensions import Buffer
+
+#: Fetches `length` bytes starting at `offset` from remote storage.
+RangeFetcher = Callable[[int, int], bytes]
+
+
+class HTTPRangeSource:
+    """Fetches byte ranges of a remote file with HTTP range requests.
+
+    This works with any server that supports range requests, including S3-compatible
+    object stores (through presigned URLs, or by passing authorization headers).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: Mapping[str, str] | None = None,
+        timeout: float = 30.0,
+    ) -> None:
+        """Creates a source for a URL.
+
+        Args:
+            url: HTTP or HTTPS URL of the file.
+            headers: Extra headers to send with every request.
+            timeout: Timeout for each request (in seconds).
+        """
+        if not url.startswith(("http://", "https://")):
+            msg = f"URL must use http or https: {url!r}"
+            raise ValueError(msg)
+        self.url = url
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+
+    def _get_range(self, offset: int, length: int) -> tuple[bytes, str]:
+        request = urllib.request.Request(  # noqa: S310
+            self.url,
+            headers={**self.headers, "Range": f"bytes={offset}-{offset + length - 1}"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:  # noqa: S310
+            # A server that ignores the range would send the whole file.
+            if response.status != 206:  # noqa: PLR2004
+                msg = f"server does not support range requests (status {response.status})"
+                raise OSError(msg)
+            return response.read(), response.headers.get("Content-Range", "")
+
+    def get_size(self) -> int:
+        """Gets the size of the file (in bytes)."""
+        _, content_range = self._get_range(0, 1)
+        # Content-Range: bytes 0-0/<size>
+        _, _, size = content_range.rpartition("/")
+        if not size.isdigit():
+            msg = f"server did not report the size of the file: {content_range!r}"
+            raise OSError(msg)
+        return int(size)
+
+    def __call__(self, offset: int, length: int) -> bytes:
+        data, _ = self._get_range(offset, length)
+        if len(data) != length:
+            msg = f"expected {length} bytes from offset {offset}, got {len(data)}"
+            raise OSError(msg)
+        return data
+
+
+class RangedFile(io.RawIOBase):
+    """Read-only file whose contents are fetched from remote storage in blocks.
+
+    libisyntax reads a slide with many small reads, which would each become a request
+    of their own if they were passed through to the remote storage directly. Here, reads
+    are served from an LRU cache of fixed-size blocks. Missing blocks that are adjacent
+    are fetched together in a single request, along with up to `readahead_blocks`
+    blocks that follow them. The start of the file, which holds the slide's header, is
+    fetched with parallel requests up front.
+
+    Positional reads (`readinto_at`) are thread-safe, and pass `ISyntax` reads from
+    multiple threads through without serializing them. A block that is being fetched by
+    one thread is waited for, rather than fetched again, by the others.
+    """
+
+    def __init__(
+        self,
+        fetch: RangeFetcher,
+        size: int,
+        block_size: int = 512 << 10,
+        cache_bytes: int = 256 << 20,
+        readahead_blocks: int = 2,
+        prefetch_bytes: int = 8 << 20,
+        max_workers: int = 8,
+    ) -> None:
+        """Creates a file.
+
+        Args:
+            fetch: Function that fetches `length` bytes from `offset`, e.g. an
+                `HTTPRangeSource`.
+            size: Size of the file (in bytes).
+            block_size: Size of the blocks that are fetched and cached (in bytes).
+            cache_bytes: Maximum total size of the cached blocks (in bytes).
+            readahead_blocks: Number of blocks to fetch past the end of a read.
+            prefetch_bytes: Number of bytes at the start of the file to fetch right
+                away (see `prefetch`).
+            max_workers: Maximum number of parallel requests made by `prefetch`.
+        """
+        super().__init__()
+        if block_size < 1:
+            msg = f"block_size must be at least 1, got {block_size}"
+            raise ValueError(msg)
+        self._fetch = fetch
+        self.size = size
+        self.block_size = block_size
+        self.cache_bytes = cache_bytes
+        self.readahead_blocks = readahead_blocks
+        self.max_workers = max_workers
+        #: Number of requests made to the remote storage.
+        self.request_count = 0
+        #: Number of bytes fetched from the remote storage.
+        self.fetched_bytes = 0
+        self._block_count = (size + block_size - 1) // block_size
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._cached_bytes = 0
+        self._pending: dict[int, Future[bytes]] = {}
+        self._lock = threading.Lock()
+        self._pos = 0
+        if prefetch_bytes > 0:
+            self.prefetch(0, prefetch_bytes)
+
+    @classmethod
+    def from_url(
+        cls: type["RangedFile"],
+        url: str,
+        headers: Mapping[str, str] | None = None,
+        timeout: float = 30.0,
+        **kwargs: int,
+    ) -> "RangedFile":
+        """Opens a file over HTTP(S).
+
+        Args:
+            url: HTTP or HTTPS URL of the file.
+            headers: Extra headers to send with every request.
+            timeout: Timeout for each request (in seconds).
+            **kwargs: Options for `RangedFile.__init__`.
+        """
+        source = HTTPRangeSource(url, headers, timeout)
+        return cls(source, source.get_size(), **kwargs)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            msg = f"invalid whence: {whence}"
+            raise ValueError(msg)
+        return self._pos
+
+    def readinto(self, buffer: "Buffer") -> int:
+        n_read = self.readinto_at(buffer, self._pos)
+        self._pos += n_read
+        return n_read
+
+    def readinto_at(self, buffer: "Buffer", offset: int) -> int:
+        """Reads data from the given offset into a buffer, without moving the position.
+
+        Returns:
+            Number of bytes read, which is less than the size of the buffer only at the
+            end of the file.
+        """
+        dest = memoryview(buffer).cast("B")
+        end = min(offset + len(dest), self.size)
+        if offset >= end:
+            return 0
+        first, last = offset // self.block_size, (end - 1) // self.block_size
+        blocks = self._load_blocks(first, last, self.readahead_blocks)
+        pos = offset
+        for index in range(first, last + 1):
+            block = blocks[index]
+            start = pos - index * self.block_size
+            n = min(len(block) - start, end - pos)
+            dest[pos - offset : pos - offset + n] = block[start : start + n]
+            pos += n
+        return end - offset
+
+    def prefetch(self, offset: int, length: int) -> None:
+        """Fetches a range of the file into the cache, with up to `max_workers` requests."""
+        end = min(offset + length, self.size)
+        if offset >= end:
+            return
+        first, last = offset // self.block_size, (end - 1) // self.block_size
+        blocks_per_request = -(-(last - first + 1) // self.max_workers)
+        starts = range(first, last + 1, blocks_per_request)
+        with ThreadPoolExecutor(max_workers=len(starts)) as executor:
+            futures = [
+                executor.submit(
+                    self._load_blocks,
+                    start,
+                    min(start + blocks_per_request - 1, last),
+                    0,
+                )
+                for start in starts
+            ]
+            for future in futures:
+                future.result()
+
+    def _load_blocks(self, first: int, last: int, readahead: int) -> dict[int, bytes]:
+        blocks, futures, claimed = self._claim_blocks(first, last, readahead)
+        try:
+            # Adjacent blocks are fetched with a single request.
+            run_start = 0
+            for i in range(1, len(claimed) + 1):
+                if i == len(claimed) or claimed[i] != claimed[i - 1] + 1:
+                    self._fetch_blocks(claimed[run_start:i])
+                    run_start = i
+        except BaseException as e:
+            with self._lock:
+                for index in claimed:
+                    if self._pending.get(index) is futures[index]:
+                        del self._pending[index]
+                        futures[index].set_exception(e)
+            raise
+        for index in range(first, last + 1):
+            if index not in blocks:
+                blocks[index] = futures[index].result()
+        return blocks
+
+    def _claim_blocks(
+        self,
+        first: int,
+        last: int,
+        readahead: int,
+    ) -> tuple[dict[int, bytes], dict[int, Future[bytes]], list[int]]:
+        """Looks up blocks in the cache, and claims the missing ones for fetching.
+
+        Returns:
+            The cached blocks, futures for the blocks that are being fetched (by this
+            thread or by others), and the blocks that this thread has to fetch.
+        """
+        blocks: dict[int, bytes] = {}
+        futures: dict[int, Future[bytes]] = {}
+        claimed: list[int] = []
+        with self._lock:
+            for index in range(first, last + 1):
+                if index in self._blocks:
+                    self._blocks.move_to_end(index)
+                    blocks[index] = self._blocks[index]
+                elif index in self._pending:
+                    futures[index] = self._pending[index]
+                else:
+                    claimed.append(index)
+            if claimed and claimed[-1] == last:
+                index = last + 1
+                while (
+                    index <= last + readahead
+                    and index < self._block_count
+                    and index not in self._blocks
+                    and index not in self._pending
+                ):
+                    claimed.append(index)
+                    index += 1
+            for index in claimed:
+                futures[index] = self._pending[index] = Future()
+        return blocks, futures, claimed
+
+    def _fetch_blocks(self, indices: list[int]) -> None:
+        start = indices[0] * self.block_size
+        end = min((indices[-1] + 1) * self.block_size, self.size)
+        data = self._fetch(start, end - start)
+        with self._lock:
+            self.request_count += 1
+            self.fetched_bytes += len(data)
+            for index in indices:
+                offset = index * self.block_size - start
+                block = data[offset : offset + self.block_size]
+                self._blocks[index] = block
+                self._cached_bytes += len(block)
+                self._pending.pop(index).set_result(block)
+            while self._cached_bytes > self.cache_bytes and len(self._blocks) > 1:
+                _, evicted = self._blocks.popitem(last=False)
+                self._cached_bytes -= len(evicted)
@@ -0,0 +1,325 @@
+"""Grids of patches at a target resolution, and batched reading of them.
+
+Patches are read from the coarsest pyramid level that is at least as fine as the
+target resolution, and resampled to the target resolution while they are decoded (see
+`ISyntax.read_region_scaled`). That is much less work than reading from level 0 and
+downsampling, since every level above 0 halves the number of pixels to decode in each
+direction.
+"""
+
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import numpy as np
+
+from isyntax.wrapper import ISyntax, PixelFormatName, _pixel_format_from_name
+
+# Relative difference in resolution that is treated as no difference at all, since
+# slides report resolutions like 0.25 as 0.2498.
+_MPP_TOLERANCE = 0.01
+
+
+@dataclass(frozen=True)
+class PatchGrid:
+    """Patches of a slide at a target resolution, and where to read them from."""
+
+    #: Level that the patches are read from.
+    level: int
+    #: [N, 2] array of the (x, y) top-left corners of the patches, in the reference
+    #: frame of `level`.
+    coords: np.ndarray
+    #: (width, height) of the region that is read for each patch from `level`.
+    read_size: tuple[int, int]
+    #: (width, height) of the patches at the target resolution.
+    patch_size: tuple[int, int]
+    #: Downsample factor of `level` relative to level 0.
+    level_downsample: int
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    @property
+    def coords_level0(self) -> np.ndarray:
+        """The top-left corners of the patches, in the reference frame of level 0."""
+        return self.coords * self.level_downsample
+
+    @property
+    def is_resampled(self) -> bool:
+        """Whether patches are resampled after reading, rather than read as they are."""
+        return self.read_size != self.patch_size
+
+
+def _pair(value: int | np.integer | tuple[int, int]) -> tuple[int, int]:
+    if isinstance(value, int | np.integer):
+        return int(value), int(value)
+    return value
+
+
+def best_level_for_mpp(isyntax: ISyntax, target_mpp: float) -> int:
+    """Finds the coarsest level that is at least as fine as a target resolution.
+
+    Args:
+        isyntax: The slide.
+        target_mpp: Target resolution (in microns per pixel).
+
+    Returns:
+        The level number.
+    """
+    level_mpp = isyntax.metadata.level_mpp.tolist()
+    limit = target_mpp * (1 + _MPP_TOLERANCE)
+    if level_mpp[0][0] > limit or level_mpp[0][1] > limit:
+        msg = f"target resolution {target_mpp} mpp is finer than level 0 of the slide"
+        raise ValueError(msg)
+    best = 0
+    for index, (mpp_x, mpp_y) in enumerate(level_mpp):
+        if mpp_x <= limit and mpp_y <= limit:
+            best = index
+    return best
+
+
+def _tissue_fraction(
+    mask: np.ndarray,
+    extent: tuple[float, float],
+    boxes: np.ndarray,
+) -> np.ndarray:
+    """Computes the fraction of each box that is covered by a mask.
+
+    Args:
+        mask: [H, W] boolean mask.
+        extent: (width, height) of each mask pixel, in level 0 pixels.
+        boxes: [N, 4] array of (x0, y0, x1, y1) boxes, in level 0 pixels.
+    """
+    mask_height, mask_width = mask.shape
+    # Summed-area table, padded so that sums over empty ranges are 0.
+    table = np.zeros((mask_height + 1, mask_width + 1), dtype=np.int64)
+    table[1:, 1:] = np.cumsum(np.cumsum(mask, axis=0, dtype=np.int64), axis=1)
+    x0 = np.clip(np.floor(boxes[:, 0] / extent[0]).astype(np.int64), 0, mask_width)
+    y0 = np.clip(np.floor(boxes[:, 1] / extent[1]).astype(np.int64), 0, mask_height)
+    x1 = np.clip(np.ceil(boxes[:, 2] / extent[0]).astype(np.int64), 0, mask_width)
+    y1 = np.clip(np.ceil(boxes[:, 3] / extent[1]).astype(np.int64), 0, mask_height)
+    covered = table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+    area = np.maximum((x1 - x0) * (y1 - y0), 1)
+    return covered / area
+
+
+def patch_grid(
+    isyntax: ISyntax,
+    patch_size: int | np.integer | tuple[int, int],
+    target_mpp: float,
+    stride: int | np.integer | tuple[int, int] | None = None,
+    tissue_mask: np.ndarray | Literal["stored"] | None = None,
+    min_tissue: float = 0.5,
+) -> PatchGrid:
+    """Lays out a regular grid of patches over a slide at a target resolution.
+
+    Only patches that lie entirely within the slide are included.
+
+    Args:
+        isyntax: The slide.
+        patch_size: Size of the patches at the target resolution, as a single number or
+            a (width, height) pair.
+        target_mpp: Target resolution (in microns per pixel).
+        stride: Distance between neighbouring patches at the target resolution, as a
+            single number or an (x, y) pair. Defaults to `patch_size`, so that patches
+            do not overlap.
+        tissue_mask: Optional mask of the tissue in the slide, to leave out patches of
+            background. Either an [H, W] boolean array that covers the whole of level 0
+            at any resolution (e.g. from thresholding a thumbnail), or "stored" to use
+            the tiles that are stored in the file (see `ISyntax.tile_mask`), which
+            does not require decoding anything.
+        min_tissue: Minimum fraction of a patch that must be covered by the tissue mask.
+
+    Returns:
+        The grid of patches.
+    """
+    patch_width, patch_height = _pair(patch_size)
+    stride_x, stride_y = _pair(stride) if stride is not None else (patch_width, patch_height)
+    level = best_level_for_mpp(isyntax, target_mpp)
+    level_mpp_x, level_mpp_y = isyntax.metadata.level_mpp[level].tolist()
+    scale_x = target_mpp / level_mpp_x
+    scale_y = target_mpp / level_mpp_y
+    if abs(scale_x - 1) <= _MPP_TOLERANCE and abs(scale_y - 1) <= _MPP_TOLERANCE:
+        scale_x = scale_y = 1.0
+    read_size = (round(patch_width * scale_x), round(patch_height * scale_y))
+    level_width, level_height = isyntax.level_dimensions[level]
+    xs = np.arange(0, level_width - read_size[0] + 1, max(1, round(stride_x * scale_x)))
+    ys = np.arange(0, level_height - read_size[1] + 1, max(1, round(stride_y * scale_y)))
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    coords = np.stack([grid_x.ravel(), grid_y.ravel()], axis=1).astype(np.int64)
+    downsample = isyntax.level_downsamples[level]
+
+    if tissue_mask is not None and len(coords) > 0:
+        if isinstance(tissue_mask, str):
+            mask = isyntax.tile_mask(level)
+            extent = (
+                float(isyntax.tile_width * downsample),
+                float(isyntax.tile_height * downsample),
+            )
+            # The tile grid starts `offset` pixels before the origin of the level.
+            offset = isyntax.tile_offset(level)
+        else:
+            mask = np.asarray(tissue_mask, dtype=np.bool_)
+            width, height = isyntax.dimensions
+            extent = (width / mask.shape[1], height / mask.shape[0])
+            offset = 0
+        boxes = (np.concatenate([coords, coords + read_size], axis=1) + offset) * downsample
+        coords = coords[_tissue_fraction(mask, extent, boxes) >= min_tissue]
+
+    return PatchGrid(level, coords, read_size, (patch_width, patch_height), downsample)
+
+
+class _PatchReader:
+    """Reads the patches of a grid into caller-provided buffers."""
+
+    def __init__(self, isyntax: ISyntax, grid: PatchGrid, pixel_format: PixelFormatName) -> None:
+        self.isyntax = isyntax
+        self.grid = grid
+        self.pixel_format = pixel_format
+        tile_size = (isyntax.tile_width, isyntax.tile_height)
+        self.tile_offset = isyntax.tile_offset(grid.level)
+        # Patches that are whole tiles are decoded together by `ISyntax.read_tiles`.
+        self.tile_size = (
+            tile_size
+            if grid.read_size == tile_size
+            and not np.any((grid.coords + self.tile_offset) % np.array(tile_size, dtype=np.int64))
+            else None
+        )
+
+    def read(self, indices: np.ndarray, out: np.ndarray) -> None:
+        coords = self.grid.coords[indices]
+        if self.tile_size is not None and not self.grid.is_resampled:
+            tile_coords = (coords + self.tile_offset) // np.array(self.tile_size, dtype=np.int64)
+            self.isyntax.read_tiles(tile_coords, self.grid.level, out, self.pixel_format)
+            return
+        width, height = self.grid.read_size
+        level = self.grid.level
+        if not self.grid.is_resampled:
+            for (x, y), patch in zip(coords.tolist(), out, strict=True):
+                self.isyntax.read_region(x, y, width, height, level, patch, self.pixel_format)
+            return
+        downsample = self.grid.level_downsample
+        for (x, y), patch in zip(coords.tolist(), out, strict=True):
+            self.isyntax.read_region_scaled(
+                x * downsample,
+                y * downsample,
+                width * downsample,
+                height * downsample,
+                self.grid.patch_size,
+                patch,
+                self.pixel_format,
+                level,
+            )
+
+    def new_batch(self, size: int) -> np.ndarray:
+        width, height = self.grid.patch_size
+        return np.empty(
+            (size, height, width, _pixel_format_from_name(self.pixel_format).channel_count),
+            dtype=np.uint8,
+        )
+
+
+def iter_patches(
+    isyntax: ISyntax,
+    grid: PatchGrid,
+    batch_size: int = 64,
+    pixel_format: PixelFormatName = "RGB",
+    workers: int = 4,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Reads the patches of a grid in batches, decoding ahead of the consumer.
+
+    Up to `workers` batches are read in the background at a time, on threads that
+    decode without holding the GIL.
+
+    Args:
+        isyntax: The slide.
+        grid: Grid of patches (see `patch_grid`).
+        batch_size: Number of patches per batch. The last batch may be smaller.
+        pixel_format: Channel order of the pixel data, see `ISyntax.read_tile`.
+        workers: Number of batches to read at a time.
+
+    Yields:
+        (coords, pixels) tuples, where coords is a [B, 2] array of the (x, y) top-left
+        corners of the patches in level 0 coordinates, and pixels is a
+        [B, patch_height, patch_width, C] array.
+    """
+    if batch_size < 1 or workers < 1:
+        msg = f"batch_size and workers must be at least 1, got {batch_size} and {workers}"
+        raise ValueError(msg)
+    reader = _PatchReader(isyntax, grid, pixel_format)
+    coords_level0 = grid.coords_level0
+
+    def read_batch(start: int) -> np.ndarray:
+        indices = np.arange(start, min(start + batch_size, len(grid)))
+        out = reader.new_batch(len(indices))
+        reader.read(indices, out)
+        return out
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: deque[tuple[int, Future[np.ndarray]]] = deque()
+        starts = iter(range(0, len(grid), batch_size))
+        try:
+            for start in starts:
+                pending.append((start, executor.submit(read_batch, start)))
+                if len(pending) == workers:
+                    break
+            while pending:
+                start, future = pending.popleft()
+                pixels = future.result()
+                next_start = next(starts, None)
+                if next_start is not None:
+                    pending.append((next_start, executor.submit(read_batch, next_start)))
+                yield coords_level0[start : start + len(pixels)], pixels
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+class PatchDataset:
+    """Map-style dataset of the patches of a grid.
+
+    This works with `torch.utils.data.DataLoader` (including with `num_workers > 0`, if
+    the slide was opened with `ISyntax.open`, see `ISyntax`) without depending on
+    PyTorch.
+    """
+
+    def __init__(
+        self,
+        isyntax: ISyntax,
+        grid: PatchGrid,
+        pixel_format: PixelFormatName = "RGB",
+        transform: Callable[[np.ndarray], Any] | None = None,
+    ) -> None:
+        """Creates a dataset.
+
+        Args:
+            isyntax: The slide.
+            grid: Grid of patches (see `patch_grid`).
+            pixel_format: Channel order of the pixel data, see `ISyntax.read_tile`.
+            transform: Optional function that is applied to each
+                [patch_height, patch_width, C] patch.
+        """
+        self.isyntax = isyntax
+        self.grid = grid
+        self.pixel_format = pixel_format
+        self.transform = transform
+        self._reader: _PatchReader | None = None
+
+    def __len__(self) -> int:
+        return len(self.grid)
+
+    def __getitem__(self, index: int) -> Any:  # noqa: ANN401
+        if not -len(self.grid) <= index < len(self.grid):
+            msg = f"patch index out of range: {index}"
+            raise IndexError(msg)
+        if self._reader is None:
+            self._reader = _PatchReader(self.isyntax, self.grid, self.pixel_format)
+        out = self._reader.new_batch(1)
+        self._reader.read(np.array([index % len(self.grid)]), out)
+        patch = out[0]
+        return patch if self.transform is None else self.transform(patch)
+
+    def __getstate__(self) -> dict[str, object]:
+        return {**self.__dict__, "_reader": None}
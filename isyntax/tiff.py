@@ -0,0 +1,139 @@
+"""Exports slides to pyramidal tiled TIFF and OME-TIFF files.
+
+Requires tifffile (and imagecodecs for JPEG and Zstandard compression), which are
+installed with the `tiff` extra.
+"""
+
+import os
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+
+from isyntax.wrapper import ISyntax
+
+TiffCompression = Literal["jpeg", "deflate", "zstd", "none"]
+
+_TIFFFILE_COMPRESSIONS: dict[TiffCompression, str | None] = {
+    "jpeg": "jpeg",
+    "deflate": "zlib",
+    "zstd": "zstd",
+    "none": None,
+}
+
+
+def _level_region(
+    isyntax: ISyntax,
+    level: int,
+    region: tuple[int, int, int, int] | None,
+) -> tuple[int, int, int, int]:
+    """Maps a region of level 0 to the (x, y, width, height) that it covers in a level."""
+    level_width, level_height = isyntax.level_dimensions[level]
+    if region is None:
+        return 0, 0, level_width, level_height
+    x, y, width, height = region
+    downsample = isyntax.level_downsamples[level]
+    left, top = max(x // downsample, 0), max(y // downsample, 0)
+    right = min(-(-(x + width) // downsample), level_width)
+    bottom = min(-(-(y + height) // downsample), level_height)
+    if right <= left or bottom <= top:
+        msg = f"region {region} does not overlap level {level}"
+        raise ValueError(msg)
+    return left, top, right - left, bottom - top
+
+
+def _iter_tiles(
+    isyntax: ISyntax,
+    level: int,
+    region: tuple[int, int, int, int],
+) -> Iterator[np.ndarray]:
+    """Yields the TIFF tiles of a region of a level in row-major order."""
+    x, y, width, height = region
+    tile_width, tile_height = isyntax.tile_width, isyntax.tile_height
+    cols = -(-width // tile_width)
+    for _, strip in isyntax.iter_strips(x, y, width, height, level, pixel_format="RGB"):
+        padded = np.zeros((tile_height, cols * tile_width, 3), dtype=np.uint8)
+        padded[: len(strip), :width] = strip
+        tiles = padded.reshape(tile_height, cols, tile_width, 3).transpose(1, 0, 2, 3)
+        yield from np.ascontiguousarray(tiles)
+
+
+def export_tiff(
+    isyntax: ISyntax,
+    path: str | Path,
+    levels: Sequence[int] | None = None,
+    region: tuple[int, int, int, int] | None = None,
+    compression: TiffCompression = "jpeg",
+    quality: int = 90,
+    workers: int | None = None,
+) -> None:
+    """Exports levels of a slide to a pyramidal tiled TIFF or OME-TIFF file.
+
+    The first level is written as the main image, and the others as its
+    sub-resolutions (SubIFDs), so every level of the file is copied from a level of the
+    slide rather than resampled. The file is an OME-TIFF if `path` ends with ".ome.tif"
+    or ".ome.tiff". Tiles are decoded and compressed in parallel, and written in order
+    while the next ones are being decoded (see `ISyntax.iter_strips`), so memory use
+    does not grow with the height of the slide.
+
+    Args:
+        isyntax: The slide.
+        path: Path of the TIFF file.
+        levels: Levels to export, from finest to coarsest. Defaults to all levels.
+        region: Optional (x, y, width, height) of a region to export, in the level 0
+            reference frame. Defaults to the whole slide.
+        compression: Compression of the tiles. "jpeg" and "zstd" require imagecodecs.
+        quality: Quality setting for the "jpeg" compression.
+        workers: Number of threads to compress tiles with. Defaults to the number of
+            cores.
+    """
+    if compression not in _TIFFFILE_COMPRESSIONS:
+        msg = f"unknown TIFF compression: {compression!r}"
+        raise ValueError(msg)
+    levels = list(range(isyntax.level_count)) if levels is None else list(levels)
+    if not levels or any(not 0 <= level < isyntax.level_count for level in levels):
+        msg = f"invalid levels: {levels}"
+        raise ValueError(msg)
+    if levels != sorted(set(levels)):
+        msg = f"levels must be in increasing order, got {levels}"
+        raise ValueError(msg)
+    try:
+        import tifffile
+    except ImportError as e:
+        msg = "exporting to TIFF requires tifffile"
+        raise ImportError(msg) from e
+
+    path = Path(path)
+    is_ome = path.name.lower().endswith((".ome.tif", ".ome.tiff"))
+    options: dict[str, Any] = {
+        "dtype": np.uint8,
+        "tile": (isyntax.tile_height, isyntax.tile_width),
+        "photometric": "rgb",
+        "compression": _TIFFFILE_COMPRESSIONS[compression],
+        "compressionargs": {"level": quality} if compression == "jpeg" else None,
+        "maxworkers": workers or os.cpu_count() or 1,
+        "resolutionunit": "CENTIMETER",
+    }
+    with tifffile.TiffWriter(path, bigtiff=True, ome=is_ome) as tif:
+        for index, level in enumerate(levels):
+            level_region = _level_region(isyntax, level, region)
+            mpp_x, mpp_y = isyntax.metadata.level_mpp[level].tolist()
+            metadata = None
+            if is_ome and index == 0:
+                metadata = {
+                    "axes": "YXS",
+                    "PhysicalSizeX": mpp_x,
+                    "PhysicalSizeXUnit": "\N{MICRO SIGN}m",
+                    "PhysicalSizeY": mpp_y,
+                    "PhysicalSizeYUnit": "\N{MICRO SIGN}m",
+                }
+            tif.write(
+                _iter_tiles(isyntax, level, level_region),
+                shape=(level_region[3], level_region[2], 3),
+                subifds=len(levels) - 1 if index == 0 else None,
+                subfiletype=0 if index == 0 else 1,
+                resolution=(1e4 / mpp_x, 1e4 / mpp_y),
+                metadata=metadata,
+                **options,
+            )
@@ -1,23 +1,400 @@
+import contextlib
+import hashlib
+import mmap
 import os
-from collections.abc import Iterator
+import tempfile
+import threading
+import weakref
+from collections import deque
+from collections.abc import Generator, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import cached_property
 from io import BufferedIOBase, RawIOBase
 from pathlib import Path
 from types import TracebackType
+from typing import TYPE_CHECKING, Any, BinaryIO, ClassVar, Literal
 
 import numpy as np
 
+from isyntax.disk_cache import DiskTileCache
 from isyntax.lowlevel import libisyntax
-from isyntax.lowlevel.io_management import register_io
+from isyntax.lowlevel.io_management import (
+    IOBackend,
+    get_registered_io,
+    register_io,
+    unregister_io,
+)
+
+if TYPE_CHECKING:
+    from typing_extensions import Buffer
+
+    from isyntax.tiff import TiffCompression
+
+IOBackendName = Literal["python", "native", "mmap"]
+PixelFormatName = Literal["RGBA", "BGRA", "RGB", "BGR"]
+TileOrder = Literal["row-major", "hilbert"]
+
+_INT32_MAX = 2**31 - 1
+# Amount of data at the start and at the end of a file that its fingerprint is based on.
+_FINGERPRINT_HEAD_BYTES = 1 << 20
+_FINGERPRINT_TAIL_BYTES = 64 << 10
+# Tiles are shifted by libisyntax's per-level padding, see pyisyntax_read_region().
+_PER_LEVEL_PADDING = 3
+# Rows of tiles that `ISyntax.iter_strips` decodes ahead of the consumer.
+_PREFETCH_TILE_ROWS = 2
+
+# Incremented in the child process after every fork. Slides and caches that were created
+# in an earlier generation belong to a parent process (see `ISyntax.ptr`).
+_fork_generation = 0
+# Guards reopening slides after a fork or unpickling.
+_reopen_lock = threading.Lock()
+_live_caches: "weakref.WeakSet[ISyntaxCache]" = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    # Locks that were held by other threads of the parent stay locked in the child, and
+    # libisyntax's worker threads are not copied, so no C state is reused across a fork.
+    global _fork_generation, _reopen_lock  # noqa: PLW0603
+    _fork_generation += 1
+    _reopen_lock = threading.Lock()
+    for cache in list(_live_caches):
+        cache._recreate_after_fork()  # noqa: SLF001
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _io_backend_from_name(name: IOBackendName) -> IOBackend:
+    try:
+        return IOBackend[name.upper()]
+    except KeyError:
+        msg = f"unknown I/O backend: {name!r}"
+        raise ValueError(msg) from None
+
+
+def _output_array(out: "np.ndarray | Buffer | None", shape: tuple[int, ...]) -> np.ndarray:
+    """Returns a uint8 array of the given shape that pixel data can be written into.
+
+    If `out` is given, the returned array shares its memory, so that pixel data is
+    written straight into it.
+    """
+    if out is None:
+        return np.empty(shape, dtype=np.uint8)
+    array = out if isinstance(out, np.ndarray) else np.asarray(memoryview(out))
+    if array.dtype != np.uint8:
+        msg = f"output buffer must have dtype uint8, got {array.dtype}"
+        raise ValueError(msg)
+    if array.shape != shape:
+        msg = f"output buffer must have shape {shape}, got {array.shape}"
+        raise ValueError(msg)
+    if not array.flags.c_contiguous:
+        msg = "output buffer must be C-contiguous"
+        raise ValueError(msg)
+    if not array.flags.writeable:
+        msg = "output buffer must be writable"
+        raise ValueError(msg)
+    return array
+
+
+def _pixel_format_from_name(name: PixelFormatName) -> libisyntax.ISyntaxPixelFormat:
+    try:
+        return libisyntax.ISyntaxPixelFormat[name.upper()]
+    except KeyError:
+        msg = f"unknown pixel format: {name!r}"
+        raise ValueError(msg) from None
+
+
+@contextmanager
+def _map_index(index_path: Path, filename: Path) -> Iterator[mmap.mmap | None]:
+    """Memory-maps an index file, or yields None if it is missing or older than the slide."""
+    try:
+        f = index_path.open("rb")
+    except FileNotFoundError:
+        yield None
+        return
+    with f:
+        index_stat = os.fstat(f.fileno())
+        if index_stat.st_size == 0 or index_stat.st_mtime_ns < filename.stat().st_mtime_ns:
+            yield None
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            yield index
+
+
+@contextmanager
+def _open_atomic(path: Path) -> Iterator[BinaryIO]:
+    """Opens a temporary file for writing, which replaces `path` once it is complete."""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        Path(tmp_name).replace(path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _convert_from_rgb(rgb: np.ndarray, out: np.ndarray, fmt: libisyntax.ISyntaxPixelFormat) -> None:
+    """Writes RGB pixel data into an array in the given pixel format."""
+    if fmt in (libisyntax.ISyntaxPixelFormat.BGRA, libisyntax.ISyntaxPixelFormat.BGR):
+        rgb = rgb[..., ::-1]
+    out[..., :3] = rgb
+    if fmt.channel_count == 4:  # noqa: PLR2004
+        out[..., 3] = 255
+
+
+def _hilbert_sort(coords: np.ndarray) -> np.ndarray:
+    """Sorts [N, 2] (x, y) coordinates along a Hilbert curve.
+
+    Consecutive coordinates are always close together, which keeps the parent tiles that
+    neighbouring tiles share in the tile cache.
+    """
+    if len(coords) == 0:
+        return coords
+    n = 1 << int(coords.max()).bit_length()
+    x = coords[:, 0].copy()
+    y = coords[:, 1].copy()
+    d = np.zeros(len(coords), dtype=np.int64)
+    s = n // 2
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so that the curve is continuous.
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s //= 2
+    return coords[np.argsort(d, kind="stable")]
+
+
+@dataclass(frozen=True)
+class CacheLevelStats:
+    """Cache statistics for the tiles of a single level."""
+
+    resident_tiles: int
+    resident_bytes: int
+    hits: int
+    misses: int
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Snapshot of the contents and counters of an `ISyntaxCache`."""
+
+    # Number of tiles with coefficients in the cache.
+    resident_tiles: int
+    # Memory used by the cached coefficients, in bytes.
+    resident_bytes: int
+    # Tiles whose coefficients were needed for a read and were already in the cache.
+    hits: int
+    # Tiles whose coefficients had to be read from the file and decompressed.
+    misses: int
+    # Number of tiles evicted to stay within the cache's limits.
+    evictions: int
+    # Breakdown by level, up to the highest level with any tiles or reads.
+    levels: tuple[CacheLevelStats, ...] = ()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True, eq=False, slots=True)
+class SlideMetadata:
+    """Snapshot of the metadata of a slide, which is taken when the slide is opened.
+
+    This is read from the C library once per slide, so looking it up is cheap. The
+    per-level values are held in read-only numpy arrays with one row per level, for
+    vectorised coordinate maths, e.g. `coords // metadata.level_downsamples[:, None]` to
+    map level 0 coordinates to all levels.
+    """
+
+    barcode: str
+    # (width, height) of the tiles, in pixels.
+    tile_size: tuple[int, int]
+    # (x, y) offset of the WSI image origin from the macro image origin, in pixels.
+    offset: tuple[int, int]
+    # [level_count, 2] int64 array of the (width, height) of each level, in pixels.
+    level_dimensions: np.ndarray
+    # [level_count, 2] int64 array of the (width, height) of each level, in tiles.
+    level_tiles: np.ndarray
+    # [level_count] int64 array of the scale of each level (its downsample is 2**scale).
+    level_scales: np.ndarray
+    # [level_count] int64 array of the downsample factor of each level.
+    level_downsamples: np.ndarray
+    # [level_count, 2] float64 array of the (x, y) resolution of each level, in microns
+    # per pixel.
+    level_mpp: np.ndarray
+
+    @classmethod
+    def read(cls, isyntax_ptr: libisyntax.ISyntaxPtr) -> "SlideMetadata":
+        """Reads the metadata of an open slide from the C library."""
+        wsi = ISyntaxImage(libisyntax.get_wsi_image(isyntax_ptr))
+        levels = list(wsi.levels)
+        scales = np.array([level.scale for level in levels], dtype=np.int64)
+        return cls(
+            barcode=libisyntax.get_barcode(isyntax_ptr).decode("ascii", errors="replace"),
+            tile_size=(
+                libisyntax.get_tile_width(isyntax_ptr),
+                libisyntax.get_tile_height(isyntax_ptr),
+            ),
+            offset=(wsi.offset_x, wsi.offset_y),
+            level_dimensions=_read_only(
+                np.array([(level.width, level.height) for level in levels], dtype=np.int64),
+            ),
+            level_tiles=_read_only(
+                np.array(
+                    [(level.width_in_tiles, level.height_in_tiles) for level in levels],
+                    dtype=np.int64,
+                ),
+            ),
+            level_scales=_read_only(scales),
+            level_downsamples=_read_only(np.left_shift(1, scales)),
+            level_mpp=_read_only(
+                np.array([(level.mpp_x, level.mpp_y) for level in levels], dtype=np.float64),
+            ),
+        )
+
+    @property
+    def level_count(self) -> int:
+        return len(self.level_dimensions)
+
+    @property
+    def dimensions(self) -> tuple[int, int]:
+        """(width, height) of level 0, in pixels."""
+        width, height = self.level_dimensions[0].tolist()
+        return width, height
+
+    @property
+    def mpp_x(self) -> float:
+        return float(self.level_mpp[0, 0])
+
+    @property
+    def mpp_y(self) -> float:
+        return float(self.level_mpp[0, 1])
 
 
 class ISyntaxCache:
-    def __init__(self, debug_name: str | None = None, cache_size: int = 2000) -> None:
-        self.ptr = libisyntax.cache_create(debug_name, cache_size)
+    """Cache of decoded wavelet coefficients, which are shared by neighbouring tiles.
+
+    A cache may be shared by any number of slides (see `ISyntax.open` and
+    `ISyntaxCache.set_global`). The least recently used tiles are then evicted first,
+    regardless of which slide they belong to, so `max_bytes` bounds the memory used by
+    all of the slides together.
+
+    A `DiskTileCache` may be attached as a second level, which keeps decoded tiles
+    across processes and restarts.
+    """
+
+    _global: ClassVar["ISyntaxCache | None"] = None
+
+    def __init__(
+        self,
+        debug_name: str | None = None,
+        cache_size: int | None = 2000,
+        max_bytes: int | None = None,
+        disk_cache: DiskTileCache | None = None,
+    ) -> None:
+        """Creates a tile cache.
+
+        Args:
+            debug_name: Name of the cache in libisyntax's debug output.
+            cache_size: Maximum number of tiles to keep in the cache, or None for no limit.
+            max_bytes: Maximum memory (in bytes) to use for the cached coefficients, or
+                None for no limit.
+            disk_cache: Optional on-disk cache of decoded tiles, which is consulted by
+                `ISyntax.read_tile`, `ISyntax.read_tiles` and `ISyntax.iter_tiles`
+                before decoding a tile. Regions are always decoded.
+        """
+        self.debug_name = debug_name
+        self.cache_size = cache_size
+        self.max_bytes = max_bytes
+        self.disk_cache = disk_cache
+        self.ptr = libisyntax.cache_create(
+            debug_name,
+            _INT32_MAX if cache_size is None else cache_size,
+            0 if max_bytes is None else max_bytes,
+        )
         self.destroyed = False
+        _live_caches.add(self)
+
+    def _recreate_after_fork(self) -> None:
+        """Replaces the C cache in a forked child, whose slides are then reopened.
+
+        The parent's cache is left alone (it may have been locked by another thread at
+        the time of the fork), so its memory is not freed in the child.
+        """
+        if self.destroyed:
+            return
+        self.ptr = libisyntax.cache_create(
+            self.debug_name,
+            _INT32_MAX if self.cache_size is None else self.cache_size,
+            0 if self.max_bytes is None else self.max_bytes,
+        )
+
+    @classmethod
+    def set_global(cls, cache: "ISyntaxCache | None") -> None:
+        """Sets the cache used by slides that are subsequently opened without one.
+
+        Args:
+            cache: Cache to share, or None to give each slide its own cache again.
+        """
+        cls._global = cache
+
+    @classmethod
+    def get_global(cls) -> "ISyntaxCache | None":
+        """Gets the cache set with `set_global`, if any."""
+        return cls._global
 
     def inject(self, isyntax: "ISyntax") -> None:
         libisyntax.cache_inject(self.ptr, isyntax.ptr)
 
+    def release(self, isyntax: "ISyntax") -> None:
+        """Evicts all tiles of a slide, which must not be in use by any other thread."""
+        libisyntax.cache_release(self.ptr, isyntax.ptr)
+
+    def stats(self) -> CacheStats:
+        totals, levels = libisyntax.cache_get_stats(self.ptr)
+        level_stats = [CacheLevelStats(**level) for level in levels]
+        while level_stats and not any(vars(level_stats[-1]).values()):
+            level_stats.pop()
+        return CacheStats(**totals, levels=tuple(level_stats))
+
+    def reset_stats(self) -> None:
+        """Resets the hit, miss and eviction counters."""
+        libisyntax.cache_reset_stats(self.ptr)
+
+    def resize(self, cache_size: int | None, max_bytes: int | None = None) -> None:
+        """Changes the limits of the cache, evicting tiles if needed.
+
+        Args:
+            cache_size: Maximum number of tiles to keep in the cache, or None for no limit.
+            max_bytes: Maximum memory (in bytes) to use for the cached coefficients, or
+                None for no limit.
+        """
+        libisyntax.cache_resize(
+            self.ptr,
+            _INT32_MAX if cache_size is None else cache_size,
+            0 if max_bytes is None else max_bytes,
+        )
+        self.cache_size = cache_size
+        self.max_bytes = max_bytes
+
+    def clear(self) -> None:
+        """Evicts all tiles, except for those that are being read by other threads."""
+        libisyntax.cache_clear(self.ptr)
+
     def destroy(self) -> None:
         libisyntax.cache_destroy(self.ptr)
         self.destroyed = True
@@ -88,61 +465,355 @@ class ISyntaxImage:
 
 
 class ISyntax:
-    def __init__(self, f: RawIOBase | BufferedIOBase, n_bytes: int, cache_size: int = 2000) -> None:
+    """An open iSyntax slide.
+
+    Pixel data may be read concurrently from multiple threads (e.g. with a
+    `concurrent.futures.ThreadPoolExecutor`) using the same instance: codeblocks are
+    read from the underlying IO object with positional reads, and the tile cache is
+    shared safely between threads. The instance must not be closed while reads are
+    still in progress.
+
+    Slides can be used from worker processes (e.g. PyTorch `DataLoader` workers). In a
+    forked child, a slide is reopened the first time it is used, with a new tile cache,
+    so nothing is shared with the parent. Slides opened with `ISyntax.open` are reopened
+    from their path, and can also be pickled, in which case they are reopened in the
+    process that unpickles them. Other slides are reopened from the same IO object,
+    whose file position is then shared with the parent unless the "native" or "mmap"
+    I/O backend is used.
+    """
+
+    def __init__(
+        self,
+        f: RawIOBase | BufferedIOBase,
+        n_bytes: int,
+        cache_size: int = 2000,
+        io: IOBackendName = "python",
+        cache: ISyntaxCache | None = None,
+        index: "Buffer | None" = None,
+    ) -> None:
+        """Opens an iSyntax image from an IO object.
+
+        Args:
+            f: Readable IO object containing the iSyntax data.
+            n_bytes: Size of the iSyntax data (in bytes).
+            cache_size: Maximum number of tiles to keep in the tile cache.
+            io: How image data is read from `f`. With "python" (the default), all reads
+                go through the IO object's `seek` and `readinto` methods, so any
+                file-like object can be used. With "native", reads are made directly
+                from the IO object's file descriptor in C, which avoids calling back
+                into Python for every codeblock.
+                With "mmap", the file is mapped into memory once and reads are copied
+                straight out of the mapping, without any system calls. The file must
+                not be truncated while it is open.
+            cache: Tile cache to use, which may be shared with other slides. Defaults to
+                the global cache (see `ISyntaxCache.set_global`) if one is set, and to
+                a new cache of `cache_size` tiles otherwise.
+            index: Optional index of the slide from `save_index`. The XML header is
+                then not parsed, unless the index does not match the slide, or was
+                saved by an incompatible version of pyisyntax.
+        """
         # Start in the "closed" for a graceful contextmanager exit when the file
         # fails to open.
         self.closed = True
-        self.io_handle = register_io(f, n_bytes)
-        self.ptr = libisyntax.open_from_registered_handle(self.io_handle, is_init_allocators=False)
+        self._f = f
+        self._n_bytes = n_bytes
+        self._io = io
+        # Set by `open`, so that the slide can be reopened from its path.
+        self._filename: Path | None = None
+        self._index_path: Path | None = None
+        self._ptr: libisyntax.ISyntaxPtr | None = None
+        self._open_handle(index)
+        self._generation = _fork_generation
         self.closed = False
         self._cache_size = cache_size
-        self._cache: ISyntaxCache | None = None
+        self._cache = cache if cache is not None else ISyntaxCache.get_global()
+        self._is_cache_injected = False
+        self._cache_lock = threading.Lock()
+
+    def _open_handle(self, index: "Buffer | None") -> None:
+        """Opens the slide from `self._f`, from its index if one is given and valid."""
+        self.io_handle = register_io(self._f, self._n_bytes, _io_backend_from_name(self._io))
+        #: Whether the slide was opened from an index rather than its header.
+        self.is_opened_from_index = False
+        ptr = None
+        if index is not None:
+            try:
+                ptr = libisyntax.open_from_index(
+                    self.io_handle,
+                    index,
+                    is_init_allocators=False,
+                )
+                self.is_opened_from_index = True
+            except libisyntax.LibISyntaxInvalidArgumentError:
+                pass
+        if ptr is None:
+            ptr = libisyntax.open_from_registered_handle(
+                self.io_handle,
+                is_init_allocators=False,
+            )
+        self._ptr = ptr
+        self._wsi = ISyntaxImage(libisyntax.get_wsi_image(ptr))
+        self._metadata = SlideMetadata.read(ptr)
 
     @classmethod
-    def open(cls: type["ISyntax"], filename: str | Path, cache_size: int = 2000) -> "ISyntax":
+    def open(
+        cls: type["ISyntax"],
+        filename: str | Path,
+        cache_size: int = 2000,
+        io: IOBackendName = "python",
+        cache: ISyntaxCache | None = None,
+        index_path: str | Path | None = None,
+    ) -> "ISyntax":
+        """Opens an iSyntax file from the local file system.
+
+        Args:
+            filename: Path to the iSyntax file.
+            cache_size: Maximum number of tiles to keep in the tile cache.
+            io: I/O backend, see `ISyntax.__init__`. Use "native" to read codeblocks
+                straight from the file descriptor without going through Python, or
+                "mmap" to read them from a memory mapping of the file.
+            cache: Tile cache to use, see `ISyntax.__init__`.
+            index_path: Optional path of an index sidecar file (see `save_index`). If
+                it exists, the slide is opened from it without parsing the XML header.
+                Otherwise, or if it is out of date, the header is parsed and the index
+                is (re)written.
+        """
         filename = Path(filename)
         f = filename.open("rb")
         n_bytes = os.fstat(f.fileno()).st_size
-        return cls(f, n_bytes, cache_size)
+        if index_path is None:
+            isyntax = cls(f, n_bytes, cache_size, io, cache)
+            isyntax._filename = filename
+            return isyntax
+        index_path = Path(index_path)
+        with _map_index(index_path, filename) as index:
+            isyntax = cls(f, n_bytes, cache_size, io, cache, index)
+        isyntax._filename = filename
+        isyntax._index_path = index_path
+        if not isyntax.is_opened_from_index:
+            try:
+                isyntax.save_index(index_path)
+            except BaseException:
+                isyntax.close()
+                raise
+        return isyntax
+
+    def save_index(self, path: str | Path) -> None:
+        """Saves the parsed XML header and seektable of the slide to an index file.
+
+        Reopening the slide from the index (see `ISyntax.open`) skips parsing the
+        header, which is most of the work of opening a slide. The index is specific to
+        the slide and to the version of pyisyntax that saved it.
+
+        Args:
+            path: Path of the index file. It is replaced atomically if it exists.
+        """
+        index = libisyntax.write_index(self.ptr)
+        with _open_atomic(Path(path)) as f:
+            f.write(index)
 
     def close(self) -> None:
         if self.closed:
             return
-        libisyntax.close(self.ptr)
+        if self._generation != _fork_generation:
+            # Opened by a parent process (or not at all, if unpickled).
+            self._discard_inherited()
+        else:
+            if self._cache is not None and self._is_cache_injected:
+                # The cache may outlive this slide if it is shared.
+                self._cache.release(self)
+            libisyntax.close(self.ptr)
+            # Later reads raise an error instead of using the freed slide.
+            self._ptr = None
+            del self._wsi
         self._cache = None
         self.closed = True
 
+    @property
+    def ptr(self) -> libisyntax.ISyntaxPtr:
+        """Pointer to the underlying libisyntax slide.
+
+        The slide is reopened first if it was opened by a parent process or unpickled.
+        """
+        if self._generation != _fork_generation:
+            self._reopen()
+        if self._ptr is None:
+            msg = "slide is closed"
+            raise ValueError(msg)
+        return self._ptr
+
+    def _discard_inherited(self) -> None:
+        """Drops the slide that was opened by a parent process, without using it."""
+        if self._ptr is None:
+            return
+        # The C slide and its tile cache may be in an inconsistent state (e.g. locked
+        # by a thread that was not copied), so their memory is not freed.
+        self._ptr = None
+        with contextlib.suppress(IndexError):
+            sized_io = unregister_io(self.io_handle)
+            if self._filename is not None:
+                sized_io.f.close()
+
+    def _reopen(self) -> None:
+        with _reopen_lock:
+            if self._generation == _fork_generation:
+                return
+            if self.closed:
+                msg = "slide is closed"
+                raise ValueError(msg)
+            self._discard_inherited()
+            if self._filename is None:
+                self._open_handle(None)
+            else:
+                self._f = self._filename.open("rb")
+                try:
+                    self._n_bytes = os.fstat(self._f.fileno()).st_size
+                    if self._index_path is None:
+                        self._open_handle(None)
+                    else:
+                        with _map_index(self._index_path, self._filename) as index:
+                            self._open_handle(index)
+                except BaseException:
+                    self._f.close()
+                    raise
+            self._is_cache_injected = False
+            self._cache_lock = threading.Lock()
+            self._generation = _fork_generation
+
+    def __getstate__(self) -> dict[str, Any]:
+        if self._filename is None:
+            msg = "only slides opened with ISyntax.open() can be pickled"
+            raise TypeError(msg)
+        if self.closed:
+            msg = "cannot pickle a closed slide"
+            raise ValueError(msg)
+        return {
+            "filename": self._filename,
+            "index_path": self._index_path,
+            "cache_size": self._cache_size,
+            "io": self._io,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        # The slide is opened on first use, so that unpickling is cheap. Tile caches
+        # are not pickled; the global cache is used if one is set.
+        self._filename = state["filename"]
+        self._index_path = state["index_path"]
+        self._cache_size = state["cache_size"]
+        self._io = state["io"]
+        self._ptr = None
+        self._generation = -1
+        self.is_opened_from_index = False
+        self._cache = ISyntaxCache.get_global()
+        self._is_cache_injected = False
+        self._cache_lock = threading.Lock()
+        self.closed = False
+
     @property
     def tile_width(self) -> int:
-        return libisyntax.get_tile_width(self.ptr)
+        return self.metadata.tile_size[0]
 
     @property
     def tile_height(self) -> int:
-        return libisyntax.get_tile_height(self.ptr)
+        return self.metadata.tile_size[1]
+
+    def tile_offset(self, level: int) -> int:
+        """Gets the offset of the tile grid of a level from the origin of the level.
+
+        Levels are padded by libisyntax, so tile (tile_x, tile_y) covers the pixels of
+        the level from (tile_x * tile_width - offset, tile_y * tile_height - offset).
+
+        Args:
+            level: Level number.
+
+        Returns:
+            The offset, in pixels of the level.
+        """
+        return ((_PER_LEVEL_PADDING << self.level_count) - _PER_LEVEL_PADDING) >> level
 
     @property
     def wsi(self) -> ISyntaxImage:
-        return ISyntaxImage(libisyntax.get_wsi_image(self.ptr))
+        # Make sure that the slide is open in this process.
+        _ = self.ptr
+        return self._wsi
+
+    @property
+    def metadata(self) -> SlideMetadata:
+        """Metadata of the slide, which is read from the C library when it is opened."""
+        # Make sure that the slide is open in this process.
+        _ = self.ptr
+        return self._metadata
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Identifier of the slide's contents, which keys its tiles in a `DiskTileCache`.
+
+        It is derived from the size of the file and the data at its start and end (which
+        includes the header), so it does not depend on the file's name or location and
+        is cheap to compute.
+        """
+        # Make sure that the slide is open in this process.
+        _ = self.ptr
+        sized_io = get_registered_io(self.io_handle)
+        n_bytes = sized_io.n_bytes
+        digest = hashlib.blake2b(n_bytes.to_bytes(8, "little"), digest_size=16)
+        head_size = min(_FINGERPRINT_HEAD_BYTES, n_bytes)
+        tail_size = min(_FINGERPRINT_TAIL_BYTES, n_bytes)
+        for offset, size in ((0, head_size), (n_bytes - tail_size, tail_size)):
+            buf = bytearray(size)
+            n_read = 0
+            while n_read < size:
+                n = sized_io.read_at_offset(memoryview(buf)[n_read:], offset + n_read)
+                if not n:
+                    break
+                n_read += n
+            digest.update(memoryview(buf)[:n_read])
+        return digest.hexdigest()
 
     def get_cache(self) -> ISyntaxCache:
-        if self._cache is None:
-            self._cache = ISyntaxCache(cache_size=self._cache_size)
-            self._cache.inject(self)
-        return self._cache
+        with self._cache_lock:
+            if self._cache is None:
+                self._cache = ISyntaxCache(cache_size=self._cache_size)
+            if not self._is_cache_injected:
+                self._cache.inject(self)
+                self._is_cache_injected = True
+            return self._cache
 
-    def read_tile(self, tile_x: int, tile_y: int, level: int = 0) -> np.ndarray:
-        """Reads RGBA pixel data from the specified tile.
+    def read_tile(
+        self,
+        tile_x: int,
+        tile_y: int,
+        level: int = 0,
+        out: "np.ndarray | Buffer | None" = None,
+        pixel_format: PixelFormatName = "RGBA",
+    ) -> np.ndarray:
+        """Reads pixel data from the specified tile.
+
+        The GIL is released while the tile is decoded, so reading from multiple threads
+        scales with the number of cores.
 
         Args:
             tile_x: Tile column.
             tile_y: Tile row.
             level: Level number. Defaults to 0.
+            out: Optional writable, C-contiguous uint8 buffer (e.g. a numpy array or a
+                memoryview of shared memory) with shape [tile_height, tile_width, C] to
+                decode the pixel data into.
+            pixel_format: Channel order of the pixel data, one of "RGBA" (the default),
+                "BGRA", "RGB" or "BGR". The 3-channel formats are packed while decoding.
 
         Returns:
-            Region RGBA pixel data in a [tile_height, tile_width, 4] array.
+            Tile pixel data in a [tile_height, tile_width, C] array, where C is the
+            number of channels in `pixel_format`. If `out` was given, the array shares
+            its memory.
         """
+        fmt = _pixel_format_from_name(pixel_format)
         cache = self.get_cache()
-        buf = np.empty((self.tile_height, self.tile_width, 4), dtype=np.uint8)
+        buf = _output_array(out, (self.tile_height, self.tile_width, fmt.channel_count))
+        if cache.disk_cache is not None:
+            coords = np.array([[tile_x, tile_y]], dtype=np.int64)
+            self._read_tiles_through_disk_cache(cache, coords, level, buf[np.newaxis], fmt)
+            return buf
         libisyntax.tile_read(
             self.ptr,
             cache.ptr,
@@ -150,12 +821,341 @@ class ISyntax:
             tile_x,
             tile_y,
             buf.data,
-            libisyntax.ISyntaxPixelFormat.RGBA,
+            fmt,
+        )
+        return buf
+
+    def read_tiles(
+        self,
+        coords: Iterable[tuple[int, int]] | np.ndarray,
+        level: int = 0,
+        out: "np.ndarray | Buffer | None" = None,
+        pixel_format: PixelFormatName = "RGBA",
+    ) -> np.ndarray:
+        """Reads pixel data from multiple tiles of the same level.
+
+        The tiles are decoded in parallel by libisyntax's worker threads, with the GIL
+        released. Tiles that share parent tiles are decoded together so that the shared
+        work is done once, and a tile that is requested more than once is only decoded
+        once.
+
+        Args:
+            coords: (tile_x, tile_y) pairs, as a sequence or an [N, 2] integer array.
+            level: Level number. Defaults to 0.
+            out: Optional writable, C-contiguous uint8 buffer with shape
+                [N, tile_height, tile_width, C] to decode the pixel data into.
+            pixel_format: Channel order of the pixel data, see `read_tile`.
+
+        Returns:
+            Tile pixel data in a [N, tile_height, tile_width, C] array. If `out` was given,
+            the array shares its memory.
+        """
+        fmt = _pixel_format_from_name(pixel_format)
+        tile_coords = np.asarray(coords, dtype=np.int64)
+        if tile_coords.size == 0:
+            tile_coords = tile_coords.reshape(0, 2)
+        if tile_coords.ndim != 2 or tile_coords.shape[1] != 2:  # noqa: PLR2004
+            msg = f"coords must be (tile_x, tile_y) pairs, got shape {tile_coords.shape}"
+            raise ValueError(msg)
+        tile_coords = np.ascontiguousarray(tile_coords)
+        tile_count = len(tile_coords)
+        buf = _output_array(out, (tile_count, self.tile_height, self.tile_width, fmt.channel_count))
+        if tile_count == 0:
+            return buf
+        cache = self.get_cache()
+        if cache.disk_cache is not None:
+            self._read_tiles_through_disk_cache(cache, tile_coords, level, buf, fmt)
+            return buf
+        libisyntax.read_tiles(
+            self.ptr,
+            cache.ptr,
+            level,
+            tile_coords.data,
+            tile_count,
+            buf.data,
+            fmt,
         )
         return buf
 
-    def read_region(self, x: int, y: int, width: int, height: int, level: int = 0) -> np.ndarray:
-        """Reads RGBA pixel data from the specified region.
+    def _read_tiles_through_disk_cache(
+        self,
+        cache: ISyntaxCache,
+        tile_coords: np.ndarray,
+        level: int,
+        buf: np.ndarray,
+        fmt: libisyntax.ISyntaxPixelFormat,
+    ) -> None:
+        """Reads tiles from the disk cache, decoding (and storing) the ones it lacks."""
+        disk_cache = cache.disk_cache
+        if disk_cache is None:
+            msg = "cache has no disk cache"
+            raise ValueError(msg)
+        fingerprint = self.fingerprint
+        shape = (self.tile_height, self.tile_width, 3)
+        misses = []
+        for i, (tile_x, tile_y) in enumerate(tile_coords.tolist()):
+            rgb = disk_cache.get(fingerprint, level, tile_x, tile_y)
+            if rgb is None or rgb.shape != shape:
+                misses.append(i)
+            else:
+                _convert_from_rgb(rgb, buf[i], fmt)
+        if not misses:
+            return
+        miss_coords = np.ascontiguousarray(tile_coords[misses])
+        decoded = np.empty((len(misses), *shape), dtype=np.uint8)
+        libisyntax.read_tiles(
+            self.ptr,
+            cache.ptr,
+            level,
+            miss_coords.data,
+            len(misses),
+            decoded.data,
+            libisyntax.ISyntaxPixelFormat.RGB,
+        )
+        stored = set()
+        for i, (tile_x, tile_y), rgb in zip(misses, miss_coords.tolist(), decoded, strict=True):
+            # Tiles that are not in the file are plain white, which is cheaper to
+            # produce than to load.
+            if (tile_x, tile_y) not in stored and self.tile_exists(tile_x, tile_y, level):
+                disk_cache.put(fingerprint, level, tile_x, tile_y, rgb)
+                stored.add((tile_x, tile_y))
+            _convert_from_rgb(rgb, buf[i], fmt)
+
+    def tile_exists(self, tile_x: int, tile_y: int, level: int = 0) -> bool:
+        """Checks whether a tile is stored in the file.
+
+        iSyntax files do not store tiles that only contain background. Those tiles (and
+        tiles outside of the level) are read as plain white.
+
+        Args:
+            tile_x: Tile column.
+            tile_y: Tile row.
+            level: Level number. Defaults to 0.
+
+        Returns:
+            True if the tile is stored in the file.
+        """
+        return libisyntax.tile_exists(self.ptr, level, tile_x, tile_y)
+
+    def tile_mask(self, level: int = 0) -> np.ndarray:
+        """Gets the tiles of a level that are stored in the file.
+
+        This only looks at the file header, so no pixel data is decoded.
+
+        Args:
+            level: Level number. Defaults to 0.
+
+        Returns:
+            A [height_in_tiles, width_in_tiles] boolean array which is True for the tiles
+            that are stored in the file (see `tile_exists`).
+        """
+        width_in_tiles, height_in_tiles = self.level_tiles[level]
+        mask = np.empty((height_in_tiles, width_in_tiles), dtype=np.bool_)
+        libisyntax.get_tile_mask(self.ptr, level, mask.data)
+        return mask
+
+    def iter_tiles(
+        self,
+        level: int = 0,
+        region: tuple[int, int, int, int] | None = None,
+        order: TileOrder = "row-major",
+        prefetch: int = 8,
+        pixel_format: PixelFormatName = "RGBA",
+        skip_empty: bool = False,  # noqa: FBT001, FBT002
+    ) -> Generator[tuple[int, int, np.ndarray], None, None]:
+        """Iterates over the tiles of a level, decoding ahead of the consumer.
+
+        Up to `prefetch` tiles are decoded in the background while the caller works on
+        the current one. Tiles are decoded into a fixed ring of `prefetch + 1` buffers,
+        so memory use does not grow with the size of the level. As a consequence, each
+        yielded array is only valid until the iterator is advanced; copy it to keep it.
+
+        Args:
+            level: Level number. Defaults to 0.
+            region: Optional (tile_x, tile_y, width, height) rectangle of tiles to
+                iterate over. Defaults to the whole level.
+            order: "row-major" (the default) or "hilbert". Hilbert order keeps
+                consecutive tiles close together, which makes better use of the tile
+                cache.
+            prefetch: Number of tiles to decode ahead of the consumer.
+            pixel_format: Channel order of the pixel data, see `read_tile`.
+            skip_empty: Whether to skip tiles that are not stored in the file (see
+                `tile_exists`), which would be read as plain white.
+
+        Yields:
+            (tile_x, tile_y, pixels) tuples, where pixels is a
+            [tile_height, tile_width, C] array.
+        """
+        if prefetch < 1:
+            msg = f"prefetch must be at least 1, got {prefetch}"
+            raise ValueError(msg)
+        if order not in ("row-major", "hilbert"):
+            msg = f"unknown tile order: {order!r}"
+            raise ValueError(msg)
+        fmt = _pixel_format_from_name(pixel_format)
+        if region is None:
+            region = (0, 0, *self.level_tiles[level])
+        start_x, start_y, width, height = region
+        ys, xs = np.mgrid[start_y : start_y + height, start_x : start_x + width]
+        coords = np.stack([xs.ravel(), ys.ravel()], axis=1)
+        if order == "hilbert":
+            origin = np.array([start_x, start_y])
+            coords = _hilbert_sort(coords - origin) + origin
+        if skip_empty:
+            mask = self.tile_mask(level)
+            xs, ys = coords[:, 0], coords[:, 1]
+            inside = (xs >= 0) & (xs < mask.shape[1]) & (ys >= 0) & (ys < mask.shape[0])
+            exists = np.zeros(len(coords), dtype=np.bool_)
+            exists[inside] = mask[ys[inside], xs[inside]]
+            coords = coords[exists]
+
+        shape = (self.tile_height, self.tile_width, fmt.channel_count)
+        ring = [np.empty(shape, dtype=np.uint8) for _ in range(prefetch + 1)]
+        workers = min(prefetch, os.cpu_count() or 1)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="isyntax-prefetch")
+        pending: deque[tuple[int, int, Future[np.ndarray]]] = deque()
+        try:
+            for i, (x, y) in enumerate(coords.tolist()):
+                # The slot written here was yielded prefetch + 1 tiles ago, so the
+                # consumer has moved on from it.
+                buf = ring[i % len(ring)]
+                future = executor.submit(self.read_tile, x, y, level, buf, pixel_format)
+                pending.append((x, y, future))
+                if len(pending) > prefetch:
+                    tile_x, tile_y, future = pending.popleft()
+                    yield tile_x, tile_y, future.result()
+            while pending:
+                tile_x, tile_y, future = pending.popleft()
+                yield tile_x, tile_y, future.result()
+        finally:
+            # Also reached when the consumer stops early. Tiles that are being decoded
+            # still write into the ring, so wait for them.
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _read_tile_row(
+        self,
+        level: int,
+        row: int,
+        cols: np.ndarray,
+        pixel_format: PixelFormatName,
+        mask: np.ndarray | None,
+    ) -> np.ndarray:
+        """Decodes a row of tiles into a [tile_height, len(cols) * tile_width, C] array."""
+        channel_count = _pixel_format_from_name(pixel_format).channel_count
+        tiles = np.full(
+            (len(cols), self.tile_height, self.tile_width, channel_count), 255, dtype=np.uint8
+        )
+        stored = np.ones(len(cols), dtype=np.bool_) if mask is None else mask[row, cols]
+        if stored.all():
+            coords = np.stack([cols, np.full_like(cols, row)], axis=1)
+            self.read_tiles(coords, level, tiles, pixel_format)
+        elif stored.any():
+            coords = np.stack([cols[stored], np.full_like(cols[stored], row)], axis=1)
+            tiles[stored] = self.read_tiles(coords, level, pixel_format=pixel_format)
+        strip = tiles.transpose(1, 0, 2, 3)
+        return strip.reshape(self.tile_height, len(cols) * self.tile_width, channel_count)
+
+    def iter_strips(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        level: int = 0,
+        pixel_format: PixelFormatName = "RGBA",
+        skip_empty: bool = False,  # noqa: FBT001, FBT002
+    ) -> Generator[tuple[int, np.ndarray], None, None]:
+        """Iterates over a region of a level in strips of `tile_height` rows.
+
+        Strips start at the top of the region, whereas the tile grid is offset by
+        `tile_offset`, so each strip is cut from two rows of tiles. Rows of tiles are
+        decoded once each, in order, with `read_tiles` on a background thread, a couple
+        of rows ahead of the consumer, and dropped once they have been used. Memory use
+        therefore depends on the width of the region but not on its height.
+
+        Args:
+            x: Left edge position of the region in the target level reference frame.
+            y: Top edge position of the region in the target level reference frame.
+            width: Width of the region.
+            height: Height of the region.
+            level: Level number. Defaults to 0.
+            pixel_format: Channel order of the pixel data, see `read_tile`.
+            skip_empty: Whether to skip decoding tiles that are not stored in the file
+                (see `tile_exists`). They are read as plain white either way.
+
+        Yields:
+            (top, pixels) tuples, where top is the y position of the strip and pixels is
+            a [strip_height, width, C] array. Strips are `tile_height` rows high, except
+            for the last one.
+        """
+        offset = self.tile_offset(level)
+        tile_width, tile_height = self.tile_width, self.tile_height
+        cols_in_level, rows_in_level = self.level_tiles[level]
+        first_col = max((x + offset) // tile_width, 0)
+        last_col = min((x + width - 1 + offset) // tile_width, cols_in_level - 1)
+        first_row = max((y + offset) // tile_height, 0)
+        last_row = min((y + height - 1 + offset) // tile_height, rows_in_level - 1)
+        cols = np.arange(first_col, last_col + 1)
+        mask = self.tile_mask(level) if skip_empty else None
+        # Left edge of the rows of tiles, in the reference frame of the level.
+        tiles_left = first_col * tile_width - offset
+        left, right = max(x, tiles_left), min(x + width, tiles_left + len(cols) * tile_width)
+        channel_count = _pixel_format_from_name(pixel_format).channel_count
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="isyntax-prefetch")
+        pending: deque[tuple[int, Future[np.ndarray]]] = deque()
+        decoded: dict[int, np.ndarray] = {}
+        next_row = first_row
+
+        def get_tile_row(row: int) -> np.ndarray:
+            nonlocal next_row
+            while row not in decoded:
+                while next_row <= last_row and len(pending) <= _PREFETCH_TILE_ROWS:
+                    future = executor.submit(
+                        self._read_tile_row, level, next_row, cols, pixel_format, mask
+                    )
+                    pending.append((next_row, future))
+                    next_row += 1
+                decoded_row, future = pending.popleft()
+                decoded[decoded_row] = future.result()
+            return decoded[row]
+
+        try:
+            for top in range(y, y + height, tile_height):
+                bottom = min(top + tile_height, y + height)
+                strip = np.full((bottom - top, width, channel_count), 255, dtype=np.uint8)
+                rows = range(
+                    max((top + offset) // tile_height, first_row),
+                    min((bottom - 1 + offset) // tile_height, last_row) + 1,
+                )
+                for row in [row for row in decoded if row < rows.start]:
+                    del decoded[row]
+                for row in rows:
+                    tiles = get_tile_row(row)
+                    tiles_top = row * tile_height - offset
+                    strip_top = max(top, tiles_top)
+                    strip_bottom = min(bottom, tiles_top + tile_height)
+                    strip[strip_top - top : strip_bottom - top, left - x : right - x] = tiles[
+                        strip_top - tiles_top : strip_bottom - tiles_top,
+                        left - tiles_left : right - tiles_left,
+                    ]
+                yield top, strip
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def read_region(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        level: int = 0,
+        out: "np.ndarray | Buffer | None" = None,
+        pixel_format: PixelFormatName = "RGBA",
+    ) -> np.ndarray:
+        """Reads pixel data from the specified region.
+
+        The GIL is released while the region is decoded.
 
         Args:
             x: Left edge position of the region in the target level reference frame.
@@ -163,12 +1163,17 @@ class ISyntax:
             width: Width of the region.
             height: Height of the region.
             level: Level number. Defaults to 0.
+            out: Optional writable, C-contiguous uint8 buffer with shape
+                [height, width, C] to decode the pixel data into.
+            pixel_format: Channel order of the pixel data, see `read_tile`.
 
         Returns:
-            Region RGBA pixel data in a [height, width, 4] array.
+            Region pixel data in a [height, width, C] array. If `out` was given, the array
+            shares its memory.
         """
+        fmt = _pixel_format_from_name(pixel_format)
         cache = self.get_cache()
-        buf = np.empty((height, width, 4), dtype=np.uint8)
+        buf = _output_array(out, (height, width, fmt.channel_count))
         libisyntax.read_region(
             self.ptr,
             cache.ptr,
@@ -178,10 +1183,167 @@ class ISyntax:
             width,
             height,
             buf.data,
-            libisyntax.ISyntaxPixelFormat.RGBA,
+            fmt,
+        )
+        return buf
+
+    def read_region_scaled(
+        self,
+        x: float,
+        y: float,
+        width: float,
+        height: float,
+        out_size: tuple[int, int],
+        out: "np.ndarray | Buffer | None" = None,
+        pixel_format: PixelFormatName = "RGBA",
+        level: int | None = None,
+    ) -> np.ndarray:
+        """Reads pixel data from a region of level 0, resampled to a given size.
+
+        The region is read from the coarsest level that is at least as fine as the
+        output, and resampled by area averaging while it is being decoded, so it is
+        never held in memory at its full resolution. The GIL is released while the
+        region is decoded.
+
+        Args:
+            x: Left edge position of the region in the level 0 reference frame.
+            y: Top edge position of the region in the level 0 reference frame.
+            width: Width of the region in level 0 pixels.
+            height: Height of the region in level 0 pixels.
+            out_size: (width, height) of the output.
+            out: Optional writable, C-contiguous uint8 buffer with shape
+                [out_height, out_width, C] to write the pixel data into.
+            pixel_format: Channel order of the pixel data, see `read_tile`.
+            level: Level to read from. Defaults to the coarsest level that is at least
+                as fine as the output.
+
+        Returns:
+            Pixel data in a [out_height, out_width, C] array. If `out` was given, the
+            array shares its memory.
+        """
+        out_width, out_height = out_size
+        if width <= 0 or height <= 0 or out_width <= 0 or out_height <= 0:
+            msg = f"region and output sizes must be positive, got {width}x{height} and {out_size}"
+            raise ValueError(msg)
+        downsamples = self.level_downsamples
+        if level is None:
+            downsample = min(width / out_width, height / out_height)
+            # Upsampling (downsample < 1) reads from level 0.
+            level = sum(1 for d in downsamples[1:] if d <= downsample)
+        elif not 0 <= level < len(downsamples):
+            msg = f"level must be between 0 and {len(downsamples) - 1}, got {level}"
+            raise ValueError(msg)
+        fmt = _pixel_format_from_name(pixel_format)
+        cache = self.get_cache()
+        buf = _output_array(out, (out_height, out_width, fmt.channel_count))
+        level_downsample = downsamples[level]
+        libisyntax.read_region_scaled(
+            self.ptr,
+            cache.ptr,
+            level,
+            x / level_downsample,
+            y / level_downsample,
+            width / level_downsample,
+            height / level_downsample,
+            out_width,
+            out_height,
+            buf.data,
+            fmt,
         )
         return buf
 
+    def get_thumbnail(
+        self,
+        max_size: int | np.integer | tuple[int, int],
+        pixel_format: PixelFormatName = "RGB",
+        use_cache: bool = False,  # noqa: FBT001, FBT002
+    ) -> np.ndarray:
+        """Gets a thumbnail of the whole slide.
+
+        The thumbnail is read with `read_region_scaled`, so only the coarsest level that
+        is at least as fine as the thumbnail is decoded (for small thumbnails, that is
+        the top level, which takes a handful of tiles).
+
+        Args:
+            max_size: Maximum width and height of the thumbnail, as a single number or a
+                (width, height) pair. The thumbnail keeps the aspect ratio of the slide,
+                and is never larger than level 0.
+            pixel_format: Channel order of the pixel data, see `read_tile`.
+            use_cache: Whether to keep the thumbnail in a file next to the slide's
+                index sidecar (see `ISyntax.open`), which is reused for as long as it is
+                newer than the slide. Requires the slide to be opened with an
+                `index_path`.
+
+        Returns:
+            Pixel data in a [height, width, C] array.
+        """
+        if isinstance(max_size, int | np.integer):
+            max_width = max_height = int(max_size)
+        else:
+            max_width, max_height = max_size
+        width, height = self.dimensions
+        scale = min(max_width / width, max_height / height, 1.0)
+        out_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        region = (0, 0, width, height)
+        if not use_cache:
+            return self.read_region_scaled(*region, out_size, pixel_format=pixel_format)
+
+        if self._index_path is None or self._filename is None:
+            msg = "caching thumbnails requires a slide opened with an index_path"
+            raise ValueError(msg)
+        cache_path = self._index_path.with_name(
+            f"{self._index_path.name}.thumbnail-{out_size[0]}x{out_size[1]}-{pixel_format}.npy"
+        )
+        try:
+            if cache_path.stat().st_mtime_ns >= self._filename.stat().st_mtime_ns:
+                thumbnail = np.load(cache_path, allow_pickle=False)
+                channel_count = _pixel_format_from_name(pixel_format).channel_count
+                if thumbnail.shape == (out_size[1], out_size[0], channel_count):
+                    return thumbnail
+        except (OSError, ValueError):
+            # Missing or unreadable, so it is (re)written below.
+            pass
+        thumbnail = self.read_region_scaled(
+            0, 0, width, height, out_size, pixel_format=pixel_format
+        )
+        with _open_atomic(cache_path) as f:
+            np.save(f, thumbnail, allow_pickle=False)
+        return thumbnail
+
+    def export_tiff(
+        self,
+        path: str | Path,
+        levels: Sequence[int] | None = None,
+        region: tuple[int, int, int, int] | None = None,
+        compression: "TiffCompression" = "jpeg",
+        quality: int = 90,
+        workers: int | None = None,
+    ) -> None:
+        """Exports levels of the slide to a pyramidal tiled TIFF or OME-TIFF file.
+
+        See `isyntax.tiff.export_tiff` for the arguments. Requires tifffile (and
+        imagecodecs for the "jpeg" and "zstd" compressions).
+        """
+        from isyntax.tiff import export_tiff
+
+        export_tiff(self, path, levels, region, compression, quality, workers)
+
+    def to_zarr(
+        self,
+        store: Any,  # noqa: ANN401
+        levels: Sequence[int] | None = None,
+        chunk: tuple[int, int] | None = None,
+        workers: int | None = None,
+        overwrite: bool = False,  # noqa: FBT001, FBT002
+    ) -> Any:  # noqa: ANN401
+        """Exports levels of the slide to a Zarr store as an OME-NGFF multiscale image.
+
+        See `isyntax.ngff.to_zarr` for the arguments. Requires zarr.
+        """
+        from isyntax.ngff import to_zarr
+
+        return to_zarr(self, store, levels, chunk, workers, overwrite)
+
     def read_label_image_jpeg(self) -> memoryview | None:
         """Reads the associated label image as a JPEG-compressed image.
 
@@ -206,7 +1368,7 @@ class ISyntax:
 
     @property
     def barcode(self) -> str:
-        return libisyntax.get_barcode(self.ptr).decode("ascii")
+        return self.metadata.barcode
 
     def read_icc_profile(self) -> memoryview | None:
         """Reads the ICC color profile for an image.
@@ -221,44 +1383,41 @@ class ISyntax:
 
     @property
     def level_count(self) -> int:
-        return self.wsi.level_count
+        return self.metadata.level_count
 
     @property
     def dimensions(self) -> tuple[int, int]:
-        level0 = self.wsi.get_level(0)
-        return (level0.width, level0.height)
+        return self.metadata.dimensions
 
     @property
     def level_dimensions(self) -> list[tuple[int, int]]:
-        return [(level.width, level.height) for level in self.wsi.levels]
+        return list(map(tuple, self.metadata.level_dimensions.tolist()))
 
     @property
     def level_downsamples(self) -> list[int]:
-        return [1 << level.scale for level in self.wsi.levels]
+        return self.metadata.level_downsamples.tolist()
 
     @property
     def level_tiles(self) -> list[tuple[int, int]]:
-        return [(level.width_in_tiles, level.height_in_tiles) for level in self.wsi.levels]
+        return list(map(tuple, self.metadata.level_tiles.tolist()))
 
     @property
     def mpp_x(self) -> float:
-        level0 = self.wsi.get_level(0)
-        return level0.mpp_x
+        return self.metadata.mpp_x
 
     @property
     def mpp_y(self) -> float:
-        level0 = self.wsi.get_level(0)
-        return level0.mpp_y
+        return self.metadata.mpp_y
 
     @property
     def offset_x(self) -> int:
         """X-offset in pixels of the WSI image origin from the macro image origin."""
-        return self.wsi.offset_x
+        return self.metadata.offset[0]
 
     @property
     def offset_y(self) -> int:
         """Y-offset in pixels of the WSI image origin from the macro image origin."""
-        return self.wsi.offset_y
+        return self.metadata.offset[1]
 
     def __enter__(self) -> "ISyntax":
         return self
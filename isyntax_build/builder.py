@@ -11,6 +11,7 @@ cdef_extra = """
 extern "Python" {
     bool python_file_set_pos(int, int64_t);
     int64_t python_file_read_into(int, void*, size_t);
+    int64_t python_file_read_at_offset(int, void*, size_t, int64_t);
     int64_t python_file_get_size(int);
     void python_file_close(int);
 }
@@ -71,6 +72,9 @@ def create_ffibuilder() -> FFI:
             libisyntax_src / "third_party" / "yxml.c",
             libisyntax_src / "third_party" / "ltalloc.cc",
             src / "python_platform_utils.c",
+            src / "pyisyntax_index.c",
+            src / "pyisyntax_pixels.c",
+            src / "pyisyntax_reader.c",
             *platform_sources,
         ),
         include_dirs=paths_to_strings(
@@ -92,11 +96,17 @@ def create_ffibuilder() -> FFI:
                 continue
             header_lines.append(line)
     header_lines.append("\n")
-    with (src / "python_platform_utils.h").open() as f:
-        for line in f:
-            if line.startswith("#"):
-                continue
-            header_lines.append(line)
+    for header_file in (
+        src / "python_platform_utils.h",
+        src / "pyisyntax_reader.h",
+        src / "pyisyntax_index.h",
+    ):
+        with header_file.open() as f:
+            for line in f:
+                if line.startswith("#"):
+                    continue
+                header_lines.append(line)
+        header_lines.append("\n")
     header_text = "".join(header_lines)
     header_text += "\n\n"
     header_text += cdef_extra
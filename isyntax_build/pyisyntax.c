@@ -1,2 +1,4 @@
 #include <libisyntax.h>
 #include "python_platform_utils.h"
+#include "pyisyntax_reader.h"
+#include "pyisyntax_index.h"
@@ -0,0 +1,317 @@
+/*
+Index files for skipping the XML header parse when a slide is reopened.
+
+libisyntax_open() reads the whole XML header with yxml, decodes the codeblock
+table and builds the per-level tile lookup tables from the seektable. All of
+that only depends on the file's contents, so it is stored here as a flat blob:
+
+  index_header_t
+  isyntax_t, with pointers and runtime state cleared
+  for the WSI image:
+    isyntax_codeblock_t[codeblock_count]
+    isyntax_data_chunk_t[data_chunk_count], with data pointers cleared
+    for each level: index_tile_t[tile_count]
+
+The structs are stored verbatim, so an index is only valid for builds that agree
+on their layout. This is checked when the index is read (along with the size of
+the file), and an index that does not pass is rejected rather than trusted.
+*/
+
+#include "common.h"
+#include "platform.h"
+#include "isyntax.h"
+#include "pyisyntax_index.h"
+
+#define INDEX_MAGIC "PYISXIDX"
+// Bump when the contents of an index change.
+#define INDEX_VERSION 1
+
+typedef struct index_header_t {
+  char magic[8];
+  u32 version;
+  u32 isyntax_size;
+  u32 codeblock_size;
+  u32 data_chunk_size;
+  u32 tile_size;
+  u32 reserved;
+  i64 filesize;
+} index_header_t;
+
+// The parts of isyntax_tile_t that are set by libisyntax_open().
+typedef struct index_tile_t {
+  u32 codeblock_index;
+  u32 codeblock_chunk_index;
+  u32 data_chunk_index;
+  u32 exists;
+} index_tile_t;
+
+static index_header_t make_index_header(i64 filesize) {
+  index_header_t header = {0};
+  memcpy(header.magic, INDEX_MAGIC, sizeof(header.magic));
+  header.version = INDEX_VERSION;
+  header.isyntax_size = sizeof(isyntax_t);
+  header.codeblock_size = sizeof(isyntax_codeblock_t);
+  header.data_chunk_size = sizeof(isyntax_data_chunk_t);
+  header.tile_size = sizeof(index_tile_t);
+  header.filesize = filesize;
+  return header;
+}
+
+// Clears everything in an isyntax_t that is not derived from the file's header.
+static void clear_runtime_state(isyntax_t* isyntax) {
+  isyntax->file_handle = 0;
+  memset(&isyntax->parser, 0, sizeof(isyntax->parser));
+  isyntax->black_dummy_coeff = NULL;
+  isyntax->white_dummy_coeff = NULL;
+  isyntax->ll_coeff_block_allocator = NULL;
+  isyntax->h_coeff_block_allocator = NULL;
+  isyntax->is_block_allocator_owned = false;
+  isyntax->loading_time = 0.0f;
+  isyntax->total_rgb_transform_time = 0.0f;
+  isyntax->cache = NULL;
+  isyntax->work_submission_queue = NULL;
+  isyntax->refcount = 0;
+  for (i32 image_index = 0; image_index < (i32)COUNT(isyntax->images); ++image_index) {
+    isyntax_image_t* image = isyntax->images + image_index;
+    image->codeblocks = NULL;
+    image->data_chunks = NULL;
+    image->first_load_complete = false;
+    image->first_load_in_progress = false;
+    for (i32 scale = 0; scale < (i32)COUNT(image->levels); ++scale) {
+      image->levels[scale].tiles = NULL;
+      image->levels[scale].is_fully_loaded = false;
+    }
+  }
+}
+
+static bool is_wsi_image_valid(const isyntax_t* isyntax) {
+  if (isyntax->wsi_image_index < 0 || isyntax->wsi_image_index >= isyntax->image_count ||
+      isyntax->image_count > (i32)COUNT(isyntax->images)) {
+    return false;
+  }
+  const isyntax_image_t* wsi = isyntax->images + isyntax->wsi_image_index;
+  return wsi->image_type == ISYNTAX_IMAGE_TYPE_WSI && wsi->level_count >= 1 &&
+         wsi->level_count <= (i32)COUNT(wsi->levels) && wsi->codeblock_count >= 0 && wsi->data_chunk_count >= 0;
+}
+
+typedef struct index_writer_t {
+  u8* data;  // NULL to only measure the size.
+  i64 offset;
+} index_writer_t;
+
+static void write_bytes(index_writer_t* writer, const void* source, i64 size) {
+  if (writer->data && size > 0) {
+    memcpy(writer->data + writer->offset, source, size);
+  }
+  writer->offset += size;
+}
+
+static void write_index(const isyntax_t* isyntax, isyntax_t* scratch, index_writer_t* writer) {
+  index_header_t header = make_index_header(isyntax->filesize);
+  write_bytes(writer, &header, sizeof(header));
+
+  *scratch = *isyntax;
+  clear_runtime_state(scratch);
+  write_bytes(writer, scratch, sizeof(*scratch));
+
+  const isyntax_image_t* wsi = isyntax->images + isyntax->wsi_image_index;
+  write_bytes(writer, wsi->codeblocks, (i64)wsi->codeblock_count * sizeof(isyntax_codeblock_t));
+  for (i32 i = 0; i < wsi->data_chunk_count; ++i) {
+    isyntax_data_chunk_t chunk = wsi->data_chunks[i];
+    chunk.data = NULL;
+    write_bytes(writer, &chunk, sizeof(chunk));
+  }
+  for (i32 scale = 0; scale < wsi->level_count; ++scale) {
+    const isyntax_level_t* level = wsi->levels + scale;
+    for (u64 i = 0; i < level->tile_count; ++i) {
+      const isyntax_tile_t* tile = level->tiles + i;
+      index_tile_t entry = {
+          .codeblock_index = tile->codeblock_index,
+          .codeblock_chunk_index = tile->codeblock_chunk_index,
+          .data_chunk_index = tile->data_chunk_index,
+          .exists = tile->exists,
+      };
+      write_bytes(writer, &entry, sizeof(entry));
+    }
+  }
+}
+
+isyntax_error_t pyisyntax_index_write(const isyntax_t* isyntax, uint8_t* out_data_or_null, int64_t* inout_size) {
+  if (!is_wsi_image_valid(isyntax)) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  isyntax_t* scratch = malloc(sizeof(isyntax_t));
+  index_writer_t measure = {0};
+  write_index(isyntax, scratch, &measure);
+  if (out_data_or_null == NULL) {
+    free(scratch);
+    *inout_size = measure.offset;
+    return LIBISYNTAX_OK;
+  }
+  if (*inout_size < measure.offset) {
+    free(scratch);
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  index_writer_t writer = {.data = out_data_or_null};
+  write_index(isyntax, scratch, &writer);
+  free(scratch);
+  *inout_size = writer.offset;
+  return LIBISYNTAX_OK;
+}
+
+typedef struct index_reader_t {
+  const u8* data;
+  i64 size;
+  i64 offset;
+} index_reader_t;
+
+static bool read_bytes(index_reader_t* reader, void* dest, i64 size) {
+  if (size < 0 || reader->size - reader->offset < size) {
+    return false;
+  }
+  if (size > 0) {
+    memcpy(dest, reader->data + reader->offset, size);
+  }
+  reader->offset += size;
+  return true;
+}
+
+// Allocates an array of count elements, which are stored in the remainder of
+// the index with stored_size bytes each, or returns NULL if the index is too
+// short to contain them.
+static void* alloc_for_reading(index_reader_t* reader, i64 count, i64 stored_size, i64 element_size) {
+  if (count < 0 || count > (reader->size - reader->offset) / stored_size) {
+    return NULL;
+  }
+  // Allocate at least one element, so that NULL always means failure.
+  return calloc(MAX(count, 1), element_size);
+}
+
+static bool read_wsi_tables(index_reader_t* reader, isyntax_t* isyntax) {
+  isyntax_image_t* wsi = isyntax->images + isyntax->wsi_image_index;
+
+  wsi->codeblocks = alloc_for_reading(reader, wsi->codeblock_count, sizeof(isyntax_codeblock_t),
+                                      sizeof(isyntax_codeblock_t));
+  if (!wsi->codeblocks ||
+      !read_bytes(reader, wsi->codeblocks, (i64)wsi->codeblock_count * sizeof(isyntax_codeblock_t))) {
+    return false;
+  }
+  wsi->data_chunks = alloc_for_reading(reader, wsi->data_chunk_count, sizeof(isyntax_data_chunk_t),
+                                       sizeof(isyntax_data_chunk_t));
+  if (!wsi->data_chunks ||
+      !read_bytes(reader, wsi->data_chunks, (i64)wsi->data_chunk_count * sizeof(isyntax_data_chunk_t))) {
+    return false;
+  }
+
+  for (i32 scale = 0; scale < wsi->level_count; ++scale) {
+    isyntax_level_t* level = wsi->levels + scale;
+    if ((u64)level->width_in_tiles * (u64)level->height_in_tiles != level->tile_count) {
+      return false;
+    }
+    level->tiles = alloc_for_reading(reader, (i64)level->tile_count, sizeof(index_tile_t), sizeof(isyntax_tile_t));
+    if (!level->tiles) {
+      return false;
+    }
+    for (i32 tile_y = 0; tile_y < level->height_in_tiles; ++tile_y) {
+      for (i32 tile_x = 0; tile_x < level->width_in_tiles; ++tile_x) {
+        index_tile_t entry;
+        if (!read_bytes(reader, &entry, sizeof(entry))) {
+          return false;
+        }
+        if (entry.exists && (entry.codeblock_index >= (u32)wsi->codeblock_count ||
+                             entry.codeblock_chunk_index >= (u32)wsi->codeblock_count ||
+                             entry.data_chunk_index >= (u32)wsi->data_chunk_count)) {
+          return false;
+        }
+        isyntax_tile_t* tile = level->tiles + (i64)tile_y * level->width_in_tiles + tile_x;
+        tile->codeblock_index = entry.codeblock_index;
+        tile->codeblock_chunk_index = entry.codeblock_chunk_index;
+        tile->data_chunk_index = entry.data_chunk_index;
+        tile->exists = entry.exists != 0;
+        tile->tile_scale = scale;
+        tile->tile_x = tile_x;
+        tile->tile_y = tile_y;
+      }
+    }
+  }
+  return reader->offset == reader->size;
+}
+
+static void free_wsi_tables(isyntax_t* isyntax) {
+  isyntax_image_t* wsi = isyntax->images + isyntax->wsi_image_index;
+  free(wsi->codeblocks);
+  free(wsi->data_chunks);
+  for (i32 scale = 0; scale < wsi->level_count; ++scale) {
+    free(wsi->levels[scale].tiles);
+  }
+}
+
+isyntax_error_t pyisyntax_open_from_index(const char* filename, const uint8_t* data, int64_t size,
+                                          enum libisyntax_open_flags_t flags, isyntax_t** out_isyntax) {
+  index_reader_t reader = {.data = data, .size = size};
+  index_header_t header;
+  index_header_t expected_header = make_index_header(0);
+  if (!read_bytes(&reader, &header, sizeof(header))) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  expected_header.filesize = header.filesize;
+  if (memcmp(&header, &expected_header, sizeof(header)) != 0) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+
+  file_stream_t fp = file_stream_open_for_reading(filename);
+  if (!fp) {
+    return LIBISYNTAX_FATAL;
+  }
+  i64 filesize = file_stream_get_filesize(fp);
+  file_stream_close(fp);
+  if (filesize != header.filesize) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+
+  isyntax_t* isyntax = malloc(sizeof(isyntax_t));
+  if (!read_bytes(&reader, isyntax, sizeof(isyntax_t))) {
+    free(isyntax);
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  clear_runtime_state(isyntax);
+  if (!is_wsi_image_valid(isyntax) || isyntax->block_width <= 0 || isyntax->block_height <= 0) {
+    free(isyntax);
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  if (!read_wsi_tables(&reader, isyntax)) {
+    free_wsi_tables(isyntax);
+    free(isyntax);
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  isyntax->open_flags = flags;
+  isyntax->file_handle = open_file_handle_for_simultaneous_access(filename);
+  if (!isyntax->file_handle) {
+    console_print_error("Error: Could not reopen file for asynchronous I/O\n");
+    free_wsi_tables(isyntax);
+    free(isyntax);
+    return LIBISYNTAX_FATAL;
+  }
+
+  // The rest mirrors the end of isyntax_open().
+  size_t ll_coeff_block_size = isyntax->block_width * isyntax->block_height * sizeof(icoeff_t);
+  if (flags & LIBISYNTAX_OPEN_FLAG_INIT_ALLOCATORS) {
+    size_t ll_coeff_block_allocator_capacity_in_blocks = GIGABYTES(32) / ll_coeff_block_size / 4;
+    size_t h_coeff_block_size = ll_coeff_block_size * 3;
+    size_t h_coeff_block_allocator_capacity_in_blocks = ll_coeff_block_allocator_capacity_in_blocks * 3;
+    isyntax->ll_coeff_block_allocator = malloc(sizeof(block_allocator_t));
+    isyntax->h_coeff_block_allocator = malloc(sizeof(block_allocator_t));
+    *isyntax->ll_coeff_block_allocator =
+        block_allocator_create(ll_coeff_block_size, ll_coeff_block_allocator_capacity_in_blocks, MEGABYTES(256));
+    *isyntax->h_coeff_block_allocator =
+        block_allocator_create(h_coeff_block_size, h_coeff_block_allocator_capacity_in_blocks, MEGABYTES(256));
+    isyntax->is_block_allocator_owned = true;
+  }
+  isyntax->black_dummy_coeff = (icoeff_t*)calloc(1, ll_coeff_block_size);
+  isyntax->white_dummy_coeff = (icoeff_t*)malloc(ll_coeff_block_size);
+  for (i32 i = 0; i < isyntax->block_width * isyntax->block_height; ++i) {
+    isyntax->white_dummy_coeff[i] = 255;
+  }
+  *out_isyntax = isyntax;
+  return LIBISYNTAX_OK;
+}
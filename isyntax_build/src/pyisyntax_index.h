@@ -0,0 +1,25 @@
+#pragma once
+#include <stdint.h>
+#include "libisyntax.h"
+
+/*
+Serializes everything that libisyntax_open() derives from a slide's XML header
+and seektable (image and level geometry, the codeblock table and the tile
+lookup tables) into an index, so that the slide can later be reopened with
+pyisyntax_open_from_index() without parsing the header again.
+
+Call with out_data_or_null == NULL to get the size of the index in *inout_size.
+Otherwise, *inout_size must hold the size of out_data_or_null.
+*/
+isyntax_error_t pyisyntax_index_write(const isyntax_t* isyntax, uint8_t* out_data_or_null, int64_t* inout_size);
+
+/*
+Same as libisyntax_open(), but restores the parsed header from an index written
+by pyisyntax_index_write() instead of reading it from the file.
+
+The index is copied, so it does not need to outlive the call. Returns
+LIBISYNTAX_INVALID_ARGUMENT if the index is malformed, was written by an
+incompatible build, or was written for a file of a different size.
+*/
+isyntax_error_t pyisyntax_open_from_index(const char* filename, const uint8_t* data, int64_t size,
+                                          enum libisyntax_open_flags_t flags, isyntax_t** out_isyntax);
@@ -0,0 +1,168 @@
+/*
+Pixel conversion routines.
+
+The colour conversion code is adapted from libisyntax (isyntax.c, BSD 2-Clause
+License, Copyright (c) 2019-2025, Pieter Valkema), where these functions are
+private to the tile loader. It is kept in sync with the original so that tiles
+decoded by pyisyntax are bit-identical to those decoded by libisyntax itself.
+*/
+
+#include "common.h"
+#include "intrinsics.h"
+#include "mathutils.h"
+#include "pyisyntax_pixels.h"
+
+static inline i16 signed_magnitude_to_twos_complement_16(u16 x) {
+  u16 m = -(x >> 15);
+  i16 result = (~m & x) | (((x & (u16)0x8000) - x) & m);
+  return result;
+}
+
+void pyisyntax_signed_magnitude_to_absolute_value_16_block(i16* data, u32 len) {
+  u32 i = 0;
+#if defined(__SSE2__) || defined(__ARM_NEON)
+  u32 aligned_len = (len / 8) * 8;
+#endif
+#if defined(__SSE2__)
+  for (; i < aligned_len; i += 8) {
+    __m128i x = _mm_loadu_si128((__m128i*)(data + i));
+    __m128i sign_masks = _mm_srai_epi16(x, 15);
+    __m128i maybe_positive = _mm_andnot_si128(sign_masks, x);
+    __m128i value_if_negative = _mm_sub_epi16(_mm_and_si128(x, _mm_set1_epi16(0x8000)), x);
+    __m128i maybe_negative = _mm_and_si128(sign_masks, value_if_negative);
+    __m128i result = _mm_or_si128(maybe_positive, maybe_negative);
+    result = _mm_and_si128(result, _mm_set1_epi16(0x7FFF));
+    _mm_storeu_si128((__m128i*)(data + i), result);
+  }
+#elif defined(__ARM_NEON)
+  for (; i < aligned_len; i += 8) {
+    uint16x8_t x = vld1q_u16((u16*)data + i);
+    int16x8_t sign_masks = vshrq_n_s16((int16x8_t)x, 15);
+    uint16x8_t maybe_positive = vbicq_u16(x, (uint16x8_t)sign_masks);
+    uint16x8_t value_if_negative = vsubq_u16(vandq_u16(x, vdupq_n_u16(0x8000)), x);
+    uint16x8_t maybe_negative = vandq_u16((uint16x8_t)sign_masks, value_if_negative);
+    uint16x8_t result = vorrq_u16(maybe_positive, maybe_negative);
+    result = vbicq_u16(result, vdupq_n_u16(0x8000));
+    vst1q_u16((u16*)data + i, result);
+  }
+#endif
+  for (; i < len; ++i) {
+    data[i] = (i16)(signed_magnitude_to_twos_complement_16((u16)data[i]) & 0x7FFF);
+  }
+}
+
+static rgba_t ycocg_to_rgb(icoeff_t Y, icoeff_t Co, icoeff_t Cg) {
+  icoeff_t tmp = Y - Cg / 2;
+  icoeff_t G = tmp + Cg;
+  icoeff_t B = tmp - Co / 2;
+  icoeff_t R = B + Co;
+  return (rgba_t){{{ATMOST(255, R), ATMOST(255, G), ATMOST(255, B), 255}}};
+}
+
+static rgba_t ycocg_to_bgr(icoeff_t Y, icoeff_t Co, icoeff_t Cg) {
+  icoeff_t tmp = Y - Cg / 2;
+  icoeff_t G = tmp + Cg;
+  icoeff_t B = tmp - Co / 2;
+  icoeff_t R = B + Co;
+  return (rgba_t){{{ATMOST(255, B), ATMOST(255, G), ATMOST(255, R), 255}}};
+}
+
+void pyisyntax_convert_ycocg_block(icoeff_t* Y, icoeff_t* Co, icoeff_t* Cg, i32 width, i32 height, i32 stride,
+                                   u8* out_pixels, i32 pixel_format) {
+  bool is_bgra = pixel_format == LIBISYNTAX_PIXEL_FORMAT_BGRA || pixel_format == PYISYNTAX_PIXEL_FORMAT_BGR;
+  // The 3-channel formats are packed here rather than in a separate pass.
+  bool has_alpha = pixel_format == LIBISYNTAX_PIXEL_FORMAT_RGBA || pixel_format == LIBISYNTAX_PIXEL_FORMAT_BGRA;
+  i32 bytes_per_pixel = has_alpha ? 4 : 3;
+#if (defined(__SSE2__) && defined(__SSSE3__)) || defined(__ARM_NEON__)
+  i32 aligned_width = (width / 8) * 8;
+#endif
+
+  for (i32 y = 0; y < height; ++y) {
+    u8* dest = out_pixels + (size_t)y * width * bytes_per_pixel;
+    i32 i = 0;
+#if defined(__SSE2__) && defined(__SSSE3__)
+    for (; i < aligned_width; i += 8) {
+      __m128i Y_ = _mm_loadu_si128((__m128i*)(Y + i));
+      __m128i Co_ = _mm_loadu_si128((__m128i*)(Co + i));
+      __m128i Cg_ = _mm_loadu_si128((__m128i*)(Cg + i));
+      __m128i tmp = _mm_sub_epi16(Y_, _mm_srai_epi16(Cg_, 1));
+      __m128i G = _mm_add_epi16(tmp, Cg_);
+      __m128i B = _mm_sub_epi16(tmp, _mm_srai_epi16(Co_, 1));
+      __m128i R = _mm_add_epi16(B, Co_);
+
+      // Clamp range to 0..255
+      __m128i zero = _mm_set1_epi16(0);
+      __m128i first = _mm_packus_epi16(is_bgra ? B : R, zero);
+      G = _mm_packus_epi16(zero, G);
+      __m128i third = _mm_packus_epi16(is_bgra ? R : B, zero);
+      __m128i A = _mm_setr_epi32(0, 0, 0xffffffff, 0xffffffff);
+
+      __m128i first_G = _mm_or_si128(first, G);
+      __m128i third_A = _mm_or_si128(third, A);
+      __m128i v_perm = _mm_setr_epi8(0, 8, 1, 9, 2, 10, 3, 11, 4, 12, 5, 13, 6, 14, 7, 15);
+      first_G = _mm_shuffle_epi8(first_G, v_perm);
+      third_A = _mm_shuffle_epi8(third_A, v_perm);
+      __m128i lo = _mm_unpacklo_epi16(first_G, third_A);
+      __m128i hi = _mm_unpackhi_epi16(first_G, third_A);
+
+      if (has_alpha) {
+        _mm_storeu_si128((__m128i*)(dest + 4 * i), lo);
+        _mm_storeu_si128((__m128i*)(dest + 4 * (i + 4)), hi);
+      } else {
+        // Drop the alpha bytes, then write the 24 bytes for the 8 pixels as 16 + 8.
+        __m128i v_pack = _mm_setr_epi8(0, 1, 2, 4, 5, 6, 8, 9, 10, 12, 13, 14, -1, -1, -1, -1);
+        lo = _mm_shuffle_epi8(lo, v_pack);
+        hi = _mm_shuffle_epi8(hi, v_pack);
+        _mm_storeu_si128((__m128i*)(dest + 3 * i), _mm_or_si128(lo, _mm_slli_si128(hi, 12)));
+        _mm_storel_epi64((__m128i*)(dest + 3 * i + 16), _mm_srli_si128(hi, 4));
+      }
+    }
+#elif defined(__ARM_NEON__)
+    for (; i < aligned_width; i += 8) {
+      int16x8_t Y_ = vld1q_s16(Y + i);
+      int16x8_t Co_ = vld1q_s16(Co + i);
+      int16x8_t Cg_ = vld1q_s16(Cg + i);
+      int16x8_t tmp = vsubq_s16(Y_, vshrq_n_s16(Cg_, 1));
+      int16x8_t G = vaddq_s16(tmp, Cg_);
+      int16x8_t B = vsubq_s16(tmp, vshrq_n_s16(Co_, 1));
+      int16x8_t R = vaddq_s16(B, Co_);
+
+      if (has_alpha) {
+        uint8x8x4_t vec;
+        vec.val[is_bgra ? 2 : 0] = vqmovun_s16(R);
+        vec.val[1] = vqmovun_s16(G);
+        vec.val[is_bgra ? 0 : 2] = vqmovun_s16(B);
+        vec.val[3] = vdup_n_u8(0xFF);
+        vst4_u8(dest + 4 * i, vec);
+      } else {
+        uint8x8x3_t vec;
+        vec.val[is_bgra ? 2 : 0] = vqmovun_s16(R);
+        vec.val[1] = vqmovun_s16(G);
+        vec.val[is_bgra ? 0 : 2] = vqmovun_s16(B);
+        vst3_u8(dest + 3 * i, vec);
+      }
+    }
+#endif
+    // Slow version, for last unaligned elements or in case SIMD isn't available
+    if (has_alpha) {
+      if (is_bgra) {
+        for (; i < width; ++i) {
+          ((rgba_t*)dest)[i] = ycocg_to_bgr(Y[i], Co[i], Cg[i]);
+        }
+      } else {
+        for (; i < width; ++i) {
+          ((rgba_t*)dest)[i] = ycocg_to_rgb(Y[i], Co[i], Cg[i]);
+        }
+      }
+    } else {
+      for (; i < width; ++i) {
+        rgba_t pixel = is_bgra ? ycocg_to_bgr(Y[i], Co[i], Cg[i]) : ycocg_to_rgb(Y[i], Co[i], Cg[i]);
+        memcpy(dest + 3 * i, pixel.values, 3);
+      }
+    }
+
+    Y += stride;
+    Co += stride;
+    Cg += stride;
+  }
+}
@@ -0,0 +1,16 @@
+#pragma once
+#include "common.h"
+#include "isyntax.h"
+#include "pyisyntax_reader.h"
+
+/*
+Takes the absolute value of a block of signed magnitude coefficients.
+*/
+void pyisyntax_signed_magnitude_to_absolute_value_16_block(i16* data, u32 len);
+
+/*
+Converts a YCoCg block (as produced by the inverse wavelet transform) to pixels
+in the given libisyntax or pyisyntax pixel format.
+*/
+void pyisyntax_convert_ycocg_block(icoeff_t* Y, icoeff_t* Co, icoeff_t* Cg, i32 width, i32 height, i32 stride,
+                                   u8* out_pixels, i32 pixel_format);
@@ -0,0 +1,1151 @@
+/*
+Entry points for reading image data that may be called concurrently from
+arbitrary Python threads.
+
+libisyntax keeps a per-thread scratch arena (`local_thread_memory`) which is
+only set up for the thread that called libisyntax_init() and for the threads in
+libisyntax's own pool. Any other thread that decodes a tile would dereference
+a NULL arena, so here we lazily set one up for the calling thread and make sure
+that it gets freed again when the thread exits.
+
+The tile reader itself follows libisyntax's isyntax_tile_read(), which holds the
+cache mutex for the entire decode and therefore only lets one thread at a time
+do useful work. Here the mutex is only held while the tile's dependencies are
+being prepared (loading coefficients and reconstructing the LL coefficients
+from the parent tiles). The tile and its neighbours are then pinned, so that
+other threads will neither evict nor modify them, and the final inverse wavelet
+transform and colour conversion run without holding the mutex.
+*/
+
+#include "common.h"
+#include "platform.h"
+#include "intrinsics.h"
+#include "work_queue.h"
+#include "isyntax.h"
+#include "isyntax_reader.h"
+#include "pyisyntax_pixels.h"
+#include "pyisyntax_reader.h"
+
+typedef struct pyisyntax_cache_t {
+  // Must be the first member, so that a pyisyntax_cache_t* can be passed
+  // anywhere an isyntax_cache_t* is expected.
+  isyntax_cache_t base;
+  // Tiles whose coefficients are being read without holding the mutex. A tile
+  // appears once for every reader that has pinned it.
+  isyntax_tile_t** pinned_tiles;
+  i32 pinned_tile_count;
+  i32 pinned_tile_capacity;
+  // Limit on the memory used by coefficients, or 0 for no limit.
+  i64 max_bytes;
+  i64 resident_bytes;
+  i64 eviction_count;
+  i64 level_hit_counts[16];
+  i64 level_miss_counts[16];
+} pyisyntax_cache_t;
+
+#if WINDOWS
+static DWORD thread_memory_fls_index = FLS_OUT_OF_INDEXES;
+
+static void WINAPI free_thread_memory(void* thread_memory) {
+  free(thread_memory);
+}
+#else
+#include <pthread.h>
+#include <sched.h>
+
+static pthread_key_t thread_memory_key;
+static bool is_thread_memory_key_valid = false;
+
+static void free_thread_memory(void* thread_memory) {
+  free(thread_memory);
+}
+#endif
+
+void pyisyntax_reader_init(void) {
+#if WINDOWS
+  if (thread_memory_fls_index == FLS_OUT_OF_INDEXES) {
+    thread_memory_fls_index = FlsAlloc(free_thread_memory);
+  }
+#else
+  if (!is_thread_memory_key_valid) {
+    is_thread_memory_key_valid = pthread_key_create(&thread_memory_key, free_thread_memory) == 0;
+  }
+#endif
+}
+
+static void ensure_thread_memory(void) {
+  if (local_thread_memory != NULL) {
+    return;
+  }
+  init_thread_memory(0, &global_system_info);
+  // Register the arena so that it is freed when the thread exits.
+#if WINDOWS
+  if (thread_memory_fls_index != FLS_OUT_OF_INDEXES) {
+    FlsSetValue(thread_memory_fls_index, local_thread_memory);
+  }
+#else
+  if (is_thread_memory_key_valid) {
+    pthread_setspecific(thread_memory_key, local_thread_memory);
+  }
+#endif
+}
+
+isyntax_error_t pyisyntax_cache_create(const char* debug_name_or_null, int32_t cache_size, int64_t max_bytes,
+                                       isyntax_cache_t** out_isyntax_cache) {
+  if (cache_size < 0 || max_bytes < 0) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  pyisyntax_cache_t* cache = malloc(sizeof(pyisyntax_cache_t));
+  memset(cache, 0, sizeof(*cache));
+  tile_list_init(&cache->base.cache_list, debug_name_or_null);
+  cache->base.target_cache_size = cache_size;
+  cache->base.mutex = benaphore_create();
+  cache->max_bytes = max_bytes;
+  *out_isyntax_cache = &cache->base;
+  return LIBISYNTAX_OK;
+}
+
+// Unlike libisyntax_cache_inject(), which replaces the cache's allocators every
+// time, this lets any number of slides share one cache (and one set of allocators).
+isyntax_error_t pyisyntax_cache_inject(isyntax_cache_t* isyntax_cache, isyntax_t* isyntax) {
+  if (isyntax->ll_coeff_block_allocator != NULL || isyntax->h_coeff_block_allocator != NULL) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  isyntax_error_t result = LIBISYNTAX_OK;
+  benaphore_lock(&isyntax_cache->mutex);
+  if (isyntax_cache->ll_coeff_block_allocator == NULL) {
+    // Same allocator sizes as libisyntax_cache_inject().
+    isyntax_cache->allocator_block_width = isyntax->block_width;
+    isyntax_cache->allocator_block_height = isyntax->block_height;
+    size_t ll_coeff_block_size = isyntax->block_width * isyntax->block_height * sizeof(icoeff_t);
+    size_t block_allocator_maximum_capacity_in_blocks = GIGABYTES(32) / ll_coeff_block_size;
+    size_t ll_coeff_block_allocator_capacity_in_blocks = block_allocator_maximum_capacity_in_blocks / 4;
+    size_t h_coeff_block_size = ll_coeff_block_size * 3;
+    size_t h_coeff_block_allocator_capacity_in_blocks = ll_coeff_block_allocator_capacity_in_blocks * 3;
+    isyntax_cache->ll_coeff_block_allocator = malloc(sizeof(block_allocator_t));
+    isyntax_cache->h_coeff_block_allocator = malloc(sizeof(block_allocator_t));
+    *isyntax_cache->ll_coeff_block_allocator =
+      block_allocator_create(ll_coeff_block_size, ll_coeff_block_allocator_capacity_in_blocks, MEGABYTES(256));
+    *isyntax_cache->h_coeff_block_allocator =
+      block_allocator_create(h_coeff_block_size, h_coeff_block_allocator_capacity_in_blocks, MEGABYTES(256));
+    isyntax_cache->is_block_allocator_owned = true;
+  } else if (isyntax_cache->allocator_block_width != isyntax->block_width ||
+             isyntax_cache->allocator_block_height != isyntax->block_height) {
+    // The blocks of all slides sharing a cache must have the same size.
+    result = LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  if (result == LIBISYNTAX_OK) {
+    isyntax->ll_coeff_block_allocator = isyntax_cache->ll_coeff_block_allocator;
+    isyntax->h_coeff_block_allocator = isyntax_cache->h_coeff_block_allocator;
+    isyntax->is_block_allocator_owned = false;
+  }
+  benaphore_unlock(&isyntax_cache->mutex);
+  return result;
+}
+
+void pyisyntax_cache_destroy(isyntax_cache_t* isyntax_cache) {
+  pyisyntax_cache_t* cache = (pyisyntax_cache_t*)isyntax_cache;
+  free(cache->pinned_tiles);
+  // Also frees the pyisyntax_cache_t itself, since `base` is its first member.
+  libisyntax_cache_destroy(&cache->base);
+}
+
+static bool is_tile_of_isyntax(isyntax_t* isyntax, isyntax_tile_t* tile) {
+  isyntax_image_t* wsi = &isyntax->images[isyntax->wsi_image_index];
+  for (i32 i = 0; i < wsi->level_count; ++i) {
+    isyntax_level_t* level = &wsi->levels[i];
+    if (tile >= level->tiles && tile < level->tiles + level->tile_count) {
+      return true;
+    }
+  }
+  return false;
+}
+
+// Pinning. The cache mutex must be held for all of these.
+
+static void pin_tile(pyisyntax_cache_t* cache, isyntax_tile_t* tile) {
+  if (cache->pinned_tile_count == cache->pinned_tile_capacity) {
+    cache->pinned_tile_capacity = MAX(16, cache->pinned_tile_capacity * 2);
+    cache->pinned_tiles = realloc(cache->pinned_tiles, cache->pinned_tile_capacity * sizeof(isyntax_tile_t*));
+  }
+  cache->pinned_tiles[cache->pinned_tile_count++] = tile;
+}
+
+static void unpin_tile(pyisyntax_cache_t* cache, isyntax_tile_t* tile) {
+  for (i32 i = cache->pinned_tile_count - 1; i >= 0; --i) {
+    if (cache->pinned_tiles[i] == tile) {
+      cache->pinned_tiles[i] = cache->pinned_tiles[--cache->pinned_tile_count];
+      return;
+    }
+  }
+  ASSERT(!"tile was not pinned");
+}
+
+static bool is_tile_pinned(pyisyntax_cache_t* cache, isyntax_tile_t* tile) {
+  for (i32 i = 0; i < cache->pinned_tile_count; ++i) {
+    if (cache->pinned_tiles[i] == tile) {
+      return true;
+    }
+  }
+  return false;
+}
+
+// The target tile and its neighbours are exactly the tiles whose coefficients are
+// read by isyntax_idwt_tile_for_color_channel().
+static void pin_tile_and_neighbors(pyisyntax_cache_t* cache, isyntax_level_t* level, isyntax_tile_t* tile, bool pin) {
+  for (i32 y = tile->tile_y - 1; y <= tile->tile_y + 1; ++y) {
+    for (i32 x = tile->tile_x - 1; x <= tile->tile_x + 1; ++x) {
+      if (x < 0 || x >= level->width_in_tiles || y < 0 || y >= level->height_in_tiles) {
+        continue;
+      }
+      isyntax_tile_t* neighbor = level->tiles + y * level->width_in_tiles + x;
+      if (neighbor != tile && !neighbor->exists) {
+        continue;
+      }
+      if (pin) {
+        pin_tile(cache, neighbor);
+      } else {
+        unpin_tile(cache, neighbor);
+      }
+    }
+  }
+}
+
+// Tile lists, see isyntax_reader.c.
+
+#define ITERATE_TILE_LIST(_iter, _list) \
+  isyntax_tile_t* _iter = _list.head; _iter; _iter = _iter->cache_next
+
+static void tile_list_insert_first(isyntax_tile_list_t* list, isyntax_tile_t* tile) {
+  ASSERT(tile->cache_next == NULL && tile->cache_prev == NULL);
+  if (list->head == NULL) {
+    list->head = tile;
+    list->tail = tile;
+  } else {
+    list->head->cache_prev = tile;
+    tile->cache_next = list->head;
+    list->head = tile;
+  }
+  list->count++;
+}
+
+static void tile_list_insert_list_first(isyntax_tile_list_t* target_list, isyntax_tile_list_t* source_list) {
+  if (source_list->head == NULL && source_list->tail == NULL) {
+    return;
+  }
+  source_list->tail->cache_next = target_list->head;
+  if (target_list->head) {
+    target_list->head->cache_prev = source_list->tail;
+  }
+  target_list->head = source_list->head;
+  if (target_list->tail == NULL) {
+    target_list->tail = source_list->tail;
+  }
+  target_list->count += source_list->count;
+  source_list->head = NULL;
+  source_list->tail = NULL;
+  source_list->count = 0;
+}
+
+static bool is_tile_in_list(isyntax_tile_list_t* list, isyntax_tile_t* tile) {
+  return tile->cache_next != NULL || tile->cache_prev != NULL || list->head == tile;
+}
+
+// Coefficient blocks, with their memory accounted against the cache.
+
+static icoeff_t* alloc_coeff_block(pyisyntax_cache_t* cache, bool is_ll) {
+  block_allocator_t* allocator = is_ll ? cache->base.ll_coeff_block_allocator : cache->base.h_coeff_block_allocator;
+  cache->resident_bytes += allocator->block_size;
+  return (icoeff_t*)block_alloc(allocator);
+}
+
+static void free_coeff_block(pyisyntax_cache_t* cache, bool is_ll, icoeff_t* block) {
+  block_allocator_t* allocator = is_ll ? cache->base.ll_coeff_block_allocator : cache->base.h_coeff_block_allocator;
+  cache->resident_bytes -= allocator->block_size;
+  block_free(allocator, block);
+}
+
+static void free_tile_coefficients(pyisyntax_cache_t* cache, isyntax_tile_t* tile) {
+  for (i32 i = 0; i < 3; ++i) {
+    if (tile->has_ll) {
+      free_coeff_block(cache, true, tile->color_channels[i].coeff_ll);
+      tile->color_channels[i].coeff_ll = NULL;
+    }
+    if (tile->has_h) {
+      free_coeff_block(cache, false, tile->color_channels[i].coeff_h);
+      tile->color_channels[i].coeff_h = NULL;
+    }
+  }
+  tile->has_ll = false;
+  tile->has_h = false;
+}
+
+static bool is_cache_over_budget(pyisyntax_cache_t* cache) {
+  return cache->base.cache_list.count > cache->base.target_cache_size ||
+         (cache->max_bytes > 0 && cache->resident_bytes > cache->max_bytes);
+}
+
+static void trim_cache(pyisyntax_cache_t* cache) {
+  isyntax_tile_t* tile = cache->base.cache_list.tail;
+  while (tile != NULL && is_cache_over_budget(cache)) {
+    isyntax_tile_t* prev = tile->cache_prev;
+    if (!is_tile_pinned(cache, tile)) {
+      tile_list_remove(&cache->base.cache_list, tile);
+      free_tile_coefficients(cache, tile);
+      cache->eviction_count++;
+    }
+    tile = prev;
+  }
+}
+
+void pyisyntax_cache_release(isyntax_cache_t* isyntax_cache, isyntax_t* isyntax) {
+  pyisyntax_cache_t* cache = (pyisyntax_cache_t*)isyntax_cache;
+  benaphore_lock(&cache->base.mutex);
+  isyntax_tile_t* tile = cache->base.cache_list.head;
+  while (tile != NULL) {
+    isyntax_tile_t* next = tile->cache_next;
+    if (is_tile_of_isyntax(isyntax, tile)) {
+      ASSERT(!is_tile_pinned(cache, tile));
+      tile_list_remove(&cache->base.cache_list, tile);
+      free_tile_coefficients(cache, tile);
+    }
+    tile = next;
+  }
+  benaphore_unlock(&cache->base.mutex);
+}
+
+void pyisyntax_cache_get_stats(isyntax_cache_t* isyntax_cache, pyisyntax_cache_stats_t* out_stats) {
+  pyisyntax_cache_t* cache = (pyisyntax_cache_t*)isyntax_cache;
+  memset(out_stats, 0, sizeof(*out_stats));
+  benaphore_lock(&cache->base.mutex);
+  out_stats->resident_tiles = cache->base.cache_list.count;
+  out_stats->resident_bytes = cache->resident_bytes;
+  out_stats->evictions = cache->eviction_count;
+  for (size_t i = 0; i < COUNT(out_stats->levels); ++i) {
+    pyisyntax_cache_level_stats_t* level_stats = &out_stats->levels[i];
+    level_stats->hits = cache->level_hit_counts[i];
+    level_stats->misses = cache->level_miss_counts[i];
+    out_stats->hits += level_stats->hits;
+    out_stats->misses += level_stats->misses;
+  }
+  if (cache->base.ll_coeff_block_allocator != NULL) {
+    i64 ll_tile_bytes = 3 * cache->base.ll_coeff_block_allocator->block_size;
+    i64 h_tile_bytes = 3 * cache->base.h_coeff_block_allocator->block_size;
+    for (ITERATE_TILE_LIST(tile, cache->base.cache_list)) {
+      pyisyntax_cache_level_stats_t* level_stats = &out_stats->levels[tile->tile_scale];
+      level_stats->resident_tiles++;
+      level_stats->resident_bytes += tile->has_ll * ll_tile_bytes + tile->has_h * h_tile_bytes;
+    }
+  }
+  benaphore_unlock(&cache->base.mutex);
+}
+
+void pyisyntax_cache_reset_stats(isyntax_cache_t* isyntax_cache) {
+  pyisyntax_cache_t* cache = (pyisyntax_cache_t*)isyntax_cache;
+  benaphore_lock(&cache->base.mutex);
+  cache->eviction_count = 0;
+  memset(cache->level_hit_counts, 0, sizeof(cache->level_hit_counts));
+  memset(cache->level_miss_counts, 0, sizeof(cache->level_miss_counts));
+  benaphore_unlock(&cache->base.mutex);
+}
+
+isyntax_error_t pyisyntax_cache_resize(isyntax_cache_t* isyntax_cache, int32_t cache_size, int64_t max_bytes) {
+  if (cache_size < 0 || max_bytes < 0) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  pyisyntax_cache_t* cache = (pyisyntax_cache_t*)isyntax_cache;
+  benaphore_lock(&cache->base.mutex);
+  cache->base.target_cache_size = cache_size;
+  cache->max_bytes = max_bytes;
+  trim_cache(cache);
+  benaphore_unlock(&cache->base.mutex);
+  return LIBISYNTAX_OK;
+}
+
+void pyisyntax_cache_clear(isyntax_cache_t* isyntax_cache) {
+  pyisyntax_cache_t* cache = (pyisyntax_cache_t*)isyntax_cache;
+  benaphore_lock(&cache->base.mutex);
+  isyntax_tile_t* tile = cache->base.cache_list.head;
+  while (tile != NULL) {
+    isyntax_tile_t* next = tile->cache_next;
+    if (!is_tile_pinned(cache, tile)) {
+      tile_list_remove(&cache->base.cache_list, tile);
+      free_tile_coefficients(cache, tile);
+    }
+    tile = next;
+  }
+  benaphore_unlock(&cache->base.mutex);
+}
+
+// Loading coefficients, see isyntax_reader.c.
+
+static void load_tile_coefficients_ll_or_h(pyisyntax_cache_t* cache, isyntax_t* isyntax, isyntax_tile_t* tile,
+                                           i32 codeblock_index, bool is_ll) {
+  isyntax_image_t* wsi = &isyntax->images[isyntax->wsi_image_index];
+  isyntax_data_chunk_t* chunk = &wsi->data_chunks[tile->data_chunk_index];
+
+  for (i32 color = 0; color < 3; ++color) {
+    isyntax_codeblock_t* codeblock = &wsi->codeblocks[codeblock_index + color * chunk->codeblock_count_per_color];
+    ASSERT(codeblock->coefficient == (is_ll ? 0 : 1));
+    ASSERT(codeblock->color_component == (u32)color);
+    ASSERT(codeblock->scale == (u32)tile->tile_scale);
+    icoeff_t* coeff = alloc_coeff_block(cache, is_ll);
+    if (is_ll) {
+      tile->color_channels[color].coeff_ll = coeff;
+    } else {
+      tile->color_channels[color].coeff_h = coeff;
+    }
+    // Adding 7 safety bytes so bitstream_lsb_read() won't access out of bounds in isyntax_hulsken_decompress().
+    u8* codeblock_data = malloc(codeblock->block_size + 7);
+    size_t bytes_read = file_handle_read_at_offset(codeblock_data, isyntax->file_handle,
+                                                   codeblock->block_data_offset, codeblock->block_size);
+    if (!(bytes_read > 0)) {
+      console_print_error("Error: could not read iSyntax data at offset %lld (read size %lld)\n",
+                          codeblock->block_data_offset, codeblock->block_size);
+    }
+    isyntax_hulsken_decompress(codeblock_data, codeblock->block_size, isyntax->block_width, isyntax->block_height,
+                               codeblock->coefficient, wsi->compressor_version, coeff);
+    free(codeblock_data);
+  }
+
+  if (is_ll) {
+    tile->has_ll = true;
+  } else {
+    tile->has_h = true;
+  }
+}
+
+static void load_tile_coefficients(pyisyntax_cache_t* cache, isyntax_t* isyntax, isyntax_tile_t* tile) {
+  isyntax_image_t* wsi = &isyntax->images[isyntax->wsi_image_index];
+
+  if (!tile->exists) {
+    return;
+  }
+  // Pinned tiles already have all of the coefficients they can have, and may be
+  // in use by another thread.
+  bool needs_ll = !tile->has_ll && tile->tile_scale == wsi->max_scale;
+  if (is_tile_pinned(cache, tile) || (!needs_ll && tile->has_h)) {
+    cache->level_hit_counts[tile->tile_scale]++;
+    return;
+  }
+  cache->level_miss_counts[tile->tile_scale]++;
+
+  // LL coefficients are only stored for the top-level tiles. For other levels,
+  // they are reconstructed from the parent tiles.
+  if (needs_ll) {
+    load_tile_coefficients_ll_or_h(cache, isyntax, tile, tile->codeblock_index, true);
+  }
+
+  if (!tile->has_h) {
+    isyntax_data_chunk_t* chunk = wsi->data_chunks + tile->data_chunk_index;
+    i32 scale_in_chunk = chunk->scale - tile->tile_scale;
+    ASSERT(scale_in_chunk >= 0 && scale_in_chunk < 3);
+    i32 codeblock_index_in_chunk = 0;
+    if (scale_in_chunk == 0) {
+      codeblock_index_in_chunk = 0;
+    } else if (scale_in_chunk == 1) {
+      codeblock_index_in_chunk = 1 + (tile->tile_y % 2) * 2 + (tile->tile_x % 2);
+    } else if (scale_in_chunk == 2) {
+      codeblock_index_in_chunk = 5 + (tile->tile_y % 4) * 4 + (tile->tile_x % 4);
+    } else {
+      fatal_error();
+    }
+    load_tile_coefficients_ll_or_h(cache, isyntax, tile, tile->codeblock_chunk_index + codeblock_index_in_chunk,
+                                   false);
+  }
+}
+
+// Inverse wavelet transform.
+
+typedef struct tile_idwt_t {
+  icoeff_t* channels[3]; // Y, Co and Cg
+  i32 stride;
+  i32 height;
+  u32 invalid_edges;
+} tile_idwt_t;
+
+static isyntax_tile_t* get_child_tile(isyntax_image_t* wsi, isyntax_tile_t* tile, i32 index) {
+  isyntax_level_t* next_level = &wsi->levels[tile->tile_scale - 1];
+  i32 child_x = tile->tile_x * 2 + (index & 1);
+  i32 child_y = tile->tile_y * 2 + (index >> 1);
+  return next_level->tiles + child_y * next_level->width_in_tiles + child_x;
+}
+
+// Reads the coefficients of the tile and its neighbours, so those must be pinned
+// (or the cache mutex held) for the duration of the call.
+static tile_idwt_t idwt_tile(isyntax_t* isyntax, isyntax_image_t* wsi, isyntax_tile_t* tile, arena_t* arena) {
+  tile_idwt_t result = {0};
+  i32 idwt_width = 2 * (isyntax->block_width + ISYNTAX_IDWT_PAD_L + ISYNTAX_IDWT_PAD_R);
+  i32 idwt_height = 2 * (isyntax->block_height + ISYNTAX_IDWT_PAD_L + ISYNTAX_IDWT_PAD_R);
+  size_t idwt_buffer_size = idwt_width * idwt_height * sizeof(icoeff_t);
+  result.stride = idwt_width;
+  result.height = idwt_height;
+  for (i32 color = 0; color < 3; ++color) {
+    icoeff_t* idwt = arena_push_size(arena, idwt_buffer_size);
+    memset(idwt, 0, idwt_buffer_size);
+    result.invalid_edges |= isyntax_idwt_tile_for_color_channel(isyntax, wsi, tile->tile_scale, tile->tile_x,
+                                                                tile->tile_y, color, idwt);
+    result.channels[color] = idwt;
+  }
+  return result;
+}
+
+// Hands the LL coefficients reconstructed by the inverse wavelet transform down to
+// the tile's children. Children that already have LL coefficients are left alone,
+// as they may be in use by other threads. The cache mutex must be held.
+static void distribute_ll_to_children(pyisyntax_cache_t* cache, isyntax_t* isyntax, isyntax_image_t* wsi,
+                                      isyntax_tile_t* tile, tile_idwt_t* idwt) {
+  i32 block_width = isyntax->block_width;
+  i32 block_height = isyntax->block_height;
+  i32 first_valid_pixel = ISYNTAX_IDWT_FIRST_VALID_PIXEL;
+  size_t row_copy_size = block_width * sizeof(icoeff_t);
+  for (i32 i = 0; i < 4; ++i) {
+    isyntax_tile_t* child = get_child_tile(wsi, tile, i);
+    if (child->has_ll || is_tile_pinned(cache, child)) {
+      continue;
+    }
+    i32 offset_x = first_valid_pixel + (i & 1) * block_width;
+    i32 offset_y = first_valid_pixel + (i >> 1) * block_height;
+    for (i32 color = 0; color < 3; ++color) {
+      icoeff_t* dest = child->color_channels[color].coeff_ll;
+      if (dest == NULL) {
+        dest = child->color_channels[color].coeff_ll = alloc_coeff_block(cache, true);
+      }
+      icoeff_t* source = idwt->channels[color] + offset_y * idwt->stride + offset_x;
+      for (i32 y = 0; y < block_height; ++y) {
+        memcpy(dest, source, row_copy_size);
+        dest += block_width;
+        source += idwt->stride;
+      }
+    }
+    child->has_ll = true;
+  }
+  if (idwt->invalid_edges != 0) {
+    console_print_error("load: scale=%d x=%d y=%d  invalid edges=%x\n", tile->tile_scale, tile->tile_x, tile->tile_y,
+                        idwt->invalid_edges);
+  }
+}
+
+static void idwt_for_children(pyisyntax_cache_t* cache, isyntax_t* isyntax, isyntax_image_t* wsi,
+                              isyntax_tile_t* tile) {
+  ASSERT(tile->tile_scale > 0);
+  bool children_have_ll = true;
+  for (i32 i = 0; i < 4; ++i) {
+    children_have_ll &= get_child_tile(wsi, tile, i)->has_ll;
+  }
+  if (children_have_ll) {
+    return;
+  }
+  temp_memory_t temp_memory = begin_temp_memory_on_local_thread();
+  tile_idwt_t idwt = idwt_tile(isyntax, wsi, tile, temp_memory.arena);
+  distribute_ll_to_children(cache, isyntax, wsi, tile, &idwt);
+  release_temp_memory(&temp_memory);
+}
+
+// Dependency tracking, see isyntax_reader.c.
+
+static void make_tile_lists_add_parent_to_list(isyntax_t* isyntax, isyntax_tile_t* tile, isyntax_tile_list_t* idwt_list,
+                                               isyntax_tile_list_t* cache_list) {
+  isyntax_image_t* wsi = &isyntax->images[isyntax->wsi_image_index];
+  i32 parent_tile_scale = tile->tile_scale + 1;
+  if (parent_tile_scale > wsi->max_scale) {
+    return;
+  }
+  isyntax_level_t* parent_level = &wsi->levels[parent_tile_scale];
+  isyntax_tile_t* parent_tile =
+    &parent_level->tiles[parent_level->width_in_tiles * (tile->tile_y / 2) + (tile->tile_x / 2)];
+  if (parent_tile->exists && !parent_tile->cache_marked) {
+    tile_list_remove(cache_list, parent_tile);
+    parent_tile->cache_marked = true;
+    tile_list_insert_first(idwt_list, parent_tile);
+  }
+}
+
+static void make_tile_lists_add_children_to_list(isyntax_t* isyntax, isyntax_tile_t* tile,
+                                                 isyntax_tile_list_t* children_list, isyntax_tile_list_t* cache_list) {
+  if (tile->tile_scale > 0) {
+    isyntax_image_t* wsi = &isyntax->images[isyntax->wsi_image_index];
+    for (i32 i = 0; i < 4; ++i) {
+      isyntax_tile_t* child = get_child_tile(wsi, tile, i);
+      if (!child->cache_marked) {
+        tile_list_remove(cache_list, child);
+        tile_list_insert_first(children_list, child);
+      }
+    }
+  }
+}
+
+static void make_tile_lists_by_scale(isyntax_t* isyntax, i32 start_scale, isyntax_tile_list_t* idwt_list,
+                                     isyntax_tile_list_t* coeff_list, isyntax_tile_list_t* children_list,
+                                     isyntax_tile_list_t* cache_list) {
+  isyntax_image_t* wsi = &isyntax->images[isyntax->wsi_image_index];
+  for (i32 scale = start_scale; scale <= wsi->max_scale; ++scale) {
+    // Mark all neighbours of idwt tiles at this level as requiring coefficients.
+    isyntax_level_t* level = &wsi->levels[scale];
+    for (ITERATE_TILE_LIST(tile, (*idwt_list))) {
+      if (tile->tile_scale != scale) {
+        continue;
+      }
+      for (i32 y_offset = -1; y_offset <= 1; ++y_offset) {
+        for (i32 x_offset = -1; x_offset <= 1; ++x_offset) {
+          i32 neighbor_tile_x = tile->tile_x + x_offset;
+          i32 neighbor_tile_y = tile->tile_y + y_offset;
+          if (neighbor_tile_x < 0 || neighbor_tile_x >= level->width_in_tiles || neighbor_tile_y < 0 ||
+              neighbor_tile_y >= level->height_in_tiles) {
+            continue;
+          }
+          isyntax_tile_t* neighbor_tile = &level->tiles[level->width_in_tiles * neighbor_tile_y + neighbor_tile_x];
+          if (neighbor_tile->cache_marked || !neighbor_tile->exists) {
+            continue;
+          }
+          tile_list_remove(cache_list, neighbor_tile);
+          neighbor_tile->cache_marked = true;
+          tile_list_insert_first(coeff_list, neighbor_tile);
+        }
+      }
+    }
+
+    // Mark all parents of tiles at this level as requiring idwt, so that all tiles
+    // at this level get their LL coefficients.
+    for (ITERATE_TILE_LIST(tile, (*idwt_list))) {
+      if (tile->tile_scale == scale) {
+        make_tile_lists_add_parent_to_list(isyntax, tile, idwt_list, cache_list);
+      }
+    }
+    for (ITERATE_TILE_LIST(tile, (*coeff_list))) {
+      if (tile->tile_scale == scale) {
+        make_tile_lists_add_parent_to_list(isyntax, tile, idwt_list, cache_list);
+      }
+    }
+  }
+
+  // Children of idwt tiles get their LL coefficients as a side effect, so should
+  // be cache bumped as well.
+  for (ITERATE_TILE_LIST(tile, (*idwt_list))) {
+    make_tile_lists_add_children_to_list(isyntax, tile, children_list, cache_list);
+  }
+}
+
+static bool is_valid_pixel_format(int32_t pixel_format) {
+  return (pixel_format > _LIBISYNTAX_PIXEL_FORMAT_START && pixel_format < _LIBISYNTAX_PIXEL_FORMAT_END) ||
+         (pixel_format > _PYISYNTAX_PIXEL_FORMAT_START && pixel_format < _PYISYNTAX_PIXEL_FORMAT_END);
+}
+
+static size_t get_bytes_per_pixel(i32 pixel_format) {
+  return pixel_format > _PYISYNTAX_PIXEL_FORMAT_START ? 3 : 4;
+}
+
+static void fill_white(isyntax_t* isyntax, uint8_t* pixels_buffer, i32 pixel_format) {
+  memset(pixels_buffer, 0xff, isyntax->tile_width * isyntax->tile_height * get_bytes_per_pixel(pixel_format));
+}
+
+// Tile coordinates are 64-bit, so that coordinates from Python are bounds-checked
+// before they could be truncated to libisyntax's 32-bit ones.
+static void tile_read(isyntax_t* isyntax, pyisyntax_cache_t* cache, i32 scale, i64 tile_x, i64 tile_y,
+                      uint8_t* pixels_buffer, i32 pixel_format) {
+  isyntax_image_t* wsi = &isyntax->images[isyntax->wsi_image_index];
+  isyntax_level_t* level = &wsi->levels[scale];
+
+  if (!(tile_x >= 0 && tile_x < level->width_in_tiles && tile_y >= 0 && tile_y < level->height_in_tiles)) {
+    // Read out of bounds -> set to all white
+    fill_white(isyntax, pixels_buffer, pixel_format);
+    return;
+  }
+  isyntax_tile_t* tile = &level->tiles[level->width_in_tiles * tile_y + tile_x];
+  if (!tile->exists) {
+    fill_white(isyntax, pixels_buffer, pixel_format);
+    return;
+  }
+
+  benaphore_lock(&cache->base.mutex);
+
+  // 1. idwt list: tiles that need an idwt for their children to get LL coefficients.
+  // 2. coeff list: neighbours, which need their coefficients loaded.
+  // 3. children list: tiles that get their LL coefficients as a side effect.
+  // The lists are disjoint, and sorted such that parents come before children.
+  isyntax_tile_list_t idwt_list = {NULL, NULL, 0, "idwt_list"};
+  isyntax_tile_list_t coeff_list = {NULL, NULL, 0, "coeff_list"};
+  isyntax_tile_list_t children_list = {NULL, NULL, 0, "children_list"};
+  tile_list_remove(&cache->base.cache_list, tile);
+  tile->cache_marked = true;
+  tile_list_insert_first(&idwt_list, tile);
+  make_tile_lists_by_scale(isyntax, scale, &idwt_list, &coeff_list, &children_list, &cache->base.cache_list);
+  for (ITERATE_TILE_LIST(t, idwt_list)) t->cache_marked = false;
+  for (ITERATE_TILE_LIST(t, coeff_list)) t->cache_marked = false;
+  for (ITERATE_TILE_LIST(t, children_list)) t->cache_marked = false;
+
+  // Load missing coefficients, then reconstruct the LL coefficients of the
+  // requested tile and its neighbours top-down. The requested tile itself comes
+  // last in the idwt list.
+  for (ITERATE_TILE_LIST(t, coeff_list)) {
+    load_tile_coefficients(cache, isyntax, t);
+  }
+  for (ITERATE_TILE_LIST(t, idwt_list)) {
+    load_tile_coefficients(cache, isyntax, t);
+  }
+  for (ITERATE_TILE_LIST(t, idwt_list)) {
+    if (t != idwt_list.tail) {
+      idwt_for_children(cache, isyntax, wsi, t);
+    }
+  }
+
+  tile_list_insert_list_first(&cache->base.cache_list, &children_list);
+  tile_list_insert_list_first(&cache->base.cache_list, &coeff_list);
+  tile_list_insert_list_first(&cache->base.cache_list, &idwt_list);
+  pin_tile_and_neighbors(cache, level, tile, true);
+  trim_cache(cache);
+
+  benaphore_unlock(&cache->base.mutex);
+
+  // The expensive part: the inverse wavelet transform for the requested tile.
+  temp_memory_t temp_memory = begin_temp_memory_on_local_thread();
+  tile_idwt_t idwt = idwt_tile(isyntax, wsi, tile, temp_memory.arena);
+
+  benaphore_lock(&cache->base.mutex);
+  if (scale > 0) {
+    distribute_ll_to_children(cache, isyntax, wsi, tile, &idwt);
+    // Children may have been evicted (by this or another thread) while the mutex was
+    // released. Put them back, so that every tile holding coefficients is in the
+    // cache list and counts towards its size.
+    for (i32 i = 0; i < 4; ++i) {
+      isyntax_tile_t* child = get_child_tile(wsi, tile, i);
+      if (child->has_ll && !is_tile_in_list(&cache->base.cache_list, child)) {
+        tile_list_insert_first(&cache->base.cache_list, child);
+      }
+    }
+  }
+  pin_tile_and_neighbors(cache, level, tile, false);
+  trim_cache(cache);
+  benaphore_unlock(&cache->base.mutex);
+
+  // For the Y (luminance) channel we need the absolute value of the coefficients.
+  icoeff_t* Y = idwt.channels[0];
+  icoeff_t* Co = idwt.channels[1];
+  icoeff_t* Cg = idwt.channels[2];
+  pyisyntax_signed_magnitude_to_absolute_value_16_block(Y, idwt.stride * idwt.height);
+  i32 valid_offset = ISYNTAX_IDWT_FIRST_VALID_PIXEL * idwt.stride + ISYNTAX_IDWT_FIRST_VALID_PIXEL;
+  pyisyntax_convert_ycocg_block(Y + valid_offset, Co + valid_offset, Cg + valid_offset, isyntax->tile_width,
+                                isyntax->tile_height, idwt.stride, pixels_buffer, pixel_format);
+
+  release_temp_memory(&temp_memory);
+}
+
+isyntax_error_t pyisyntax_tile_read(isyntax_t* isyntax, isyntax_cache_t* isyntax_cache,
+                                    int32_t level, int64_t tile_x, int64_t tile_y,
+                                    uint8_t* pixels_buffer, int32_t pixel_format) {
+  if (!is_valid_pixel_format(pixel_format)) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  if (level < 0 || level >= isyntax->images[isyntax->wsi_image_index].level_count) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  ensure_thread_memory();
+  tile_read(isyntax, (pyisyntax_cache_t*)isyntax_cache, level, tile_x, tile_y, pixels_buffer, pixel_format);
+  return LIBISYNTAX_OK;
+}
+
+isyntax_error_t pyisyntax_tile_exists(isyntax_t* isyntax, int32_t level, int64_t tile_x, int64_t tile_y,
+                                      int32_t* out_exists) {
+  isyntax_image_t* wsi = &isyntax->images[isyntax->wsi_image_index];
+  if (level < 0 || level >= wsi->level_count) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  isyntax_level_t* wsi_level = &wsi->levels[level];
+  *out_exists = tile_x >= 0 && tile_x < wsi_level->width_in_tiles && tile_y >= 0 &&
+                tile_y < wsi_level->height_in_tiles &&
+                wsi_level->tiles[tile_y * wsi_level->width_in_tiles + tile_x].exists;
+  return LIBISYNTAX_OK;
+}
+
+isyntax_error_t pyisyntax_get_tile_mask(isyntax_t* isyntax, int32_t level, uint8_t* mask_buffer) {
+  isyntax_image_t* wsi = &isyntax->images[isyntax->wsi_image_index];
+  if (level < 0 || level >= wsi->level_count) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  isyntax_level_t* wsi_level = &wsi->levels[level];
+  for (u64 i = 0; i < wsi_level->tile_count; ++i) {
+    mask_buffer[i] = wsi_level->tiles[i].exists;
+  }
+  return LIBISYNTAX_OK;
+}
+
+#define PER_LEVEL_PADDING 3
+
+// Computes the first tile and the offset into it for a region edge, see libisyntax_read_region().
+static void region_start_tile(i64 pos, i64 tile_size, i64* out_tile, i64* out_remainder) {
+  if (pos > 0) {
+    *out_tile = pos / tile_size;
+    *out_remainder = pos % tile_size;
+  } else {
+    *out_tile = -(-pos / tile_size);
+    *out_remainder = (pos % tile_size + tile_size) % tile_size;
+  }
+}
+
+isyntax_error_t pyisyntax_read_region(isyntax_t* isyntax, isyntax_cache_t* isyntax_cache, int32_t level,
+                                      int64_t x, int64_t y, int64_t width, int64_t height,
+                                      uint8_t* pixels_buffer, int32_t pixel_format) {
+  if (!is_valid_pixel_format(pixel_format)) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  i32 num_levels = isyntax->images[isyntax->wsi_image_index].level_count;
+  if (level < 0 || level >= num_levels) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  ensure_thread_memory();
+  pyisyntax_cache_t* cache = (pyisyntax_cache_t*)isyntax_cache;
+
+  i32 offset = ((PER_LEVEL_PADDING << num_levels) - PER_LEVEL_PADDING) >> level;
+  x += offset;
+  y += offset;
+
+  i64 tile_width = isyntax->tile_width;
+  i64 tile_height = isyntax->tile_height;
+  i64 start_tile_x, end_tile_x, x_remainder, x_remainder_last;
+  i64 start_tile_y, end_tile_y, y_remainder, y_remainder_last;
+  region_start_tile(x, tile_width, &start_tile_x, &x_remainder);
+  region_start_tile(x + width - 1, tile_width, &end_tile_x, &x_remainder_last);
+  region_start_tile(y, tile_height, &start_tile_y, &y_remainder);
+  region_start_tile(y + height - 1, tile_height, &end_tile_y, &y_remainder_last);
+
+  size_t bytes_per_pixel = get_bytes_per_pixel(pixel_format);
+  uint8_t* tile_pixels = (uint8_t*)malloc(tile_width * tile_height * bytes_per_pixel);
+  if (!tile_pixels) {
+    return LIBISYNTAX_FATAL;
+  }
+  for (i64 tile_y = start_tile_y; tile_y <= end_tile_y; ++tile_y) {
+    for (i64 tile_x = start_tile_x; tile_x <= end_tile_x; ++tile_x) {
+      i64 src_x = (tile_x == start_tile_x) ? x_remainder : 0;
+      i64 src_y = (tile_y == start_tile_y) ? y_remainder : 0;
+      i64 dest_x = (tile_x == start_tile_x) ? 0 : (tile_x - start_tile_x) * tile_width - x_remainder;
+      i64 dest_y = (tile_y == start_tile_y) ? 0 : (tile_y - start_tile_y) * tile_height - y_remainder;
+      i64 copy_width = (tile_x == end_tile_x) ? x_remainder_last - src_x + 1 : tile_width - src_x;
+      i64 copy_height = (tile_y == end_tile_y) ? y_remainder_last - src_y + 1 : tile_height - src_y;
+
+      tile_read(isyntax, cache, level, tile_x, tile_y, tile_pixels, pixel_format);
+
+      for (i64 i = 0; i < copy_height; ++i) {
+        memcpy(pixels_buffer + ((dest_y + i) * width + dest_x) * bytes_per_pixel,
+               tile_pixels + ((src_y + i) * tile_width + src_x) * bytes_per_pixel, copy_width * bytes_per_pixel);
+      }
+    }
+  }
+  free(tile_pixels);
+
+  return LIBISYNTAX_OK;
+}
+
+// Scaled reads.
+
+// Area-averaging taps of one output pixel along one axis: the input pixels
+// [first, first + count) with their weights, which sum to 1.
+typedef struct resample_taps_t {
+  i64 first;
+  i32 count;
+  i32 weights_offset;
+} resample_taps_t;
+
+// Computes the taps for resampling the input range [start, start + length)
+// (which may start and end between pixels) to `out_size` pixels. Input pixel
+// indices are relative to floor(start).
+static float* resample_taps_create(double start, double length, i64 out_size, resample_taps_t* taps) {
+  double scale = length / (double)out_size;
+  i32 max_taps = (i32)ceil(scale) + 2;
+  float* weights = malloc(out_size * max_taps * sizeof(float));
+  if (!weights) {
+    return NULL;
+  }
+  double origin = floor(start);
+  for (i64 i = 0; i < out_size; ++i) {
+    double lo = start + i * scale - origin;
+    double hi = lo + scale;
+    i64 first = (i64)floor(lo);
+    i32 count = 0;
+    for (i64 j = first; j < hi && count < max_taps; ++j) {
+      double overlap = MIN(hi, (double)(j + 1)) - MAX(lo, (double)j);
+      weights[i * max_taps + count++] = (float)(MAX(overlap, 0.0) / scale);
+    }
+    taps[i] = (resample_taps_t){first, count, (i32)(i * max_taps)};
+  }
+  return weights;
+}
+
+// Gets the largest number of output pixels whose taps share an input pixel, which
+// is how many output rows accumulate at the same time. Taps move forward
+// monotonically, so the overlapping outputs are found with a sliding window.
+static i64 resample_taps_window(const resample_taps_t* taps, i64 out_size) {
+  i64 window = 1;
+  i64 first_active = 0;
+  for (i64 i = 0; i < out_size; ++i) {
+    while (first_active < i && taps[first_active].first + taps[first_active].count <= taps[i].first) {
+      ++first_active;
+    }
+    window = MAX(window, i - first_active + 1);
+  }
+  return window;
+}
+
+isyntax_error_t pyisyntax_read_region_scaled(isyntax_t* isyntax, isyntax_cache_t* isyntax_cache, int32_t level,
+                                             double x, double y, double width, double height,
+                                             int64_t out_width, int64_t out_height,
+                                             uint8_t* pixels_buffer, int32_t pixel_format) {
+  if (!is_valid_pixel_format(pixel_format)) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  i32 num_levels = isyntax->images[isyntax->wsi_image_index].level_count;
+  if (level < 0 || level >= num_levels || !(width > 0) || !(height > 0) || out_width <= 0 || out_height <= 0) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+
+  // The whole pixels that the region touches.
+  i64 src_x = (i64)floor(x);
+  i64 src_y = (i64)floor(y);
+  i64 src_width = (i64)ceil(x + width) - src_x;
+  i64 src_height = (i64)ceil(y + height) - src_y;
+  size_t bytes_per_pixel = get_bytes_per_pixel(pixel_format);
+
+  // The region is read one strip of tile rows at a time, so that each tile is
+  // decoded once and the full-resolution region is never held in memory. Each
+  // source row is resampled horizontally, and then added to the output rows that
+  // it overlaps. Only the output rows that are still accumulating are kept, in a
+  // ring of `window` rows.
+  i32 offset = ((PER_LEVEL_PADDING << num_levels) - PER_LEVEL_PADDING) >> level;
+  i64 tile_height = isyntax->tile_height;
+  size_t row_values = out_width * bytes_per_pixel;
+  resample_taps_t* x_taps = malloc(out_width * sizeof(resample_taps_t));
+  resample_taps_t* y_taps = malloc(out_height * sizeof(resample_taps_t));
+  float* x_weights = x_taps ? resample_taps_create(x, width, out_width, x_taps) : NULL;
+  float* y_weights = y_taps ? resample_taps_create(y, height, out_height, y_taps) : NULL;
+  i64 window = y_weights ? resample_taps_window(y_taps, out_height) : 0;
+  uint8_t* strip = malloc(src_width * tile_height * bytes_per_pixel);
+  float* row = malloc(row_values * sizeof(float));
+  float* sums = y_weights ? malloc(window * row_values * sizeof(float)) : NULL;
+  isyntax_error_t result = LIBISYNTAX_OK;
+  if (!x_weights || !y_weights || !strip || !row || !sums) {
+    result = LIBISYNTAX_FATAL;
+  }
+
+  i64 next_out_y = 0;
+  i64 started_out_y = 0;
+  for (i64 strip_y = 0; strip_y < src_height && result == LIBISYNTAX_OK;) {
+    // Strips end at tile boundaries, which are offset by the level's padding.
+    i64 level_y = src_y + strip_y;
+    i64 tile_end = ((level_y + offset) / tile_height + 1) * tile_height - offset;
+    if (level_y + offset < 0) {
+      tile_end = level_y + 1;
+    }
+    i64 strip_height = MIN(tile_end - level_y, src_height - strip_y);
+    result = pyisyntax_read_region(isyntax, isyntax_cache, level, src_x, level_y, src_width, strip_height, strip,
+                                   pixel_format);
+    for (i64 i = 0; i < strip_height && result == LIBISYNTAX_OK; ++i) {
+      i64 sy = strip_y + i;
+      const uint8_t* src_row = strip + i * src_width * bytes_per_pixel;
+      for (i64 ox = 0; ox < out_width; ++ox) {
+        resample_taps_t taps = x_taps[ox];
+        for (size_t c = 0; c < bytes_per_pixel; ++c) {
+          float value = 0.0f;
+          for (i32 k = 0; k < taps.count; ++k) {
+            i64 sx = MIN(taps.first + k, src_width - 1);
+            value += x_weights[taps.weights_offset + k] * src_row[sx * bytes_per_pixel + c];
+          }
+          row[ox * bytes_per_pixel + c] = value;
+        }
+      }
+      // Output rows are finished in order, as soon as their last source row has been added.
+      for (i64 oy = next_out_y; oy < out_height && y_taps[oy].first <= sy; ++oy) {
+        resample_taps_t taps = y_taps[oy];
+        float* out_sums = sums + (oy % window) * row_values;
+        if (oy == started_out_y) {
+          memset(out_sums, 0, row_values * sizeof(float));
+          started_out_y = oy + 1;
+        }
+        i64 k = sy - taps.first;
+        if (k < taps.count) {
+          float weight = y_weights[taps.weights_offset + k];
+          for (size_t j = 0; j < row_values; ++j) {
+            out_sums[j] += weight * row[j];
+          }
+        }
+        if (sy >= MIN(taps.first + taps.count, src_height) - 1) {
+          uint8_t* out_row = pixels_buffer + oy * row_values;
+          for (size_t j = 0; j < row_values; ++j) {
+            float value = out_sums[j] + 0.5f;
+            out_row[j] = (uint8_t)(value < 0.0f ? 0.0f : (value > 255.0f ? 255.0f : value));
+          }
+          next_out_y = oy + 1;
+        }
+      }
+    }
+    strip_y += strip_height;
+  }
+
+  free(sums);
+  free(row);
+  free(strip);
+  free(y_weights);
+  free(x_weights);
+  free(y_taps);
+  free(x_taps);
+  return result;
+}
+
+// Batched reads.
+
+typedef struct tile_request_t {
+  i64 tile_x;
+  i64 tile_y;
+  i32 index; // Position of the tile in the caller's buffer.
+} tile_request_t;
+
+typedef struct tile_copy_t {
+  i32 source_index;
+  i32 dest_index;
+} tile_copy_t;
+
+typedef struct tile_batch_t {
+  isyntax_t* isyntax;
+  pyisyntax_cache_t* cache;
+  i32 scale;
+  tile_request_t* requests;
+  i32 request_count;
+  uint8_t* pixels_buffer;
+  size_t tile_size; // In bytes.
+  i32 pixel_format;
+  volatile i32 next_request;
+  volatile i32 finished_task_count;
+} tile_batch_t;
+
+// Tiles in the same 4x4 block share their ancestors (and are in the same data
+// chunk), so keeping them together means that the parents are reconstructed once
+// while the tiles that need them are being decoded.
+static int compare_tile_requests(const void* a, const void* b) {
+  const tile_request_t* lhs = a;
+  const tile_request_t* rhs = b;
+  i64 lhs_key[4] = {lhs->tile_y >> 2, lhs->tile_x >> 2, lhs->tile_y, lhs->tile_x};
+  i64 rhs_key[4] = {rhs->tile_y >> 2, rhs->tile_x >> 2, rhs->tile_y, rhs->tile_x};
+  for (i32 i = 0; i < 4; ++i) {
+    if (lhs_key[i] != rhs_key[i]) {
+      return lhs_key[i] < rhs_key[i] ? -1 : 1;
+    }
+  }
+  return lhs->index - rhs->index;
+}
+
+static uint8_t* batch_tile_pixels(tile_batch_t* batch, i32 index) {
+  return batch->pixels_buffer + (size_t)index * batch->tile_size;
+}
+
+// Decodes requests until there are none left. Run by the calling thread and by
+// the worker threads, which all pull from the same list.
+static void read_batch_tiles(tile_batch_t* batch) {
+  for (;;) {
+    i32 i = atomic_increment(&batch->next_request) - 1;
+    if (i >= batch->request_count) {
+      break;
+    }
+    tile_request_t* request = batch->requests + i;
+    tile_read(batch->isyntax, batch->cache, batch->scale, request->tile_x, request->tile_y,
+              batch_tile_pixels(batch, request->index), batch->pixel_format);
+  }
+}
+
+static void read_batch_tiles_task_func(int logical_thread_index, void* userdata) {
+  (void)logical_thread_index;
+  tile_batch_t* batch = *(tile_batch_t**)userdata;
+  read_batch_tiles(batch);
+  write_barrier;
+  atomic_increment(&batch->finished_task_count);
+}
+
+static void yield_thread(void) {
+#if WINDOWS
+  SwitchToThread();
+#else
+  sched_yield();
+#endif
+}
+
+isyntax_error_t pyisyntax_read_tiles(isyntax_t* isyntax, isyntax_cache_t* isyntax_cache, int32_t level,
+                                     const int64_t* tile_coords, int32_t tile_count,
+                                     uint8_t* pixels_buffer, int32_t pixel_format) {
+  if (!is_valid_pixel_format(pixel_format)) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  if (level < 0 || level >= isyntax->images[isyntax->wsi_image_index].level_count || tile_count < 0) {
+    return LIBISYNTAX_INVALID_ARGUMENT;
+  }
+  if (tile_count == 0) {
+    return LIBISYNTAX_OK;
+  }
+  ensure_thread_memory();
+
+  // Sort the requests and move repeated tiles to the end, so that every distinct
+  // tile is decoded exactly once.
+  tile_request_t* requests = malloc(tile_count * sizeof(tile_request_t));
+  if (!requests) {
+    return LIBISYNTAX_FATAL;
+  }
+  for (i32 i = 0; i < tile_count; ++i) {
+    requests[i] = (tile_request_t){tile_coords[2 * i], tile_coords[2 * i + 1], i};
+  }
+  qsort(requests, tile_count, sizeof(tile_request_t), compare_tile_requests);
+  tile_copy_t* duplicates = malloc(tile_count * sizeof(tile_copy_t));
+  if (!duplicates) {
+    free(requests);
+    return LIBISYNTAX_FATAL;
+  }
+  i32 unique_count = 0;
+  i32 duplicate_count = 0;
+  for (i32 i = 0; i < tile_count; ++i) {
+    if (unique_count > 0 && requests[unique_count - 1].tile_x == requests[i].tile_x &&
+        requests[unique_count - 1].tile_y == requests[i].tile_y) {
+      duplicates[duplicate_count++] = (tile_copy_t){requests[unique_count - 1].index, requests[i].index};
+    } else {
+      requests[unique_count++] = requests[i];
+    }
+  }
+
+  tile_batch_t batch = {
+    .isyntax = isyntax,
+    .cache = (pyisyntax_cache_t*)isyntax_cache,
+    .scale = level,
+    .requests = requests,
+    .request_count = unique_count,
+    .pixels_buffer = pixels_buffer,
+    .tile_size = (size_t)isyntax->tile_width * isyntax->tile_height * get_bytes_per_pixel(pixel_format),
+    .pixel_format = pixel_format,
+  };
+
+  // Let the libisyntax worker threads help out, keeping one tile for the calling
+  // thread. Each task keeps decoding until the list is exhausted, so a few tasks
+  // are enough regardless of the number of tiles.
+  i32 task_count = MIN(global_active_worker_thread_count, unique_count - 1);
+  i32 submitted_task_count = 0;
+  tile_batch_t* batch_ptr = &batch;
+  for (i32 i = 0; i < task_count; ++i) {
+    if (!work_queue_submit_task(&global_work_queue, read_batch_tiles_task_func, &batch_ptr, sizeof(batch_ptr))) {
+      break;
+    }
+    ++submitted_task_count;
+  }
+  read_batch_tiles(&batch);
+
+  // `batch` lives on this stack frame, so wait until every submitted task has
+  // finished with it. Help drain the queue in the meantime, in case the workers
+  // are busy with other batches.
+  while (batch.finished_task_count < submitted_task_count) {
+    if (!work_queue_do_work(&global_work_queue, 0)) {
+      yield_thread();
+    }
+  }
+  read_barrier;
+
+  for (i32 i = 0; i < duplicate_count; ++i) {
+    memcpy(batch_tile_pixels(&batch, duplicates[i].dest_index), batch_tile_pixels(&batch, duplicates[i].source_index),
+           batch.tile_size);
+  }
+
+  free(duplicates);
+  free(requests);
+  return LIBISYNTAX_OK;
+}
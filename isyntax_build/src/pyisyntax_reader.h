@@ -0,0 +1,130 @@
+#pragma once
+#include <stdint.h>
+#include "libisyntax.h"
+
+/*
+Pixel formats in addition to libisyntax's RGBA and BGRA, with 3 bytes per pixel.
+*/
+enum pyisyntax_pixel_format_t {
+  _PYISYNTAX_PIXEL_FORMAT_START = 0x200,
+  PYISYNTAX_PIXEL_FORMAT_RGB,
+  PYISYNTAX_PIXEL_FORMAT_BGR,
+  _PYISYNTAX_PIXEL_FORMAT_END,
+};
+
+/*
+Prepares the reader for use. Must be called once after libisyntax_init().
+*/
+void pyisyntax_reader_init(void);
+
+/*
+Same as libisyntax_cache_create(), with an additional limit on the memory used
+by the cached coefficients (0 for no limit). Caches that are used with the
+functions below must be created (and destroyed) with these functions.
+*/
+isyntax_error_t pyisyntax_cache_create(const char* debug_name_or_null, int32_t cache_size, int64_t max_bytes,
+                                       isyntax_cache_t** out_isyntax_cache);
+
+/*
+Same as libisyntax_cache_inject(), but may be called for any number of slides
+to share the cache between them. All of them must use the same block size.
+*/
+isyntax_error_t pyisyntax_cache_inject(isyntax_cache_t* isyntax_cache, isyntax_t* isyntax);
+
+/*
+Evicts all tiles of the slide from the cache. Must be called before a slide that
+shares the cache is closed, while no reads from it are in progress.
+*/
+void pyisyntax_cache_release(isyntax_cache_t* isyntax_cache, isyntax_t* isyntax);
+
+typedef struct pyisyntax_cache_level_stats_t {
+  int64_t resident_tiles;
+  int64_t resident_bytes;
+  // Tiles whose coefficients were needed and already cached (hits) or had to be
+  // read from the file and decompressed (misses).
+  int64_t hits;
+  int64_t misses;
+} pyisyntax_cache_level_stats_t;
+
+typedef struct pyisyntax_cache_stats_t {
+  int64_t resident_tiles;
+  int64_t resident_bytes;
+  int64_t hits;
+  int64_t misses;
+  int64_t evictions;
+  // Indexed by level (at most 16, like isyntax_image_t.levels).
+  pyisyntax_cache_level_stats_t levels[16];
+} pyisyntax_cache_stats_t;
+
+void pyisyntax_cache_get_stats(isyntax_cache_t* isyntax_cache, pyisyntax_cache_stats_t* out_stats);
+
+/*
+Resets the hit, miss and eviction counters.
+*/
+void pyisyntax_cache_reset_stats(isyntax_cache_t* isyntax_cache);
+
+/*
+Changes the limits of the cache, evicting tiles as needed to stay within them.
+*/
+isyntax_error_t pyisyntax_cache_resize(isyntax_cache_t* isyntax_cache, int32_t cache_size, int64_t max_bytes);
+
+/*
+Evicts all tiles from the cache, except for those that are currently being read.
+*/
+void pyisyntax_cache_clear(isyntax_cache_t* isyntax_cache);
+
+/*
+Same as libisyntax_cache_destroy(), for caches created by pyisyntax_cache_create().
+*/
+void pyisyntax_cache_destroy(isyntax_cache_t* isyntax_cache);
+
+/*
+Same as libisyntax_tile_read(), but safe to call from any thread (including
+threads that were not created by libisyntax), and also supporting the 3-channel
+pixel formats. The cache mutex is only held
+while the tile's dependencies are prepared, so multiple threads can decode
+tiles at the same time.
+*/
+isyntax_error_t pyisyntax_tile_read(isyntax_t* isyntax, isyntax_cache_t* isyntax_cache,
+                                    int32_t level, int64_t tile_x, int64_t tile_y,
+                                    uint8_t* pixels_buffer, int32_t pixel_format);
+
+/*
+Same as libisyntax_read_region(), but built on pyisyntax_tile_read().
+*/
+isyntax_error_t pyisyntax_read_region(isyntax_t* isyntax, isyntax_cache_t* isyntax_cache, int32_t level,
+                                      int64_t x, int64_t y, int64_t width, int64_t height,
+                                      uint8_t* pixels_buffer, int32_t pixel_format);
+
+/*
+Reads the region [x, x + width) x [y, y + height) of a level, whose edges may lie
+between pixels, and resamples it to out_width x out_height pixels by area
+averaging. The region is decoded one row of tiles at a time, so it is never held
+in memory at its full resolution.
+*/
+isyntax_error_t pyisyntax_read_region_scaled(isyntax_t* isyntax, isyntax_cache_t* isyntax_cache, int32_t level,
+                                             double x, double y, double width, double height,
+                                             int64_t out_width, int64_t out_height,
+                                             uint8_t* pixels_buffer, int32_t pixel_format);
+
+/*
+Reads `tile_count` tiles from the same level, given as (tile_x, tile_y) pairs in
+`tile_coords`, into consecutive tiles of `pixels_buffer`. Distinct tiles are decoded
+once each, in parallel using libisyntax's worker threads.
+*/
+isyntax_error_t pyisyntax_read_tiles(isyntax_t* isyntax, isyntax_cache_t* isyntax_cache, int32_t level,
+                                     const int64_t* tile_coords, int32_t tile_count,
+                                     uint8_t* pixels_buffer, int32_t pixel_format);
+
+/*
+Sets `*out_exists` to 1 if the tile is stored in the file, and to 0 if it is not
+(i.e. it is background) or lies outside of the level.
+*/
+isyntax_error_t pyisyntax_tile_exists(isyntax_t* isyntax, int32_t level, int64_t tile_x, int64_t tile_y,
+                                      int32_t* out_exists);
+
+/*
+Writes one byte per tile of the level, in row-major order, which is 1 if the
+tile is stored in the file and 0 otherwise.
+*/
+isyntax_error_t pyisyntax_get_tile_mask(isyntax_t* isyntax, int32_t level, uint8_t* mask_buffer);
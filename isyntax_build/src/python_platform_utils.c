@@ -2,28 +2,196 @@
 This file is effectively one big hack that implements I/O operations using
 Python hooks. This gives more flexibility, as we are no longer restricted to
 reading from the local file system only.
+
+Handles that are backed by a real file descriptor can optionally be switched to
+a native backend, in which case reads are serviced directly from C without
+calling back into Python (and therefore without taking the GIL). The mmap
+backend goes one step further and maps the whole file into memory once, so that
+reads are plain memory copies without any system calls.
 */
 
 #include "common.h"
 #include "platform.h"
+#include "python_platform_utils.h"
+
+#if WINDOWS
+#include <io.h>
+#else
+#include <errno.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#endif
 
-bool (*_python_file_set_pos)(int id, i64 offset);
-i64 (*_python_file_read_into)(int id, void* dest, size_t bytes_to_read);
-i64 (*_python_file_get_size)(int id);
+bool (*_python_file_set_pos)(int id, int64_t offset);
+int64_t (*_python_file_read_into)(int id, void* dest, size_t bytes_to_read);
+int64_t (*_python_file_read_at_offset)(int id, void* dest, size_t bytes_to_read, int64_t offset);
+int64_t (*_python_file_get_size)(int id);
 void (*_python_file_close)(int id);
 
+// Handles are small integers that get recycled by the Python side, so a fixed
+// table indexed by handle is sufficient. Handles beyond the end of the table
+// can only use the Python backend.
+#define MAX_NATIVE_IO_HANDLES 4096
+
+typedef struct native_io_t {
+  i32 backend;
+#if WINDOWS
+  HANDLE os_handle;
+#else
+  int fd;
+#endif
+  // The mapped file, for PYTHON_IO_BACKEND_MMAP.
+  u8* mapping;
+  i64 mapping_size;
+#if WINDOWS
+  HANDLE mapping_handle;
+#endif
+  // Position used by the file_stream_* functions, which are only called while
+  // parsing the header (i.e. from a single thread).
+  i64 stream_pos;
+} native_io_t;
+
+static native_io_t native_io_table[MAX_NATIVE_IO_HANDLES];
+
 void init_python_platform_utils(
-  bool (*python_file_set_pos)(int id, i64 offset),
-  i64 (*python_file_read_into)(int id, void* dest, size_t bytes_to_read),
-  i64 (*python_file_get_size)(int id),
+  bool (*python_file_set_pos)(int id, int64_t offset),
+  int64_t (*python_file_read_into)(int id, void* dest, size_t bytes_to_read),
+  int64_t (*python_file_read_at_offset)(int id, void* dest, size_t bytes_to_read, int64_t offset),
+  int64_t (*python_file_get_size)(int id),
   void (*python_file_close)(int id)
 ) {
   _python_file_set_pos = python_file_set_pos;
   _python_file_read_into = python_file_read_into;
+  _python_file_read_at_offset = python_file_read_at_offset;
   _python_file_get_size = python_file_get_size;
   _python_file_close = python_file_close;
 }
 
+static void unmap_file(native_io_t* io) {
+  if (!io->mapping) {
+    return;
+  }
+#if WINDOWS
+  UnmapViewOfFile(io->mapping);
+  CloseHandle(io->mapping_handle);
+#else
+  munmap(io->mapping, (size_t)io->mapping_size);
+#endif
+  io->mapping = NULL;
+}
+
+static bool map_file(native_io_t* io) {
+#if WINDOWS
+  LARGE_INTEGER file_size;
+  if (!GetFileSizeEx(io->os_handle, &file_size) || file_size.QuadPart <= 0) {
+    return false;
+  }
+  HANDLE mapping_handle = CreateFileMappingA(io->os_handle, NULL, PAGE_READONLY, 0, 0, NULL);
+  if (!mapping_handle) {
+    return false;
+  }
+  void* mapping = MapViewOfFile(mapping_handle, FILE_MAP_READ, 0, 0, 0);
+  if (!mapping) {
+    CloseHandle(mapping_handle);
+    return false;
+  }
+  io->mapping_handle = mapping_handle;
+  io->mapping_size = file_size.QuadPart;
+#else
+  struct stat st;
+  if (fstat(io->fd, &st) != 0 || st.st_size <= 0) {
+    return false;
+  }
+  void* mapping = mmap(NULL, (size_t)st.st_size, PROT_READ, MAP_SHARED, io->fd, 0);
+  if (mapping == MAP_FAILED) {
+    return false;
+  }
+  io->mapping_size = st.st_size;
+#endif
+  io->mapping = mapping;
+  return true;
+}
+
+bool python_platform_set_io_backend(int id, int backend, int fd) {
+  if (id <= 0 || id >= MAX_NATIVE_IO_HANDLES) {
+    return backend == PYTHON_IO_BACKEND_PYTHON;
+  }
+  native_io_t* io = native_io_table + id;
+  unmap_file(io);
+  memset(io, 0, sizeof(*io));
+  if (backend == PYTHON_IO_BACKEND_PYTHON) {
+    io->backend = PYTHON_IO_BACKEND_PYTHON;
+    return true;
+  }
+  if ((backend != PYTHON_IO_BACKEND_NATIVE && backend != PYTHON_IO_BACKEND_MMAP) || fd < 0) {
+    return false;
+  }
+#if WINDOWS
+  HANDLE os_handle = (HANDLE)_get_osfhandle(fd);
+  if (os_handle == INVALID_HANDLE_VALUE) {
+    return false;
+  }
+  io->os_handle = os_handle;
+#else
+  io->fd = fd;
+#endif
+  if (backend == PYTHON_IO_BACKEND_MMAP && !map_file(io)) {
+    memset(io, 0, sizeof(*io));
+    return false;
+  }
+  io->backend = backend;
+  return true;
+}
+
+static native_io_t* get_native_io(int id) {
+  if (id <= 0 || id >= MAX_NATIVE_IO_HANDLES) {
+    return NULL;
+  }
+  native_io_t* io = native_io_table + id;
+  if (io->backend == PYTHON_IO_BACKEND_PYTHON) {
+    return NULL;
+  }
+  return io;
+}
+
+static i64 native_read_at_offset(native_io_t* io, void* dest, size_t bytes_to_read, i64 offset) {
+  if (io->mapping) {
+    if (offset < 0 || offset >= io->mapping_size) {
+      return 0;
+    }
+    size_t bytes_read = (size_t)MIN((i64)bytes_to_read, io->mapping_size - offset);
+    memcpy(dest, io->mapping + offset, bytes_read);
+    return (i64)bytes_read;
+  }
+  size_t total_bytes_read = 0;
+  while (total_bytes_read < bytes_to_read) {
+    u64 pos = (u64)offset + total_bytes_read;
+#if WINDOWS
+    OVERLAPPED overlapped = {0};
+    overlapped.Offset = (DWORD)(pos & 0xFFFFFFFF);
+    overlapped.OffsetHigh = (DWORD)(pos >> 32);
+    DWORD bytes_to_read_now = (DWORD)MIN(bytes_to_read - total_bytes_read, (size_t)0x40000000);
+    DWORD bytes_read = 0;
+    if (!ReadFile(io->os_handle, (u8*)dest + total_bytes_read, bytes_to_read_now, &bytes_read, &overlapped)) {
+      break;
+    }
+#else
+    ssize_t bytes_read = pread(io->fd, (u8*)dest + total_bytes_read, bytes_to_read - total_bytes_read, (off_t)pos);
+    if (bytes_read < 0) {
+      if (errno == EINTR) {
+        continue;
+      }
+      break;
+    }
+#endif
+    if (bytes_read == 0) {
+      break;
+    }
+    total_bytes_read += bytes_read;
+  }
+  return (i64)total_bytes_read;
+}
+
 int platform_stat(const char* filename, struct stat* st) {
   printf("Not implemented.\n");
   exit(1);
@@ -40,6 +208,12 @@ file_stream_t file_stream_open_for_writing(const char* filename) {
 
 i64 file_stream_read(void* dest, size_t bytes_to_read, file_stream_t file_stream) {
   int id = (int)file_stream;
+  native_io_t* io = get_native_io(id);
+  if (io) {
+    i64 bytes_read = native_read_at_offset(io, dest, bytes_to_read, io->stream_pos);
+    io->stream_pos += bytes_read;
+    return bytes_read;
+  }
   return _python_file_read_into(id, dest, bytes_to_read);
 }
 
@@ -60,6 +234,11 @@ i64 file_stream_get_pos(file_stream_t file_stream) {
 
 bool file_stream_set_pos(file_stream_t file_stream, i64 offset) {
   int id = (int)file_stream;
+  native_io_t* io = get_native_io(id);
+  if (io) {
+    io->stream_pos = offset;
+    return true;
+  }
   return _python_file_set_pos(id, offset);
 }
 
@@ -72,12 +251,18 @@ file_handle_t open_file_handle_for_simultaneous_access(const char* filename) {
 
 void file_handle_close(file_handle_t file_handle) {
   int id = (int)file_handle;
+  // The descriptor belongs to the Python IO object, which gets closed below.
+  python_platform_set_io_backend(id, PYTHON_IO_BACKEND_PYTHON, -1);
   _python_file_close(id);
 }
 
 size_t file_handle_read_at_offset(void* dest, file_handle_t file_handle, u64 offset, size_t bytes_to_read) {
   int id = (int)file_handle;
-  _python_file_set_pos(id, offset);
-  i64 read = _python_file_read_into(id, dest, bytes_to_read);
-  return read;
+  native_io_t* io = get_native_io(id);
+  if (io) {
+    return native_read_at_offset(io, dest, bytes_to_read, (i64)offset);
+  }
+  // Tiles may be read from several threads at once, so the seek and read have
+  // to happen as a single operation on the Python side.
+  return _python_file_read_at_offset(id, dest, bytes_to_read, (i64)offset);
 }
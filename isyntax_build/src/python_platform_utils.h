@@ -7,6 +7,27 @@ Registers Python callback functions for handling I/O operations.
 void init_python_platform_utils(
   bool (*python_file_set_pos)(int id, int64_t offset),
   int64_t (*python_file_read_into)(int id, void* dest, size_t bytes_to_read),
+  int64_t (*python_file_read_at_offset)(int id, void* dest, size_t bytes_to_read, int64_t offset),
   int64_t (*python_file_get_size)(int id),
   void (*python_file_close)(int id)
 );
+
+/*
+Backends that can be used to service reads for a registered I/O handle.
+*/
+enum python_io_backend_t {
+  // Read through the registered Python callbacks.
+  PYTHON_IO_BACKEND_PYTHON = 0,
+  // Read from the underlying file descriptor in C using positional reads.
+  PYTHON_IO_BACKEND_NATIVE = 1,
+  // Map the underlying file into memory and copy reads straight out of the mapping.
+  PYTHON_IO_BACKEND_MMAP = 2,
+};
+
+/*
+Selects the backend used for reads from the registered I/O handle `id`.
+For native backends, `fd` is the file descriptor to read from (it remains owned
+by the Python IO object and is not closed by the C side).
+Returns false if the backend could not be set up for this handle.
+*/
+bool python_platform_set_io_backend(int id, int backend, int fd);
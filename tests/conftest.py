@@ -1,7 +1,61 @@
 from pathlib import Path
 
+import numpy as np
 import pytest
 
+from isyntax import ISyntax
+
+
+class FakeSlide:
+    """A 37x29 level with 8x8 tiles, whose grid is offset by 5 pixels.
+
+    Only the tiles in the top left quarter of the tile grid are stored. Pixels are a
+    function of their position in the level (see `pixels`), and the tiles that are
+    decoded are recorded in `decoded`.
+    """
+
+    tile_width = tile_height = 8
+    level_tiles = ((6, 5),)
+    level_dimensions = ((37, 29),)
+    iter_strips = ISyntax.iter_strips
+    _read_tile_row = ISyntax._read_tile_row  # noqa: SLF001
+
+    def __init__(self) -> None:
+        self.decoded: list[tuple[int, int]] = []
+
+    @staticmethod
+    def pixels(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Gets the RGB pixels at level positions (xs, ys)."""
+        return np.stack([xs % 256, ys % 256, (xs * 7 + ys) % 256], axis=-1).astype(np.uint8)
+
+    def tile_offset(self, level: int) -> int:  # noqa: ARG002
+        return 5
+
+    def tile_mask(self, level: int) -> np.ndarray:  # noqa: ARG002
+        mask = np.zeros((5, 6), dtype=np.bool_)
+        mask[:2, :3] = True
+        return mask
+
+    def read_tiles(
+        self,
+        coords: np.ndarray,
+        level: int = 0,  # noqa: ARG002
+        out: np.ndarray | None = None,
+        pixel_format: str = "RGB",  # noqa: ARG002
+    ) -> np.ndarray:
+        self.decoded.extend(map(tuple, np.asarray(coords).tolist()))
+        ys, xs = np.mgrid[0:8, 0:8]
+        tiles = np.stack([self.pixels(tx * 8 - 5 + xs, ty * 8 - 5 + ys) for tx, ty in coords])
+        if out is None:
+            return tiles
+        out[:] = tiles
+        return out
+
+
+@pytest.fixture
+def fake_slide() -> FakeSlide:
+    return FakeSlide()
+
 
 @pytest.fixture
 def test_data_dir() -> Path:
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+from pytest_mock import MockerFixture
+
+from isyntax import AsyncISyntax, ISyntax
+
+
+class SlowSlide:
+    """Stands in for an `ISyntax` whose reads take a while."""
+
+    def __init__(self, mocker: MockerFixture) -> None:
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.isyntax = mocker.create_autospec(ISyntax, instance=True)
+        self.isyntax.read_tile.side_effect = self.read_tile
+        self.isyntax.close.side_effect = self.close
+
+    def read_tile(self, *_: object) -> np.ndarray:
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return np.zeros((1, 1, 4), dtype=np.uint8)
+
+    def close(self) -> None:
+        assert self.active == 0
+
+
+@pytest.fixture
+def executor() -> Iterator[ThreadPoolExecutor]:
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        yield executor
+
+
+def test_read_tile(sample_isyntax_file: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        expected = isyntax.read_tile(1, 1, level=4)
+
+    async def read() -> np.ndarray:
+        async with await AsyncISyntax.open(sample_isyntax_file) as slide:
+            return await slide.read_tile(1, 1, level=4)
+
+    np.testing.assert_array_equal(asyncio.run(read()), expected)
+
+
+def test_limits_concurrency(mocker: MockerFixture, executor: ThreadPoolExecutor) -> None:
+    slow_slide = SlowSlide(mocker)
+
+    async def read() -> None:
+        async with AsyncISyntax(slow_slide.isyntax, 2, executor) as slide:
+            await asyncio.gather(*(slide.read_tile(x, 0) for x in range(8)))
+
+    asyncio.run(read())
+    assert slow_slide.peak == 2  # noqa: PLR2004
+
+
+def test_cancel_and_close(mocker: MockerFixture, executor: ThreadPoolExecutor) -> None:
+    slow_slide = SlowSlide(mocker)
+
+    async def read() -> None:
+        slide = AsyncISyntax(slow_slide.isyntax, 2, executor)
+        tasks = [asyncio.create_task(slide.read_tile(x, 0)) for x in range(8)]
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        # Waits for the reads that were already running.
+        await slide.close()
+        with pytest.raises(ValueError, match="closed"):
+            await slide.read_tile(0, 0)
+
+    asyncio.run(read())
+    slow_slide.isyntax.close.assert_called_once()
+    assert slow_slide.isyntax.read_tile.call_count == 2  # noqa: PLR2004
+
+
+def test_invalid_max_concurrency(mocker: MockerFixture) -> None:
+    with pytest.raises(ValueError, match="max_concurrency"):
+        AsyncISyntax(mocker.create_autospec(ISyntax, instance=True), 0)
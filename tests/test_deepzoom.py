@@ -0,0 +1,44 @@
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from isyntax import ISyntax
+from isyntax.deepzoom import DeepZoomGenerator, _dzi_level_dimensions
+
+
+def test_dzi_level_dimensions() -> None:
+    dimensions = _dzi_level_dimensions(1000, 500)
+    assert len(dimensions) == 11  # noqa: PLR2004
+    assert dimensions[0] == (1, 1)
+    assert dimensions[-3:] == [(250, 125), (500, 250), (1000, 500)]
+
+
+def test_get_tile_pixels(sample_isyntax_file: Path) -> None:
+    pytest.importorskip("PIL")
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        dz = DeepZoomGenerator(isyntax, tile_size=254, overlap=1)
+        assert dz.level_dimensions[-1] == isyntax.dimensions
+        # Deep Zoom level that matches slide level 3.
+        level = dz.level_count - 4
+        x, y, width, height = dz._tile_region(level, 2, 1)  # noqa: SLF001
+        assert (x, y, width, height) == (507, 253, 256, 256)
+        expected = isyntax.read_region(x, y, width, height, level=3, pixel_format="RGB")
+        np.testing.assert_array_equal(dz.get_tile_pixels(level, 2, 1), expected)
+        # Levels below the top of the slide are resampled.
+        assert dz.get_tile_pixels(0, 0, 0).shape == (1, 1, 3)
+        with pytest.raises(ValueError, match="invalid tile"):
+            dz.get_tile_pixels(level, *dz.level_tiles[level])
+
+
+def test_get_tile(sample_isyntax_file: Path) -> None:
+    pil_image = pytest.importorskip("PIL.Image")
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        dz = DeepZoomGenerator(isyntax, tile_format="png")
+        level = dz.level_count - 4
+        data = dz.get_tile(level, 2, 1)
+        assert dz.get_tile(level, 2, 1) is data
+        decoded = np.asarray(pil_image.open(io.BytesIO(data)))
+        np.testing.assert_array_equal(decoded, dz.get_tile_pixels(level, 2, 1))
+        assert 'TileSize="254"' in dz.get_dzi()
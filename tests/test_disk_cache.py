@@ -0,0 +1,132 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from isyntax import DiskTileCache, ISyntax, ISyntaxCache
+
+
+def _random_tile(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (16, 16, 3), dtype=np.uint8)
+
+
+def test_put_and_get(tmp_path: Path) -> None:
+    disk_cache = DiskTileCache(tmp_path, max_bytes=1 << 20)
+    tile = _random_tile(0)
+    disk_cache.put("slide", 2, 3, 4, tile)
+    np.testing.assert_array_equal(disk_cache.get("slide", 2, 3, 4), tile)
+    assert disk_cache.get("slide", 2, 4, 3) is None
+    assert disk_cache.get("other", 2, 3, 4) is None
+
+
+def test_persists(tmp_path: Path) -> None:
+    tile = _random_tile(0)
+    DiskTileCache(tmp_path, max_bytes=1 << 20).put("slide", 0, 0, 0, tile)
+    disk_cache = DiskTileCache(tmp_path, max_bytes=1 << 20)
+    assert len(disk_cache) == 1
+    assert disk_cache.total_bytes > 0
+    np.testing.assert_array_equal(disk_cache.get("slide", 0, 0, 0), tile)
+
+
+def test_evicts_least_recently_used(tmp_path: Path) -> None:
+    disk_cache = DiskTileCache(tmp_path, max_bytes=1 << 20)
+    disk_cache.put("slide", 0, 0, 0, _random_tile(0))
+    tile_bytes = disk_cache.total_bytes
+    max_tiles = 2
+    # Room for half a tile more, so that evicting down to the low-water mark keeps two.
+    disk_cache.max_bytes = max_tiles * tile_bytes + tile_bytes // 2
+    disk_cache.put("slide", 0, 1, 0, _random_tile(1))
+    assert disk_cache.get("slide", 0, 0, 0) is not None
+    disk_cache.put("slide", 0, 2, 0, _random_tile(2))
+    assert len(disk_cache) == max_tiles
+    assert disk_cache.total_bytes <= disk_cache.max_bytes
+    assert disk_cache.get("slide", 0, 0, 0) is not None
+    assert disk_cache.get("slide", 0, 1, 0) is None
+
+
+def test_shared_between_instances(tmp_path: Path) -> None:
+    # Each instance stands in for a process sharing the cache directory.
+    first = DiskTileCache(tmp_path, max_bytes=1 << 20)
+    first.put("slide", 0, 0, 0, _random_tile(0))
+    tile_bytes = first.total_bytes
+    max_tiles = 2
+    first.max_bytes = max_tiles * tile_bytes + tile_bytes // 2
+    second = DiskTileCache(tmp_path, max_bytes=first.max_bytes)
+    second.put("slide", 0, 1, 0, _random_tile(1))
+    first.put("slide", 0, 2, 0, _random_tile(2))
+    second.put("slide", 0, 3, 0, _random_tile(3))
+    for disk_cache in (first, second):
+        assert len(disk_cache) == max_tiles
+        assert disk_cache.total_bytes == max_tiles * tile_bytes
+    assert second.get("slide", 0, 0, 0) is None
+    assert first.get("slide", 0, 3, 0) is not None
+
+
+def test_evicts_to_low_water_mark(tmp_path: Path) -> None:
+    disk_cache = DiskTileCache(tmp_path, max_bytes=1 << 20)
+    disk_cache.put("slide", 0, 0, 0, _random_tile(0))
+    tile_bytes = disk_cache.total_bytes
+    disk_cache.max_bytes = 10 * tile_bytes
+    for x in range(1, 11):
+        disk_cache.put("slide", 0, x, 0, _random_tile(x))
+    # Evicting once makes room for the next writes, rather than for a single tile.
+    assert len(disk_cache) == 9  # noqa: PLR2004
+    assert disk_cache.total_bytes == 9 * tile_bytes
+    assert disk_cache.get("slide", 0, 10, 0) is not None
+
+
+def test_evict_deletes_stale_temporary_files(tmp_path: Path) -> None:
+    disk_cache = DiskTileCache(tmp_path, max_bytes=1 << 20)
+    disk_cache.put("slide", 0, 0, 0, _random_tile(0))
+    (tile_dir,) = (path for path in tmp_path.iterdir() if path.is_dir())
+    stale, fresh = tile_dir / "stale.tmp", tile_dir / "fresh.tmp"
+    stale.write_bytes(b"partial")
+    fresh.write_bytes(b"partial")
+    os.utime(stale, (0, 0))
+    disk_cache.max_bytes = disk_cache.total_bytes
+    disk_cache.put("slide", 0, 1, 0, _random_tile(1))
+    assert not stale.exists()
+    # Possibly being written by another process.
+    assert fresh.exists()
+
+
+def test_clear(tmp_path: Path) -> None:
+    disk_cache = DiskTileCache(tmp_path, max_bytes=1 << 20)
+    disk_cache.put("slide", 0, 0, 0, _random_tile(0))
+    disk_cache.clear()
+    assert len(disk_cache) == 0
+    assert disk_cache.total_bytes == 0
+    assert disk_cache.get("slide", 0, 0, 0) is None
+
+
+def test_png_codec(tmp_path: Path) -> None:
+    pytest.importorskip("PIL")
+    disk_cache = DiskTileCache(tmp_path, max_bytes=1 << 20, codec="png")
+    tile = _random_tile(0)
+    disk_cache.put("slide", 0, 0, 0, tile)
+    np.testing.assert_array_equal(disk_cache.get("slide", 0, 0, 0), tile)
+
+
+def test_unknown_codec(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="unknown disk cache codec"):
+        DiskTileCache(tmp_path, max_bytes=1 << 20, codec="webp")  # type: ignore[arg-type]
+
+
+def test_read_through_disk_cache(sample_isyntax_file: Path, tmp_path: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        expected = isyntax.read_tiles([(0, 0), (1, 0)], level=4, pixel_format="BGRA")
+        fingerprint = isyntax.fingerprint
+    disk_cache = DiskTileCache(tmp_path, max_bytes=1 << 30)
+    for _ in range(2):
+        cache = ISyntaxCache(disk_cache=disk_cache)
+        with ISyntax.open(sample_isyntax_file, cache=cache) as isyntax:
+            assert isyntax.fingerprint == fingerprint
+            tiles = isyntax.read_tiles([(0, 0), (1, 0)], level=4, pixel_format="BGRA")
+            np.testing.assert_array_equal(tiles, expected)
+            np.testing.assert_array_equal(
+                isyntax.read_tile(1, 0, level=4)[..., 2::-1], expected[1, ..., :3]
+            )
+    assert disk_cache.get(fingerprint, 4, 0, 0) is not None
+    # The second slide was read entirely from the disk cache.
+    assert cache.stats().misses == 0
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from isyntax import ISyntax
+from isyntax.extract import _check_pixel_format, _row_blocks, extract_tiles, main
+
+
+def test_row_blocks() -> None:
+    done = np.array([True, False, False, False, True, False, True, False])
+    assert _row_blocks(done, 2) == [(1, 3), (3, 4), (5, 6), (7, 8)]
+    assert _row_blocks(np.ones(3, dtype=np.bool_), 2) == []
+
+
+def test_check_pixel_format(tmp_path: Path) -> None:
+    _check_pixel_format(tmp_path, "RGB")
+    _check_pixel_format(tmp_path, "RGB")
+    # Same number of channels, but rows that are done have the other channel order.
+    with pytest.raises(ValueError, match="are RGB, not BGR"):
+        _check_pixel_format(tmp_path, "BGR")
+
+
+def test_rejects_duplicate_slide_names(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="unique"):
+        extract_tiles([tmp_path / "a/slide.isyntax", tmp_path / "b/slide.isyntax"], tmp_path)
+
+
+def test_extract_tiles(sample_isyntax_file: Path, tmp_path: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        level = isyntax.level_count - 1
+        width_in_tiles, height_in_tiles = isyntax.level_tiles[level]
+        coords = [(x, y) for y in range(height_in_tiles) for x in range(width_in_tiles)]
+        expected = isyntax.read_tiles(coords, level, pixel_format="RGB")
+    tile_count = width_in_tiles * height_in_tiles
+
+    calls: list[tuple[int, int]] = []
+    n_decoded = extract_tiles(
+        [sample_isyntax_file],
+        tmp_path,
+        levels=[level],
+        workers=1,
+        tiles_per_task=1,
+        progress=lambda done, total: calls.append((done, total)),
+    )
+    assert n_decoded == tile_count
+    assert calls[0] == (0, tile_count)
+    assert calls[-1] == (tile_count, tile_count)
+    output = tmp_path / sample_isyntax_file.stem / f"level_{level}.npy"
+    tiles = np.load(output)
+    np.testing.assert_array_equal(tiles.reshape(expected.shape), expected)
+
+    # Everything is done, so resuming does nothing.
+    assert extract_tiles([sample_isyntax_file], tmp_path, levels=[level], workers=1) == 0
+    # Only rows that are not done are decoded again.
+    done = np.load(output.with_suffix(".done.npy"), mmap_mode="r+")
+    done[0] = False
+    done.flush()
+    del done
+    assert main([str(sample_isyntax_file), "--output", str(tmp_path), "--levels", str(level)]) == 0
+    assert np.load(output.with_suffix(".done.npy")).all()
+    with pytest.raises(ValueError, match="not BGR"):
+        extract_tiles([sample_isyntax_file], tmp_path, levels=[level], pixel_format="BGR")
@@ -1,11 +1,13 @@
+import io
 from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
 from pytest_mock import MockerFixture
 
 from isyntax.lowlevel import libisyntax
-from isyntax.lowlevel.io_management import ByHandleRegistry
+from isyntax.lowlevel.io_management import ByHandleRegistry, SizedIO, register_io
 from isyntax.lowlevel.libisyntax import (
     ISyntaxCachePtr,
     ISyntaxImagePtr,
@@ -49,6 +51,27 @@ def test_libisyntax_open_nonexistent_file() -> None:
         libisyntax.open_from_filename("this_file_does_not_exist.isyntax")
 
 
+def test_libisyntax_open_from_index(sample_isyntax_file: Path, isyntax: ISyntaxPtr) -> None:
+    index = libisyntax.write_index(isyntax)
+    f = sample_isyntax_file.open("rb")
+    handle = register_io(f, sample_isyntax_file.stat().st_size)
+    reopened = libisyntax.open_from_index(handle, index)
+    try:
+        assert libisyntax.write_index(reopened) == index
+    finally:
+        libisyntax.close(reopened)
+
+
+def test_libisyntax_open_from_invalid_index(sample_isyntax_file: Path) -> None:
+    f = sample_isyntax_file.open("rb")
+    handle = register_io(f, sample_isyntax_file.stat().st_size)
+    try:
+        with pytest.raises(libisyntax.LibISyntaxInvalidArgumentError):
+            libisyntax.open_from_index(handle, b"not an index")
+    finally:
+        f.close()
+
+
 def test_libisyntax_get_tile_width(isyntax: ISyntaxPtr) -> None:
     expected = 256
     assert libisyntax.get_tile_width(isyntax) == expected
@@ -114,6 +137,37 @@ def test_libisyntax_cache_create_destroy() -> None:
     libisyntax.cache_destroy(isyntax_cache)
 
 
+def test_libisyntax_cache_get_stats() -> None:
+    isyntax_cache = libisyntax.cache_create("test_cache", 2000, max_bytes=1 << 30)
+    try:
+        totals, levels = libisyntax.cache_get_stats(isyntax_cache)
+    finally:
+        libisyntax.cache_destroy(isyntax_cache)
+    assert totals == {
+        "resident_tiles": 0,
+        "resident_bytes": 0,
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+    }
+    expected_level_count = 16
+    assert len(levels) == expected_level_count
+
+
+def test_libisyntax_cache_create_invalid_size() -> None:
+    with pytest.raises(libisyntax.LibISyntaxInvalidArgumentError):
+        libisyntax.cache_create("test_cache", -1)
+
+
+def test_libisyntax_cache_resize_invalid_size() -> None:
+    isyntax_cache = libisyntax.cache_create("test_cache", 2000)
+    try:
+        with pytest.raises(libisyntax.LibISyntaxInvalidArgumentError):
+            libisyntax.cache_resize(isyntax_cache, 2000, max_bytes=-1)
+    finally:
+        libisyntax.cache_destroy(isyntax_cache)
+
+
 def test_libisyntax_tile_read(isyntax: ISyntaxPtr, isyntax_cache: ISyntaxCachePtr) -> None:
     rgba = bytearray(256 * 256 * 4)
     libisyntax.tile_read(
@@ -151,6 +205,24 @@ def test_libisyntax_read_region(isyntax: ISyntaxPtr, isyntax_cache: ISyntaxCache
     assert actual == expected
 
 
+def test_libisyntax_read_region_rgb(isyntax: ISyntaxPtr, isyntax_cache: ISyntaxCachePtr) -> None:
+    rgb = bytearray(3)
+    libisyntax.read_region(
+        isyntax,
+        isyntax_cache,
+        4,
+        500,
+        500,
+        1,
+        1,
+        rgb,
+        libisyntax.ISyntaxPixelFormat.RGB,
+    )
+    actual = tuple(rgb)
+    expected = (226, 226, 229)
+    assert actual == expected
+
+
 def test_libisyntax_read_label_image_jpeg(isyntax: ISyntaxPtr, mocker: MockerFixture) -> None:
     free_spy = mocker.spy(libisyntax, "free")
     buf = libisyntax.read_label_image_jpeg(isyntax)
@@ -214,3 +286,21 @@ class TestByHandleRegistry:
         registry.add("F")
         assert registry.pop(1) == "A"
         assert list(registry.items()) == [(2, "B"), (3, "F")]
+
+
+class TestSizedIO:
+    def test_read_at_offset_from_multiple_threads(self) -> None:
+        data = bytes(range(256)) * 64
+        sized_io = SizedIO(io.BytesIO(data), len(data))
+        chunk_size = 16
+
+        def read_chunk(offset: int) -> bytes:
+            buf = bytearray(chunk_size)
+            sized_io.read_at_offset(memoryview(buf), offset)
+            return bytes(buf)
+
+        offsets = list(range(0, len(data), chunk_size)) * 8
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            chunks = list(executor.map(read_chunk, offsets))
+        for offset, chunk in zip(offsets, chunks, strict=True):
+            assert chunk == data[offset : offset + chunk_size]
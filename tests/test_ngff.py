@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from isyntax import ISyntax
+from isyntax.ngff import _stored_chunks, _write_level
+
+if TYPE_CHECKING:
+    from tests.conftest import FakeSlide
+
+
+def test_stored_chunks(fake_slide: "FakeSlide") -> None:
+    stored = _stored_chunks(fake_slide, 0, (8, 8))  # type: ignore[arg-type]
+    # Stored tiles cover pixels [0, 19) x [0, 11) of the level.
+    expected = np.zeros((4, 5), dtype=np.bool_)
+    expected[:2, :3] = True
+    np.testing.assert_array_equal(stored, expected)
+
+
+def test_read_fully_stored_tile_row(fake_slide: "FakeSlide") -> None:
+    # The stored tiles of a row are decoded straight into the row's buffer.
+    cols = np.arange(3)
+    mask = fake_slide.tile_mask(0)
+    strip = ISyntax._read_tile_row(fake_slide, 0, 1, cols, "RGB", mask)  # type: ignore[arg-type]  # noqa: SLF001
+    ys, xs = np.mgrid[3:11, -5:19]
+    np.testing.assert_array_equal(strip, fake_slide.pixels(xs, ys))
+    assert fake_slide.decoded == [(0, 1), (1, 1), (2, 1)]
+
+
+@pytest.mark.parametrize("chunk_size", [(8, 8), (16, 24)])
+def test_write_level(fake_slide: "FakeSlide", chunk_size: tuple[int, int]) -> None:
+    array = np.full((3, 29, 37), 255, dtype=np.uint8)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        _write_level(fake_slide, 0, array, chunk_size, executor, 4)  # type: ignore[arg-type]
+    # Chunks are not aligned to the tile grid, but each stored tile is decoded once.
+    assert sorted(fake_slide.decoded) == [(x, y) for x in range(3) for y in range(2)]
+    ys, xs = np.mgrid[0:29, 0:37]
+    expected = np.full((29, 37, 3), 255, dtype=np.uint8)
+    expected[:11, :19] = fake_slide.pixels(xs, ys)[:11, :19]
+    np.testing.assert_array_equal(np.moveaxis(array, 0, -1), expected)
+
+
+def test_to_zarr(sample_isyntax_file: Path, tmp_path: Path) -> None:
+    zarr = pytest.importorskip("zarr")
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        isyntax.to_zarr(tmp_path / "slide.zarr", levels=[3, 5])
+        expected = isyntax.read_region(0, 0, *isyntax.level_dimensions[5], level=5)
+        group = zarr.open_group(tmp_path / "slide.zarr", mode="r")
+        (multiscales,) = group.attrs["multiscales"]
+        assert [dataset["path"] for dataset in multiscales["datasets"]] == ["3", "5"]
+        assert group["3"].chunks == (3, isyntax.tile_height, isyntax.tile_width)
+        np.testing.assert_array_equal(np.moveaxis(group["5"][:], 0, -1), expected[..., :3])
+        with pytest.raises(ValueError, match="multiple of the tile size"):
+            isyntax.to_zarr(tmp_path / "other.zarr", chunk=(100, 100))
@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from isyntax import ISyntax
+from isyntax.openslide_compat import ISyntaxSlide, _best_level_for_downsample
+
+
+def test_best_level_for_downsample() -> None:
+    downsamples = (1.0, 2.0, 4.0, 8.0)
+    assert _best_level_for_downsample(downsamples, 0.5) == 0
+    assert _best_level_for_downsample(downsamples, 1.0) == 0
+    assert _best_level_for_downsample(downsamples, 3.9) == 1
+    assert _best_level_for_downsample(downsamples, 4.0) == 2  # noqa: PLR2004
+    assert _best_level_for_downsample(downsamples, 100.0) == 3  # noqa: PLR2004
+
+
+def test_geometry_and_properties(sample_isyntax_file: Path) -> None:
+    pytest.importorskip("PIL")
+    with ISyntaxSlide(sample_isyntax_file) as slide, ISyntax.open(sample_isyntax_file) as isyntax:
+        assert slide.level_count == isyntax.level_count
+        assert slide.dimensions == isyntax.dimensions
+        assert slide.level_dimensions == tuple(isyntax.level_dimensions)
+        assert slide.level_downsamples == tuple(float(d) for d in isyntax.level_downsamples)
+        assert slide.properties["openslide.vendor"] == "philips"
+        assert float(slide.properties["openslide.mpp-x"]) == isyntax.mpp_x
+        assert slide.properties["openslide.level[1].downsample"] == "2.0"
+        assert slide.get_best_level_for_downsample(3) == 1
+        assert set(slide.associated_images) <= {"label", "macro"}
+
+
+def test_read_region(sample_isyntax_file: Path) -> None:
+    pytest.importorskip("PIL")
+    with ISyntaxSlide(sample_isyntax_file) as slide:
+        image = slide.read_region((400, 200), 1, (64, 32))
+        assert image.mode == "RGBA"
+        assert image.size == (64, 32)
+        expected = slide.isyntax.read_region(200, 100, 64, 32, level=1)
+        np.testing.assert_array_equal(np.asarray(image), expected)
+        # Pixels outside of the level are transparent.
+        width, height = slide.level_dimensions[0]
+        pixels = slide.read_region_array((width - 8, height - 8), 0, (16, 16))
+        assert (pixels[8:, :] == 0).all()
+        assert (pixels[:, 8:] == 0).all()
+        assert (pixels[:8, :8, 3] == 255).all()  # noqa: PLR2004
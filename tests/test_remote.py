@@ -0,0 +1,146 @@
+import os
+import re
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from isyntax import HTTPRangeSource, ISyntax, RangedFile
+
+
+class RangeServer(ThreadingHTTPServer):
+    """Local stand-in for object storage, which serves a file with range requests."""
+
+    def __init__(self, data: bytes, *, support_ranges: bool = True) -> None:
+        super().__init__(("127.0.0.1", 0), RangeRequestHandler)
+        self.data = data
+        self.support_ranges = support_ranges
+        self.ranges: list[tuple[int, int]] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host!s}:{port}/slide.isyntax"
+
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    server: RangeServer
+
+    def do_GET(self) -> None:  # noqa: N802
+        data = self.server.data
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if not self.server.support_ranges or match is None:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        start, end = int(match[1]), min(int(match[2]), len(data) - 1)
+        self.server.ranges.append((start, end + 1))
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.send_header("Content-Length", str(end + 1 - start))
+        self.end_headers()
+        self.wfile.write(data[start : end + 1])
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+
+def serve(data: bytes, *, support_ranges: bool = True) -> Iterator[RangeServer]:
+    server = RangeServer(data, support_ranges=support_ranges)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+
+@pytest.fixture
+def data() -> bytes:
+    return os.urandom(100_000)
+
+
+@pytest.fixture
+def server(data: bytes) -> Iterator[RangeServer]:
+    yield from serve(data)
+
+
+def test_read(server: RangeServer, data: bytes) -> None:
+    f = RangedFile.from_url(server.url, block_size=1000, prefetch_bytes=0)
+    assert f.size == len(data)
+    assert f.read(10) == data[:10]
+    f.seek(54_321)
+    assert f.read(5000) == data[54_321:59_321]
+    f.seek(-10, os.SEEK_END)
+    assert f.read(100) == data[-10:]
+    assert f.read(100) == b""
+
+
+def test_coalesces_reads(server: RangeServer, data: bytes) -> None:
+    f = RangedFile.from_url(server.url, block_size=1000, readahead_blocks=4, prefetch_bytes=0)
+    server.ranges.clear()
+    # Consecutive small reads are served by a single request with read-ahead.
+    chunks = [f.read(100) for _ in range(50)]
+    assert b"".join(chunks) == data[:5000]
+    assert server.ranges == [(0, 5000)]
+    # Only the missing blocks are fetched, as a single range.
+    buf = bytearray(8000)
+    assert f.readinto_at(buf, 2000) == len(buf)
+    assert buf == data[2000:10_000]
+    assert server.ranges[1:] == [(5000, 14_000)]
+    assert f.request_count == len(server.ranges)
+
+
+def test_evicts_least_recently_used_blocks(server: RangeServer, data: bytes) -> None:
+    f = RangedFile.from_url(
+        server.url,
+        block_size=1000,
+        cache_bytes=3000,
+        readahead_blocks=0,
+        prefetch_bytes=0,
+    )
+    for offset in (0, 1000, 2000, 0, 3000):
+        f.seek(offset)
+        f.read(1000)
+    server.ranges.clear()
+    f.seek(0)
+    assert f.read(1000) == data[:1000]
+    f.seek(1000)
+    assert f.read(1000) == data[1000:2000]
+    # Block 0 was used recently and stayed cached, whereas block 1 was evicted.
+    assert server.ranges == [(1000, 2000)]
+
+
+def test_prefetch(server: RangeServer, data: bytes) -> None:
+    f = RangedFile.from_url(server.url, block_size=1000, prefetch_bytes=20_000, max_workers=4)
+    # The first request is for the size of the file.
+    assert sorted(server.ranges[1:]) == [
+        (0, 5000),
+        (5000, 10_000),
+        (10_000, 15_000),
+        (15_000, 20_000),
+    ]
+    assert f.read(20_000) == data[:20_000]
+    assert f.request_count == 4  # noqa: PLR2004
+
+
+def test_requires_range_support(data: bytes) -> None:
+    for server in serve(data, support_ranges=False):
+        with pytest.raises(OSError, match="range requests"):
+            HTTPRangeSource(server.url).get_size()
+
+
+def test_read_tile_over_http(sample_isyntax_file: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        expected = isyntax.read_tile(1, 1, level=3)
+    for server in serve(sample_isyntax_file.read_bytes()):
+        f = RangedFile.from_url(server.url)
+        with ISyntax(f, f.size) as isyntax:
+            np.testing.assert_array_equal(isyntax.read_tile(1, 1, level=3), expected)
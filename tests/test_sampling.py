@@ -0,0 +1,110 @@
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from isyntax import ISyntax
+from isyntax.sampling import (
+    PatchDataset,
+    PatchGrid,
+    _pair,
+    _tissue_fraction,
+    best_level_for_mpp,
+    iter_patches,
+    patch_grid,
+)
+
+
+def test_pair() -> None:
+    assert _pair(224) == (224, 224)
+    assert _pair(np.int64(224)) == (224, 224)
+    assert type(_pair(np.int64(224))[0]) is int
+    assert _pair((224, 112)) == (224, 112)
+
+
+def test_tissue_fraction() -> None:
+    mask = np.zeros((4, 4), dtype=np.bool_)
+    mask[:2, :2] = True
+    boxes = np.array([[0, 0, 20, 20], [0, 0, 40, 40], [20, 20, 40, 40]])
+    np.testing.assert_allclose(_tissue_fraction(mask, (10.0, 10.0), boxes), [1, 0.25, 0])
+
+
+def test_best_level_for_mpp(sample_isyntax_file: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        assert best_level_for_mpp(isyntax, isyntax.mpp_x) == 0
+        assert best_level_for_mpp(isyntax, isyntax.mpp_x * 4) == 2  # noqa: PLR2004
+        assert best_level_for_mpp(isyntax, isyntax.mpp_x * 5) == 2  # noqa: PLR2004
+        with pytest.raises(ValueError, match="finer"):
+            best_level_for_mpp(isyntax, isyntax.mpp_x / 2)
+
+
+def test_iter_patches_tile_aligned(sample_isyntax_file: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        grid = patch_grid(isyntax, isyntax.tile_width, isyntax.mpp_x * 8, tissue_mask="stored")
+        assert grid.level == 3  # noqa: PLR2004
+        assert not grid.is_resampled
+        assert 0 < len(grid) < np.prod(isyntax.level_tiles[3])
+        batches = list(iter_patches(isyntax, grid, batch_size=5, workers=2))
+        coords = np.concatenate([coords for coords, _ in batches])
+        np.testing.assert_array_equal(coords, grid.coords_level0)
+        x, y = grid.coords[-1]
+        expected = isyntax.read_region(x, y, *grid.read_size, level=3, pixel_format="RGB")
+        np.testing.assert_array_equal(batches[-1][1][-1], expected)
+
+
+def test_iter_patches_native_tiles(sample_isyntax_file: Path) -> None:
+    level = 3
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        tile_size = (isyntax.tile_width, isyntax.tile_height)
+        tile_coords = np.argwhere(isyntax.tile_mask(level))[:4, ::-1]
+        # Patches that are exactly the tiles of the level, which starts before its origin.
+        coords = tile_coords * np.array(tile_size) - isyntax.tile_offset(level)
+        downsample = isyntax.level_downsamples[level]
+        grid = PatchGrid(level, coords, tile_size, tile_size, downsample)
+        ((_, pixels),) = iter_patches(isyntax, grid, batch_size=len(grid), workers=1)
+        for (tile_x, tile_y), patch in zip(tile_coords.tolist(), pixels, strict=True):
+            expected = isyntax.read_tile(tile_x, tile_y, level, pixel_format="RGB")
+            np.testing.assert_array_equal(patch, expected)
+
+
+def test_patch_grid_stored_tiles(sample_isyntax_file: Path) -> None:
+    level = 3
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        grid = patch_grid(
+            isyntax, 64, isyntax.mpp_x * 8, stride=32, tissue_mask="stored", min_tissue=1
+        )
+        assert grid.level == level
+        assert len(grid) > 0
+        mask = isyntax.tile_mask(level)
+        tile_size = np.array([isyntax.tile_width, isyntax.tile_height])
+        first = (grid.coords + isyntax.tile_offset(level)) // tile_size
+        last = (grid.coords + isyntax.tile_offset(level) + 63) // tile_size
+        for (x0, y0), (x1, y1) in zip(first.tolist(), last.tolist(), strict=True):
+            assert mask[y0 : y1 + 1, x0 : x1 + 1].all()
+
+
+def test_iter_patches_resampled(sample_isyntax_file: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        grid = patch_grid(isyntax, 100, isyntax.mpp_x * 12)
+        assert grid.level == 3  # noqa: PLR2004
+        assert grid.read_size == (150, 150)
+        (_, pixels), *_ = iter_patches(isyntax, grid, batch_size=2)
+        assert pixels.shape == (2, 100, 100, 3)
+        x, y = grid.coords_level0[1]
+        expected = isyntax.read_region_scaled(
+            x, y, 1200, 1200, (100, 100), pixel_format="RGB", level=3
+        )
+        np.testing.assert_array_equal(pixels[1], expected)
+
+
+def test_patch_dataset(sample_isyntax_file: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        grid = patch_grid(isyntax, 64, isyntax.mpp_x * 16)
+        dataset = PatchDataset(isyntax, grid)
+        assert len(dataset) == len(grid)
+        expected = dataset[-1]
+        assert expected.shape == (64, 64, 3)
+        np.testing.assert_array_equal(pickle.loads(pickle.dumps(dataset))[-1], expected)  # noqa: S301
+        with pytest.raises(IndexError):
+            dataset[len(dataset)]
@@ -0,0 +1,40 @@
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from isyntax import ISyntax
+from isyntax.tiff import _iter_tiles
+
+if TYPE_CHECKING:
+    from tests.conftest import FakeSlide
+
+
+@pytest.mark.parametrize("region", [(0, 0, 37, 29), (3, 4, 20, 11), (30, 20, 7, 9)])
+def test_iter_tiles(fake_slide: "FakeSlide", region: tuple[int, int, int, int]) -> None:
+    x, y, width, height = region
+    tiles = list(_iter_tiles(fake_slide, 0, region))  # type: ignore[arg-type]
+    cols, rows = -(-width // 8), -(-height // 8)
+    assert len(tiles) == cols * rows
+    image = np.concatenate(
+        [np.concatenate(tiles[row * cols : (row + 1) * cols], axis=1) for row in range(rows)]
+    )
+    ys, xs = np.mgrid[y : y + height, x : x + width]
+    np.testing.assert_array_equal(image[:height, :width], fake_slide.pixels(xs, ys))
+
+
+def test_export_tiff(sample_isyntax_file: Path, tmp_path: Path) -> None:
+    tifffile = pytest.importorskip("tifffile")
+    path = tmp_path / "slide.ome.tif"
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        region = (1000, 2000, 3000, 1500)
+        isyntax.export_tiff(path, levels=[1, 3], region=region, compression="deflate")
+        expected = isyntax.read_region(500, 1000, 1500, 750, level=1, pixel_format="RGB")
+        with tifffile.TiffFile(path) as tif:
+            series = tif.series[0]
+            assert len(series.levels) == 2  # noqa: PLR2004
+            np.testing.assert_array_equal(series.levels[0].asarray(), expected)
+            assert series.levels[1].shape == (188, 375, 3)
+        with pytest.raises(ValueError, match="increasing order"):
+            isyntax.export_tiff(path, levels=[3, 1])
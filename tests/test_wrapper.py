@@ -1,13 +1,22 @@
 import gc
 import io
-from collections.abc import Iterator
+import itertools
+import os
+import pickle
+import threading
+import time
+import warnings
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
 
+import numpy as np
 import pytest
 from pytest_mock import MockerFixture
 
 from isyntax.lowlevel import libisyntax
-from isyntax.wrapper import ISyntax
+from isyntax.wrapper import ISyntax, ISyntaxCache, PixelFormatName, SlideMetadata
 
 
 class TestISyntax:
@@ -96,6 +105,201 @@ class TestISyntax:
         expected = (226, 226, 229, 255)
         assert actual == expected
 
+    def test_read_tile_from_multiple_threads(
+        self,
+        isyntax: ISyntax,
+        sample_isyntax_file: Path,
+    ) -> None:
+        level = 5
+        tiles_x, tiles_y = isyntax.level_tiles[level]
+        coords = [(x, y) for y in range(tiles_y) for x in range(tiles_x)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            actual = list(
+                executor.map(lambda c: isyntax.read_tile(c[0], c[1], level=level), coords)
+            )
+        with ISyntax.open(sample_isyntax_file) as reference:
+            for (x, y), tile in zip(coords, actual, strict=True):
+                np.testing.assert_array_equal(tile, reference.read_tile(x, y, level=level))
+
+    @pytest.mark.parametrize(
+        ("pixel_format", "channels"),
+        [("RGBA", [0, 1, 2, 3]), ("BGRA", [2, 1, 0, 3]), ("RGB", [0, 1, 2]), ("BGR", [2, 1, 0])],
+    )
+    def test_read_tile_pixel_format(
+        self,
+        isyntax: ISyntax,
+        pixel_format: PixelFormatName,
+        channels: list[int],
+    ) -> None:
+        rgba = isyntax.read_tile(1, 2, level=5)
+        actual = isyntax.read_tile(1, 2, level=5, pixel_format=pixel_format)
+        np.testing.assert_array_equal(actual, rgba[..., channels])
+
+    def test_read_region_pixel_format(self, isyntax: ISyntax) -> None:
+        rgba = isyntax.read_region(100, 200, 30, 20, level=2)
+        actual = isyntax.read_region(100, 200, 30, 20, level=2, pixel_format="BGR")
+        np.testing.assert_array_equal(actual, rgba[..., 2::-1])
+
+    def test_unknown_pixel_format(self, isyntax: ISyntax) -> None:
+        with pytest.raises(ValueError, match="unknown pixel format"):
+            isyntax.read_tile(0, 0, pixel_format="CMYK")  # type: ignore[arg-type]
+
+    def test_read_tile_into_out(self, isyntax: ISyntax) -> None:
+        out = np.zeros((isyntax.tile_height, isyntax.tile_width, 4), dtype=np.uint8)
+        actual = isyntax.read_tile(1, 2, level=5, out=out)
+        assert actual is out
+        np.testing.assert_array_equal(out, isyntax.read_tile(1, 2, level=5))
+
+    def test_read_region_into_shared_memory(self, isyntax: ISyntax) -> None:
+        shape = (20, 10, 4)
+        shm = SharedMemory(create=True, size=int(np.prod(shape)))
+        try:
+            view = shm.buf.cast("B", shape)
+            actual = isyntax.read_region(100, 200, 10, 20, level=2, out=view)
+            expected = isyntax.read_region(100, 200, 10, 20, level=2)
+            np.testing.assert_array_equal(np.asarray(view), expected)
+            np.testing.assert_array_equal(actual, expected)
+            del actual
+            view.release()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_read_tile_rejects_read_only_out(self, isyntax: ISyntax) -> None:
+        shape = (isyntax.tile_height, isyntax.tile_width, 4)
+        out = memoryview(bytes(int(np.prod(shape)))).cast("B", shape)
+        with pytest.raises(ValueError, match="writable"):
+            isyntax.read_tile(0, 0, level=5, out=out)
+
+    def test_read_tiles(self, isyntax: ISyntax, sample_isyntax_file: Path) -> None:
+        level = 5
+        # Includes a repeated tile and a tile which is out of bounds.
+        coords = [(1, 2), (0, 0), (1, 3), (1, 2), (100, 0)]
+        actual = isyntax.read_tiles(coords, level=level)
+        assert actual.shape == (len(coords), isyntax.tile_height, isyntax.tile_width, 4)
+        with ISyntax.open(sample_isyntax_file) as reference:
+            for (x, y), tile in zip(coords, actual, strict=True):
+                np.testing.assert_array_equal(tile, reference.read_tile(x, y, level=level))
+
+    def test_read_tiles_does_not_truncate_coords(self, isyntax: ISyntax) -> None:
+        # Truncated to 32 bits, these would be tile (1, 2).
+        coords = np.array([[(1 << 32) + 1, 2], [1, (1 << 32) + 2]], dtype=np.int64)
+        actual = isyntax.read_tiles(coords, level=5)
+        assert (actual == 255).all()  # noqa: PLR2004
+
+    def test_read_tiles_into_out(self, isyntax: ISyntax) -> None:
+        out = np.zeros((2, isyntax.tile_height, isyntax.tile_width, 4), dtype=np.uint8)
+        actual = isyntax.read_tiles(np.array([[0, 0], [1, 1]]), level=5, out=out)
+        assert actual is out
+        np.testing.assert_array_equal(out[1], isyntax.read_tile(1, 1, level=5))
+
+    def test_read_tiles_rejects_bad_out(self, isyntax: ISyntax) -> None:
+        out = np.zeros((1, isyntax.tile_height, isyntax.tile_width, 4), dtype=np.uint8)
+        with pytest.raises(ValueError, match="shape"):
+            isyntax.read_tiles([(0, 0), (1, 1)], level=5, out=out)
+
+    def test_iter_tiles(self, isyntax: ISyntax, sample_isyntax_file: Path) -> None:
+        level = 6
+        tiles_x, tiles_y = isyntax.level_tiles[level]
+        with ISyntax.open(sample_isyntax_file) as reference:
+            coords = []
+            for x, y, tile in isyntax.iter_tiles(level, prefetch=3):
+                np.testing.assert_array_equal(tile, reference.read_tile(x, y, level=level))
+                coords.append((x, y))
+        assert coords == [(x, y) for y in range(tiles_y) for x in range(tiles_x)]
+
+    def test_iter_tiles_hilbert_region(self, isyntax: ISyntax) -> None:
+        region = (3, 5, 8, 8)
+        coords = [(x, y) for x, y, _ in isyntax.iter_tiles(5, region=region, order="hilbert")]
+        assert sorted(coords) == sorted((x, y) for y in range(5, 13) for x in range(3, 11))
+        # Consecutive tiles of a Hilbert curve over a square are always adjacent.
+        for (x0, y0), (x1, y1) in itertools.pairwise(coords):
+            assert abs(x1 - x0) + abs(y1 - y0) == 1
+
+    def test_tile_mask(self, isyntax: ISyntax) -> None:
+        level = 5
+        mask = isyntax.tile_mask(level)
+        tiles_x, tiles_y = isyntax.level_tiles[level]
+        assert mask.shape == (tiles_y, tiles_x)
+        assert mask.dtype == np.bool_
+        for y in range(tiles_y):
+            for x in range(tiles_x):
+                assert isyntax.tile_exists(x, y, level) == mask[y, x]
+
+    def test_tile_exists_out_of_bounds(self, isyntax: ISyntax) -> None:
+        assert not isyntax.tile_exists(-1, 0, level=5)
+        assert not isyntax.tile_exists(0, 1000, level=5)
+
+    def test_missing_tile_is_white(self, isyntax: ISyntax) -> None:
+        # The sample slide has both tissue and background tiles.
+        mask = isyntax.tile_mask(0)
+        assert mask.any()
+        ys, xs = np.nonzero(~mask)
+        tile = isyntax.read_tile(int(xs[0]), int(ys[0]), level=0)
+        np.testing.assert_array_equal(tile, np.full_like(tile, 255))
+
+    def test_iter_tiles_skip_empty(self, isyntax: ISyntax) -> None:
+        mask = isyntax.tile_mask(5)
+        coords = [(x, y) for x, y, _ in isyntax.iter_tiles(5, skip_empty=True)]
+        assert coords == [(int(x), int(y)) for y, x in zip(*np.nonzero(mask), strict=True)]
+
+    def test_iter_tiles_stops_early(self, isyntax: ISyntax) -> None:
+        tiles = isyntax.iter_tiles(5, prefetch=4)
+        for _ in range(2):
+            next(tiles)
+        # Waits for the tiles that are still being decoded.
+        tiles.close()
+        assert isyntax.read_tile(0, 0, level=5).shape == (256, 256, 4)
+
+    def test_open_with_index_path(self, sample_isyntax_file: Path, tmp_path: Path) -> None:
+        index_path = tmp_path / "testslide.isyntax.idx"
+        with ISyntax.open(sample_isyntax_file, index_path=index_path) as isyntax:
+            assert not isyntax.is_opened_from_index
+            expected = isyntax.read_tile(1, 1, level=3)
+            level_tiles = isyntax.level_tiles
+            barcode = isyntax.barcode
+        assert index_path.is_file()
+        with ISyntax.open(sample_isyntax_file, index_path=index_path) as isyntax:
+            assert isyntax.is_opened_from_index
+            assert isyntax.level_tiles == level_tiles
+            assert isyntax.barcode == barcode
+            np.testing.assert_array_equal(isyntax.read_tile(1, 1, level=3), expected)
+
+    def test_open_with_invalid_index(self, sample_isyntax_file: Path, tmp_path: Path) -> None:
+        index_path = tmp_path / "testslide.isyntax.idx"
+        index_path.write_bytes(b"not an index")
+        with ISyntax.open(sample_isyntax_file, index_path=index_path) as isyntax:
+            assert not isyntax.is_opened_from_index
+        # The index was replaced by a valid one.
+        with ISyntax.open(sample_isyntax_file, index_path=index_path) as isyntax:
+            assert isyntax.is_opened_from_index
+
+    def test_read_region_releases_gil(self, sample_isyntax_file: Path) -> None:
+        count = 0
+        stop = threading.Event()
+
+        def spin() -> None:
+            nonlocal count
+            while not stop.is_set():
+                count += 1
+
+        thread = threading.Thread(target=spin)
+        thread.start()
+        try:
+            # Rate at which the other thread makes progress while this one is idle.
+            start_count, start_time = count, time.perf_counter()
+            time.sleep(0.1)
+            idle_rate = (count - start_count) / (time.perf_counter() - start_time)
+            with ISyntax.open(sample_isyntax_file, io="native") as isyntax:
+                start_count, start_time = count, time.perf_counter()
+                isyntax.read_region(4096, 4096, 1024, 1024, level=0)
+                busy_rate = (count - start_count) / (time.perf_counter() - start_time)
+        finally:
+            stop.set()
+            thread.join()
+        # With the GIL held during decoding, the other thread would be starved.
+        assert busy_rate > 0.25 * idle_rate
+
     def test_read_label_image_jpeg(self, isyntax: ISyntax, mocker: MockerFixture) -> None:
         free_spy = mocker.spy(libisyntax, "free")
         jpeg_data = isyntax.read_label_image_jpeg()
@@ -129,6 +333,13 @@ class TestISyntax:
         isyntax.close()
         assert isyntax.closed
 
+    def test_read_after_close(self, isyntax: ISyntax) -> None:
+        isyntax.close()
+        with pytest.raises(ValueError, match="slide is closed"):
+            isyntax.read_tile(0, 0, level=4)
+        with pytest.raises(ValueError, match="slide is closed"):
+            _ = isyntax.wsi
+
     def test_cache_is_destroyed_on_close(self, isyntax: ISyntax, mocker: MockerFixture) -> None:
         destroy_spy = mocker.spy(libisyntax, "cache_destroy")
         # Reading image data causes the cache to be created.
@@ -142,3 +353,270 @@ class TestISyntax:
         f = io.BytesIO()
         with pytest.raises(libisyntax.LibISyntaxFatalError), ISyntax(f, 0):
             pass
+
+    def test_read_tile_native_io(self, sample_isyntax_file: Path) -> None:
+        with ISyntax.open(sample_isyntax_file, io="native") as isyntax:
+            rgba = isyntax.read_tile(0, 0, level=7)
+        actual = tuple(rgba[45, 97])
+        expected = (145, 108, 87, 255)
+        assert actual == expected
+
+    def test_read_tile_mmap_io(self, sample_isyntax_file: Path) -> None:
+        with ISyntax.open(sample_isyntax_file) as isyntax:
+            expected = isyntax.read_tiles([(0, 0), (1, 1)], level=3)
+        with ISyntax.open(sample_isyntax_file, io="mmap") as isyntax:
+            np.testing.assert_array_equal(isyntax.read_tiles([(0, 0), (1, 1)], level=3), expected)
+
+    def test_mmap_io_rejects_empty_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "empty.isyntax"
+        path.touch()
+        with path.open("rb") as f, pytest.raises(RuntimeError, match="MMAP"):
+            ISyntax(f, 0, io="mmap")
+
+    def test_native_io_requires_file_descriptor(self) -> None:
+        f = io.BytesIO()
+        with pytest.raises(ValueError, match="file descriptor"):
+            ISyntax(f, 0, io="native")
+
+    def test_unknown_io_backend(self) -> None:
+        f = io.BytesIO()
+        with pytest.raises(ValueError, match="unknown I/O backend"):
+            ISyntax(f, 0, io="carrier-pigeon")  # type: ignore[arg-type]
+
+
+class TestISyntaxCache:
+    def test_new_cache_is_empty(self) -> None:
+        cache = ISyntaxCache(max_bytes=1 << 20)
+        stats = cache.stats()
+        assert stats.resident_tiles == 0
+        assert stats.resident_bytes == 0
+        assert stats.evictions == 0
+        assert stats.levels == ()
+        assert stats.hit_rate == 0.0
+
+    def test_stats(self, sample_isyntax_file: Path) -> None:
+        with ISyntax.open(sample_isyntax_file) as isyntax:
+            cache = isyntax.get_cache()
+            isyntax.read_tile(0, 0, level=6)
+            first = cache.stats()
+            assert first.misses > 0
+            isyntax.read_tile(0, 0, level=6)
+            second = cache.stats()
+        assert second.hits > first.hits
+        assert second.misses == first.misses
+        assert len(second.levels) == isyntax.level_count
+        assert sum(level.resident_tiles for level in second.levels) == second.resident_tiles
+        assert sum(level.resident_bytes for level in second.levels) == second.resident_bytes
+        assert sum(level.misses for level in second.levels) == second.misses
+        # Reads at level 6 only need tiles from level 6 upwards, and hand LL coefficients
+        # down to their children at level 5.
+        assert second.levels[4].resident_tiles == 0
+
+    def test_resize_and_clear(self, sample_isyntax_file: Path) -> None:
+        with ISyntax.open(sample_isyntax_file) as isyntax:
+            cache = isyntax.get_cache()
+            isyntax.read_tiles([(x, y) for y in range(3) for x in range(3)], level=4)
+            resident_tiles = cache.stats().resident_tiles
+            cache.resize(resident_tiles // 2)
+            stats = cache.stats()
+            assert stats.resident_tiles == resident_tiles // 2
+            assert stats.evictions == resident_tiles - resident_tiles // 2
+            cache.clear()
+            assert cache.stats().resident_tiles == 0
+            assert cache.stats().resident_bytes == 0
+            cache.reset_stats()
+            assert cache.stats().evictions == 0
+
+    def test_shared_between_slides(self, sample_isyntax_file: Path) -> None:
+        max_bytes = 4 << 20
+        cache = ISyntaxCache(cache_size=None, max_bytes=max_bytes)
+        coords = [(x, 0) for x in range(8)]
+        with (
+            ISyntax.open(sample_isyntax_file, cache=cache) as a,
+            ISyntax.open(sample_isyntax_file, cache=cache) as b,
+        ):
+            assert a.get_cache() is cache
+            assert b.get_cache() is cache
+            expected = a.read_tiles(coords, level=3)
+            np.testing.assert_array_equal(b.read_tiles(coords, level=3), expected)
+            stats = cache.stats()
+            assert 0 < stats.resident_bytes <= max_bytes
+            assert stats.evictions > 0
+            a.close()
+            # Closing a slide evicts its tiles, but leaves the cache usable by the others.
+            assert cache.stats().resident_bytes < stats.resident_bytes
+            np.testing.assert_array_equal(b.read_tiles(coords, level=3), expected)
+        assert cache.stats().resident_bytes == 0
+
+    def test_global_cache(self, sample_isyntax_file: Path) -> None:
+        cache = ISyntaxCache(max_bytes=64 << 20)
+        ISyntaxCache.set_global(cache)
+        try:
+            with ISyntax.open(sample_isyntax_file) as isyntax:
+                isyntax.read_tile(0, 0, level=7)
+                assert isyntax.get_cache() is cache
+                assert cache.stats().resident_tiles > 0
+        finally:
+            ISyntaxCache.set_global(None)
+
+
+def run_in_forked_child(func: Callable[[], bool]) -> bool:
+    """Runs a function in a forked child process, and returns its result."""
+    with warnings.catch_warnings():
+        # Forking a process with threads (like libisyntax's workers) is deprecated.
+        warnings.simplefilter("ignore", DeprecationWarning)
+        pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            status = 0 if func() else 1
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status) == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+class TestFork:
+    def test_cache_is_recreated(self) -> None:
+        cache = ISyntaxCache(cache_size=10)
+        parent_ptr = cache.ptr
+
+        def check() -> bool:
+            return cache.ptr != parent_ptr and cache.stats().resident_tiles == 0
+
+        assert run_in_forked_child(check)
+        assert cache.ptr == parent_ptr
+
+    @pytest.mark.parametrize("from_path", [True, False])
+    def test_read_after_fork(self, sample_isyntax_file: Path, from_path: bool) -> None:
+        if from_path:
+            isyntax = ISyntax.open(sample_isyntax_file)
+        else:
+            data = sample_isyntax_file.read_bytes()
+            isyntax = ISyntax(io.BytesIO(data), len(data))
+        with isyntax:
+            expected = isyntax.read_tile(1, 1, level=3)
+            assert run_in_forked_child(
+                lambda: np.array_equal(isyntax.read_tile(1, 1, level=3), expected)
+            )
+            np.testing.assert_array_equal(isyntax.read_tile(1, 1, level=3), expected)
+
+
+def test_pickle(sample_isyntax_file: Path, tmp_path: Path) -> None:
+    index_path = tmp_path / "testslide.isyntax.idx"
+    with ISyntax.open(sample_isyntax_file, index_path=index_path) as isyntax:
+        expected = isyntax.read_tile(1, 1, level=3)
+        with pickle.loads(pickle.dumps(isyntax)) as unpickled:  # noqa: S301
+            assert unpickled.is_opened_from_index is False
+            np.testing.assert_array_equal(unpickled.read_tile(1, 1, level=3), expected)
+            assert unpickled.is_opened_from_index
+            assert unpickled.dimensions == isyntax.dimensions
+
+
+def test_pickle_requires_path(sample_isyntax_file: Path) -> None:
+    data = sample_isyntax_file.read_bytes()
+    with ISyntax(io.BytesIO(data), len(data)) as isyntax, pytest.raises(TypeError):
+        pickle.dumps(isyntax)
+
+
+def test_read_region_scaled(sample_isyntax_file: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        # Exact power-of-two downsamples are read from the matching level as they are.
+        expected = isyntax.read_region(64, 32, 200, 100, level=3)
+        actual = isyntax.read_region_scaled(64 * 8, 32 * 8, 200 * 8, 100 * 8, (200, 100))
+        np.testing.assert_array_equal(actual, expected)
+
+        region = isyntax.read_region(64, 32, 200, 100, level=2, pixel_format="RGB")
+        averaged = region.reshape(50, 2, 100, 2, 3).mean(axis=(1, 3))
+        actual = isyntax.read_region_scaled(
+            64 * 4, 32 * 4, 200 * 4, 100 * 4, (100, 50), pixel_format="RGB", level=2
+        )
+        assert np.abs(actual.astype(np.float64) - averaged).max() <= 1
+
+        # A downsample of 3 is read from level 1 rather than level 0.
+        actual = isyntax.read_region_scaled(60, 60, 600, 600, (200, 200))
+        expected = isyntax.read_region_scaled(60, 60, 600, 600, (200, 200), level=1)
+        np.testing.assert_array_equal(actual, expected)
+        with pytest.raises(ValueError, match="positive"):
+            isyntax.read_region_scaled(0, 0, 0, 10, (10, 10))
+
+
+def test_get_thumbnail(sample_isyntax_file: Path, tmp_path: Path) -> None:
+    index_path = tmp_path / "testslide.isyntax.idx"
+    with ISyntax.open(sample_isyntax_file, index_path=index_path) as isyntax:
+        width, height = isyntax.dimensions
+        thumbnail = isyntax.get_thumbnail(256)
+        assert max(thumbnail.shape[:2]) == 256  # noqa: PLR2004
+        assert thumbnail.shape[2] == 3  # noqa: PLR2004
+        assert abs(thumbnail.shape[1] / thumbnail.shape[0] - width / height) < 0.02  # noqa: PLR2004
+        # Sizes may be NumPy integers, e.g. when computed from array shapes.
+        np.testing.assert_array_equal(isyntax.get_thumbnail(np.int64(256)), thumbnail)
+
+        cached = isyntax.get_thumbnail(256, use_cache=True)
+        np.testing.assert_array_equal(cached, thumbnail)
+        (cache_file,) = tmp_path.glob("*.npy")
+        np.testing.assert_array_equal(np.load(cache_file), thumbnail)
+        np.testing.assert_array_equal(isyntax.get_thumbnail(256, use_cache=True), thumbnail)
+
+    with ISyntax.open(sample_isyntax_file) as isyntax, pytest.raises(ValueError, match="index"):
+        isyntax.get_thumbnail(256, use_cache=True)
+
+
+def test_level_properties(sample_isyntax_file: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        assert isyntax.level_count == isyntax.wsi.level_count
+        level = isyntax.wsi.get_level(2)
+        assert isyntax.level_dimensions[2] == (level.width, level.height)
+        assert isyntax.level_tiles[2] == (level.width_in_tiles, level.height_in_tiles)
+        assert isyntax.level_downsamples[2] == 1 << level.scale
+        assert isyntax.metadata.tile_size == (isyntax.tile_width, isyntax.tile_height)
+        # Served from the metadata, but as plain Python numbers.
+        assert type(isyntax.level_dimensions[2][0]) is int
+        assert type(isyntax.mpp_x) is float
+
+
+def test_slide_metadata() -> None:
+    metadata = SlideMetadata(
+        barcode="",
+        tile_size=(256, 256),
+        offset=(10, 20),
+        level_dimensions=np.array([[1000, 500], [500, 250]]),
+        level_tiles=np.array([[4, 2], [2, 1]]),
+        level_scales=np.array([0, 1]),
+        level_downsamples=np.array([1, 2]),
+        level_mpp=np.array([[0.25, 0.3], [0.5, 0.6]]),
+    )
+    assert metadata.level_count == 2  # noqa: PLR2004
+    assert metadata.dimensions == (1000, 500)
+    assert type(metadata.dimensions[0]) is int
+    assert (metadata.mpp_x, metadata.mpp_y) == (0.25, 0.3)
+    assert type(metadata.mpp_x) is float
+    with pytest.raises(AttributeError):
+        metadata.barcode = "changed"  # type: ignore[misc]
+
+
+def test_metadata(sample_isyntax_file: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        metadata = isyntax.metadata
+        assert isyntax.metadata is metadata
+        assert metadata.barcode == libisyntax.get_barcode(isyntax.ptr).decode("ascii", "replace")
+        assert metadata.level_count == isyntax.wsi.level_count
+        level = isyntax.wsi.get_level(1)
+        assert metadata.level_dimensions[1].tolist() == [level.width, level.height]
+        assert metadata.level_downsamples[1] == 1 << level.scale
+        assert not metadata.level_dimensions.flags.writeable
+        # Level 0 coordinates are mapped to all levels at once.
+        coords = np.array([1000, 2000]) // metadata.level_downsamples[:, None]
+        assert coords[2].tolist() == [250, 500]
+
+
+def test_iter_strips(sample_isyntax_file: Path) -> None:
+    with ISyntax.open(sample_isyntax_file) as isyntax:
+        x, y, width, height = 300, 200, 700, 1100
+        expected = isyntax.read_region(x, y, width, height, level=2, pixel_format="RGB")
+        strips = list(isyntax.iter_strips(x, y, width, height, level=2, pixel_format="RGB"))
+        assert [top for top, _ in strips] == list(range(y, y + height, isyntax.tile_height))
+        np.testing.assert_array_equal(np.concatenate([strip for _, strip in strips]), expected)
+        skipped = isyntax.iter_strips(x, y, width, height, 2, "RGB", skip_empty=True)
+        np.testing.assert_array_equal(np.concatenate([strip for _, strip in skipped]), expected)